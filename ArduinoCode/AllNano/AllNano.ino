@@ -20,10 +20,53 @@
 #define SERVO_PHI_PIN 5
 #define SERVO_GRIPPER_PIN 6
 
+// Readiness probe: [0x05] -> "READY"
+#define PING_HEADER 0x05
+
 // --- OBJECTS & VARIABLES ---
 Servo servoPhi;
 Servo servoGripper;
 
+// --- VELOCITY PROFILE (optional, sent by Python before a move) ---
+// Format: [0x03] [N] N x ([STEPS-4B] [START_US-2B] [END_US-2B])
+// The interval of the lead axis changes linearly inside each segment.
+// A profile is used for the next move only.
+#define MAX_SEGMENTS 5
+unsigned long segSteps[MAX_SEGMENTS];
+unsigned int segStart[MAX_SEGMENTS];
+unsigned int segEnd[MAX_SEGMENTS];
+byte segCount = 0;
+
+// --- BINARY STATUS PROTOCOL ---
+// Sequenced command: [0x11] [SEQ] [same 17 bytes as 0x01] [XOR checksum of SEQ..SV2]
+// Status reply:      [0xA5] [SEQ] [STATUS] [S1-4B] [S2-4B] [S3-4B] [XOR checksum of SEQ..S3]
+// Sequenced commands get status frames only, no text.
+#define SEQ_HEADER 0x11
+#define STATUS_SYNC 0xA5
+#define STATUS_ACCEPTED 0x01
+#define STATUS_DONE 0x02
+#define STATUS_BAD_CHECKSUM 0x10
+#define STATUS_SYNC_ERROR 0x11
+#define STATUS_PROGRAM_TOO_LONG 0x12
+
+// --- PROGRAM MODE ---
+// Upload: [0x21] [BASE SEQ] [N] N x ([same 17 bytes as 0x01] [DWELL_MS-2B]) [XOR checksum of BASE SEQ..last]
+// The whole program is stored, then run locally; move i reports with sequence number BASE SEQ + i.
+#define PROGRAM_HEADER 0x21
+#define MAX_PROGRAM_MOVES 16
+long progSteps1[MAX_PROGRAM_MOVES];
+long progSteps2[MAX_PROGRAM_MOVES];
+long progSteps3[MAX_PROGRAM_MOVES];
+byte progDir1[MAX_PROGRAM_MOVES];
+byte progDir2[MAX_PROGRAM_MOVES];
+byte progDir3[MAX_PROGRAM_MOVES];
+byte progServoPhi[MAX_PROGRAM_MOVES];
+byte progServoGripper[MAX_PROGRAM_MOVES];
+unsigned int progDwell[MAX_PROGRAM_MOVES];
+
+bool binaryMode = false; // Last valid command was sequenced
+byte rxChecksum = 0;
+
 void setup() {
   Serial.begin(115200);
   
@@ -48,6 +91,36 @@ void setup() {
 }
 
 void loop() {
+  // Readiness probe from the host: answer at once, nothing else changes
+  if (Serial.available() && Serial.peek() == PING_HEADER) {
+    Serial.read();
+    Serial.println("READY");
+    return;
+  }
+
+  // Velocity profile for the next move
+  if (Serial.available() >= 2 && Serial.peek() == 0x03) {
+    Serial.read();
+    readProfile();
+    return;
+  }
+
+  // Program upload
+  if (Serial.available() >= 3 && Serial.peek() == PROGRAM_HEADER) {
+    Serial.read();
+    handleProgram();
+    return;
+  }
+  if (Serial.peek() == PROGRAM_HEADER) return; // Wait for the program header
+
+  // Sequenced command with binary status replies
+  if (Serial.available() >= 20 && Serial.peek() == SEQ_HEADER) {
+    Serial.read();
+    handleSequenced();
+    return;
+  }
+  if (Serial.peek() == SEQ_HEADER) return; // Wait for the rest of the frame
+
   // We expect exactly 18 bytes from Python
   // Format: [0x01] [S1-4B] [S2-4B] [S3-4B] [D1] [D2] [D3] [SV1] [SV2]
   if (Serial.available() >= 18) {
@@ -56,8 +129,11 @@ void loop() {
     if (Serial.read() != 0x01) {
       // If sync lost, clear buffer
       while(Serial.available()) Serial.read();
+      segCount = 0;
+      if (binaryMode) sendStatus(0, STATUS_SYNC_ERROR, 0, 0, 0);
       return;
     }
+    binaryMode = false;
 
     // --- READ DATA ---
     long steps1 = readLong();
@@ -86,15 +162,134 @@ void loop() {
   }
 }
 
+void handleSequenced() {
+  rxChecksum = 0;
+  byte seq = readByte();
+  long steps1 = readLong();
+  long steps2 = readLong();
+  long steps3 = readLong();
+  byte dir1 = readByte();
+  byte dir2 = readByte();
+  byte dir3 = readByte();
+  byte valServoPhi = readByte();
+  byte valServoGripper = readByte();
+  byte expected = rxChecksum;
+  byte received = readByte();
+  binaryMode = true;
+
+  if (received != expected) {
+    // Corrupted frame: drop it, its profile and everything queued behind it
+    while (Serial.available()) Serial.read();
+    segCount = 0;
+    sendStatus(seq, STATUS_BAD_CHECKSUM, 0, 0, 0);
+    return;
+  }
+
+  executeMove(seq, steps1, dir1, steps2, dir2, steps3, dir3, valServoPhi, valServoGripper);
+}
+
+void handleProgram() {
+  rxChecksum = 0;
+  segCount = 0; // Programs run at the fixed speeds
+  byte baseSeq = readByte();
+  byte count = readByte();
+  for (byte i = 0; i < count; i++) {
+    // Overlong programs are still read to the end, then rejected
+    byte slot = i < MAX_PROGRAM_MOVES ? i : MAX_PROGRAM_MOVES - 1;
+    progSteps1[slot] = readLong();
+    progSteps2[slot] = readLong();
+    progSteps3[slot] = readLong();
+    progDir1[slot] = readByte();
+    progDir2[slot] = readByte();
+    progDir3[slot] = readByte();
+    progServoPhi[slot] = readByte();
+    progServoGripper[slot] = readByte();
+    progDwell[slot] = readUInt();
+  }
+  byte expected = rxChecksum;
+  byte received = readByte();
+  binaryMode = true;
+
+  if (count > MAX_PROGRAM_MOVES || received != expected) {
+    while (Serial.available()) Serial.read();
+    sendStatus(baseSeq, count > MAX_PROGRAM_MOVES ? STATUS_PROGRAM_TOO_LONG : STATUS_BAD_CHECKSUM, 0, 0, 0);
+    return;
+  }
+
+  for (byte i = 0; i < count; i++) {
+    executeMove(baseSeq + i, progSteps1[i], progDir1[i], progSteps2[i], progDir2[i],
+                progSteps3[i], progDir3[i], progServoPhi[i], progServoGripper[i]);
+    delay(progDwell[i]);
+  }
+}
+
+void executeMove(byte seq, long steps1, byte dir1, long steps2, byte dir2, long steps3, byte dir3,
+                 byte valServoPhi, byte valServoGripper) {
+  sendStatus(seq, STATUS_ACCEPTED, 0, 0, 0);
+  servoPhi.write(valServoPhi);
+  servoGripper.write(valServoGripper);
+  delay(200); // Give servos a moment to start moving
+  moveSimultaneous(steps1, dir1, steps2, dir2, steps3, dir3);
+  sendStatus(seq, STATUS_DONE, steps1, steps2, steps3);
+}
+
+void sendStatus(byte seq, byte status, long steps1, long steps2, long steps3) {
+  byte frame[16];
+  frame[0] = STATUS_SYNC;
+  frame[1] = seq;
+  frame[2] = status;
+  long steps[3] = {steps1, steps2, steps3};
+  for (int axis = 0; axis < 3; axis++) {
+    for (int i = 0; i < 4; i++) frame[3 + 4 * axis + i] = (steps[axis] >> (8 * (3 - i))) & 0xFF;
+  }
+  byte checksum = 0;
+  for (int i = 1; i < 15; i++) checksum ^= frame[i];
+  frame[15] = checksum;
+  Serial.write(frame, 16);
+}
+
+// Helper to read one byte (folded into the running checksum)
+byte readByte() {
+  while (!Serial.available()); // Wait for byte
+  byte value = Serial.read();
+  rxChecksum ^= value;
+  return value;
+}
+
 // Helper to read 4 bytes as a long integer
 long readLong() {
   long value = 0;
   for (int i = 0; i < 4; i++) {
-    while (!Serial.available()); // Wait for byte
-    value = (value << 8) | Serial.read();
+    value = (value << 8) | readByte();
   }
   return value;
 }
+// Helper to read 2 bytes as an unsigned int
+unsigned int readUInt() {
+  unsigned int value = 0;
+  for (int i = 0; i < 2; i++) {
+    value = (value << 8) | readByte();
+  }
+  return value;
+}
+
+void readProfile() {
+  while (!Serial.available());
+  byte count = Serial.read();
+  segCount = 0;
+  for (byte i = 0; i < count; i++) {
+    unsigned long steps = (unsigned long)readLong();
+    unsigned int startUs = readUInt();
+    unsigned int endUs = readUInt();
+    if (steps > 0 && segCount < MAX_SEGMENTS) {
+      segSteps[segCount] = steps;
+      segStart[segCount] = startUs;
+      segEnd[segCount] = endUs;
+      segCount++;
+    }
+  }
+}
+
 // Linear Interpolation Algorithm for smooth simultaneous movement
 void moveSimultaneous(long s1, byte d1, long s2, byte d2, long s3, byte d3) {
   
@@ -109,7 +304,10 @@ void moveSimultaneous(long s1, byte d1, long s2, byte d2, long s3, byte d3) {
   if (s3 > maxSteps) maxSteps = s3;
 
   // If no movement needed, exit
-  if (maxSteps == 0) return;
+  if (maxSteps == 0) {
+    segCount = 0;
+    return;
+  }
 
   // --- NEW: ADAPTIVE SPEED SETTING ---
   long stepDelay;
@@ -131,8 +329,24 @@ void moveSimultaneous(long s1, byte d1, long s2, byte d2, long s3, byte d3) {
   long count2 = 0;
   long count3 = 0;
 
+  // Profile position
+  byte seg = 0;
+  unsigned long segPos = 0;
+
   for (long i = 0; i < maxSteps; i++) {
     
+    // Step interval from the profile (falls back to the fixed delay)
+    long interval = stepDelay + 10;
+    if (seg < segCount) {
+      long span = (long)segEnd[seg] - (long)segStart[seg];
+      interval = segStart[seg] + (long)((float)span * segPos / segSteps[seg]);
+      segPos++;
+      if (segPos >= segSteps[seg]) {
+        seg++;
+        segPos = 0;
+      }
+    }
+    
     // Check Motor 1
     count1 += s1;
     if (count1 >= maxSteps) {
@@ -162,7 +376,10 @@ void moveSimultaneous(long s1, byte d1, long s2, byte d2, long s3, byte d3) {
     digitalWrite(STEP_PIN_2, LOW);
     digitalWrite(STEP_PIN_3, LOW);
 
-    // Speed Control (Use the variable we set above)
-    delayMicroseconds(stepDelay); 
+    // Speed Control (profile interval minus the 10us pulse)
+    delayMicroseconds(interval > 10 ? interval - 10 : 0); 
   }
+
+  // Profile is used up
+  segCount = 0;
 }
\ No newline at end of file
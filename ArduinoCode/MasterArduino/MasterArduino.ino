@@ -8,6 +8,38 @@
 // I2C addresses
 #define ARDUINO_3_ADDRESS 9  
 
+// Readiness probe: [0x05] -> "READY"
+#define PING_HEADER 0x05
+
+// --- BINARY STATUS PROTOCOL ---
+// Sequenced command: [0x11] [SEQ] [same 17 bytes as 0x01] [XOR checksum of SEQ..SV2]
+// Status reply:      [0xA5] [SEQ] [STATUS] [M1-4B] [M2-4B] [Z-4B] [XOR checksum of SEQ..Z]
+// Sequenced commands get status frames only, no text.
+#define SEQ_HEADER 0x11
+#define STATUS_SYNC 0xA5
+#define STATUS_ACCEPTED 0x01
+#define STATUS_DONE 0x02
+#define STATUS_FAULT 0x03
+#define STATUS_BAD_CHECKSUM 0x10
+#define STATUS_SYNC_ERROR 0x11
+#define STATUS_PROGRAM_TOO_LONG 0x12
+
+// --- PROGRAM MODE ---
+// Upload: [0x21] [BASE SEQ] [N] N x ([same 17 bytes as 0x01] [DWELL_MS-2B]) [XOR checksum of BASE SEQ..last]
+// The whole program is stored, then run locally; move i reports with sequence number BASE SEQ + i.
+#define PROGRAM_HEADER 0x21
+#define MAX_PROGRAM_MOVES 16
+long progSteps1[MAX_PROGRAM_MOVES];
+long progStepsZ[MAX_PROGRAM_MOVES];
+byte progDir1[MAX_PROGRAM_MOVES];
+byte progDirZ[MAX_PROGRAM_MOVES];
+byte progServoPhi[MAX_PROGRAM_MOVES];
+byte progServoGripper[MAX_PROGRAM_MOVES];
+unsigned int progDwell[MAX_PROGRAM_MOVES];
+
+bool binaryMode = false; // Last valid command was sequenced
+byte rxChecksum = 0;
+
 void setup() {
   Serial.begin(9600);
   Wire.begin(); 
@@ -26,17 +58,44 @@ void setup() {
 }
 
 void loop() {
+  // Readiness probe from the host: answer at once, nothing else changes
+  if (Serial.available() && Serial.peek() == PING_HEADER) {
+    Serial.read();
+    Serial.println("READY");
+    return;
+  }
+
+  // Program upload
+  if (Serial.available() >= 3 && Serial.peek() == PROGRAM_HEADER) {
+    Serial.read();
+    handleProgram();
+    return;
+  }
+
+  // Sequenced command with binary status replies
+  if (Serial.available() >= 20 && Serial.peek() == SEQ_HEADER) {
+    Serial.read();
+    handleSequenced();
+    return;
+  }
+
   if (Serial.available() >= 18) {
     byte header = Serial.peek(); // Peek at the first byte without removing it
     
     // FIX: Buffer Synchronization
-    if (header != 0x01) {
+    if (header != 0x01 && header != SEQ_HEADER) {
       // If the first byte isn't our header, we are out of sync!
-      Serial.print("SYNC ERROR: Found "); Serial.println(header, HEX);
       while(Serial.available()) Serial.read(); // Dump the garbage
-      Serial.println("Buffer flushed");
+      if (binaryMode) {
+        sendStatus(0, STATUS_SYNC_ERROR, 0, 0, 0);
+      } else {
+        Serial.print("SYNC ERROR: Found "); Serial.println(header, HEX);
+        Serial.println("Buffer flushed");
+      }
       return; 
     }
+    if (header == SEQ_HEADER) return; // Wait for the rest of the sequenced frame
+    binaryMode = false;
 
     // Read the Header
     Serial.read(); 
@@ -55,7 +114,7 @@ void loop() {
     Serial.println("ACK: Data Received"); 
 
     // 1. Send to Arduino 3 (I2C)
-    sendToArduino3(stepsZ, dirZ, servo_phi, servo_gripper);
+    sendToArduino3(stepsZ, dirZ, servo_phi, servo_gripper, true);
     
     // 2. Move Local Motor
     if (steps1 != 0) {
@@ -67,17 +126,114 @@ void loop() {
   }
 }
 
+void handleSequenced() {
+  rxChecksum = 0;
+  byte seq = readByte();
+  long steps1 = readLong();
+  long steps2 = readLong(); // Ignore Motor 2
+  long stepsZ = readLong();
+  byte dir1 = readByte();
+  byte dir2 = readByte(); // Ignore Motor 2
+  byte dirZ = readByte();
+  byte servo_phi = readByte();
+  byte servo_gripper = readByte();
+  byte expected = rxChecksum;
+  byte received = readByte();
+  binaryMode = true;
+
+  if (received != expected) {
+    // Corrupted frame: drop it and everything queued behind it
+    while(Serial.available()) Serial.read();
+    sendStatus(seq, STATUS_BAD_CHECKSUM, 0, 0, 0);
+    return;
+  }
+
+  executeMove(seq, steps1, dir1, stepsZ, dirZ, servo_phi, servo_gripper);
+}
+
+void handleProgram() {
+  rxChecksum = 0;
+  byte baseSeq = readByte();
+  byte count = readByte();
+  for (byte i = 0; i < count; i++) {
+    // Overlong programs are still read to the end, then rejected
+    byte slot = i < MAX_PROGRAM_MOVES ? i : MAX_PROGRAM_MOVES - 1;
+    progSteps1[slot] = readLong();
+    readLong(); // Ignore Motor 2
+    progStepsZ[slot] = readLong();
+    progDir1[slot] = readByte();
+    readByte(); // Ignore Motor 2
+    progDirZ[slot] = readByte();
+    progServoPhi[slot] = readByte();
+    progServoGripper[slot] = readByte();
+    progDwell[slot] = readUInt();
+  }
+  byte expected = rxChecksum;
+  byte received = readByte();
+  binaryMode = true;
+
+  if (count > MAX_PROGRAM_MOVES || received != expected) {
+    while(Serial.available()) Serial.read();
+    sendStatus(baseSeq, count > MAX_PROGRAM_MOVES ? STATUS_PROGRAM_TOO_LONG : STATUS_BAD_CHECKSUM, 0, 0, 0);
+    return;
+  }
+
+  for (byte i = 0; i < count; i++) {
+    executeMove(baseSeq + i, progSteps1[i], progDir1[i], progStepsZ[i], progDirZ[i],
+                progServoPhi[i], progServoGripper[i]);
+    delay(progDwell[i]);
+  }
+}
+
+void executeMove(byte seq, long steps1, byte dir1, long stepsZ, byte dirZ, byte servo_phi, byte servo_gripper) {
+  sendStatus(seq, STATUS_ACCEPTED, 0, 0, 0);
+  bool slaveOk = sendToArduino3(stepsZ, dirZ, servo_phi, servo_gripper, false);
+  if (steps1 != 0) {
+    moveStepperLocal(steps1, dir1);
+  }
+  sendStatus(seq, slaveOk ? STATUS_DONE : STATUS_FAULT, steps1, 0, slaveOk ? stepsZ : 0);
+}
+
+void sendStatus(byte seq, byte status, long steps1, long steps2, long stepsZ) {
+  byte frame[16];
+  frame[0] = STATUS_SYNC;
+  frame[1] = seq;
+  frame[2] = status;
+  long steps[3] = {steps1, steps2, stepsZ};
+  for (int axis = 0; axis < 3; axis++) {
+    for (int i = 0; i < 4; i++) frame[3 + 4 * axis + i] = (steps[axis] >> (8 * (3 - i))) & 0xFF;
+  }
+  byte checksum = 0;
+  for (int i = 1; i < 15; i++) checksum ^= frame[i];
+  frame[15] = checksum;
+  Serial.write(frame, 16);
+}
+
+byte readByte() {
+  // Wait slightly if serial is slow
+  while(!Serial.available()); 
+  byte value = Serial.read();
+  rxChecksum ^= value;
+  return value;
+}
+
 long readLong() {
   long value = 0;
   for (int i = 0; i < 4; i++) {
-    // Wait slightly if serial is slow
-    while(!Serial.available()); 
-    value = (value << 8) | Serial.read();
+    value = (value << 8) | readByte();
+  }
+  return value;
+}
+
+unsigned int readUInt() {
+  unsigned int value = 0;
+  for (int i = 0; i < 2; i++) {
+    value = (value << 8) | readByte();
   }
   return value;
 }
 
-void sendToArduino3(long stepsZ, byte dirZ, byte servo_phi, byte servo_gripper) {
+bool sendToArduino3(long stepsZ, byte dirZ, byte servo_phi, byte servo_gripper, bool verbose) {
   Wire.beginTransmission(ARDUINO_3_ADDRESS);
   Wire.write(0xBB); // Header
   for (int i = 3; i >= 0; i--) Wire.write((stepsZ >> (8 * i)) & 0xFF);
@@ -88,6 +244,7 @@ void sendToArduino3(long stepsZ, byte dirZ, byte servo_phi, byte servo_gripper)
   
   byte error = Wire.endTransmission();
   
+  if (!verbose) return error == 0;
   if (error == 0) {
     Serial.println("I2C Success");
   } else {
@@ -97,6 +254,7 @@ void sendToArduino3(long stepsZ, byte dirZ, byte servo_phi, byte servo_gripper)
     // Error 3 = NACK on data
     // Error 5 = Timeout (Wires loose)
   }
+  return error == 0;
 }
 
 void moveStepperLocal(long steps, byte direction) {
@@ -1,7 +1,19 @@
+# Importable model: nothing runs at import. The report (scenarios from
+# scenarios.json, Monte Carlo, sensitivity) is built by main() or
+# build_report(), and every result is memoized on disk under a hash of the
+# assumptions below, so dashboards and notebooks get numbers without
+# recomputing or plotting. matplotlib is only imported to plot.
+#
+#   python ProjectFinancials.py [--config scenarios.json] [--no-plots] [--no-cache]
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy_financial as npf
 
 # ==========================================
 # 1. CONFIGURATION & ASSUMPTIONS
@@ -29,10 +41,170 @@ FIXED_COSTS_BREAKDOWN = {
 }
 TOTAL_FIXED_COSTS_NORMAL = sum(FIXED_COSTS_BREAKDOWN.values()) # $430,000
 
+# --- Long-term projection ---
+LONG_TERM_YEARS = 15
+LONG_TERM_CHURN = 0.05         # Annual churn after the 5-year ramp-up
+MAINTENANCE_UNITS = 20         # New units/year after Y5
+OPTIMIZED_FIXED_COSTS = 330000 # Low-cost years Y1-2
+
+# --- Monte Carlo (spreads are 1 sigma, relative to the scenario inputs) ---
+MC_DRAWS = 100000
+MC_CHUNK_SIZE = 50000          # Draws evaluated per vectorized chunk (bounds memory)
+COHORT_CHUNK_ELEMENTS = 2**22  # Per-scenario survival entries evaluated at once (32 MB)
+MC_VOLUME_SIGMA = 0.25         # Lognormal noise on the yearly new units
+MC_PRICE_SIGMA = 0.10          # Normal noise on the prices and COGS (per draw)
+MC_FIXED_COST_SIGMA = 0.08     # Normal noise on the yearly fixed costs
+MC_CHURN_MEAN = 0.05           # Beta-distributed annual churn (per draw)
+MC_CHURN_SD = 0.02
+
+# --- Scenarios and result cache ---
+SCENARIOS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios.json')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.financials_cache')
+CACHE_VERSION = 2              # Bump when a formula changes (invalidates cached results)
+
+# --- Sensitivity sweeps ---
+SWEEP_SPREAD = 0.20            # Default tornado range: baseline +/- 20%
+SWEEP_CHUNK_SIZE = 200000      # Grid points evaluated per vectorized chunk
+
 # ==========================================
 # 2. CALCULATION FUNCTIONS
 # ==========================================
 
+IRR_TOLERANCE = 1e-12   # On the discount factor 1/(1+r)
+IRR_MAX_ITER = 50       # Newton steps before falling back to bisection
+IRR_BRACKET = (-0.9999, 10.0)
+IRR_SCAN_POINTS = 200   # Log-spaced discount factors (~6% apart) scanned for rows with several IRRs
+IRR_SCAN_CHUNK = 1000   # Rows scanned per vectorized chunk
+
+def npv_batch(rates, cash_flows):
+    """
+    NPV of every row of a (scenarios x periods) cash flow matrix, period 0
+    undiscounted as npf.npv, for one rate or a vector of rates.
+    Returns (scenarios,) for a scalar rate, else (scenarios x rates).
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    rates = np.asarray(rates, dtype=float)
+    # Discount matrix (periods x rates): one matrix product for all scenarios and rates
+    discount = (1 + np.atleast_1d(rates)[None, :]) ** -np.arange(cash_flows.shape[1])[:, None]
+    npv = cash_flows @ discount
+    return npv[:, 0] if rates.ndim == 0 else npv
+
+def _polynomial(cash_flows, x):
+    """Sum of cf_t * x^t and its derivative for every row (Horner's scheme)"""
+    value = cash_flows[:, -1].copy()
+    slope = np.zeros_like(value)
+    for t in range(cash_flows.shape[1] - 2, -1, -1):
+        slope = slope * x + value
+        value = value * x + cash_flows[:, t]
+    return value, slope
+
+def _sign_changes(cash_flows):
+    """Number of sign changes along every row, zeros skipped (Descartes' bound on the IRRs)"""
+    signs = np.sign(cash_flows)
+    # Carry the last non-zero sign over zero cash flows
+    last = np.where(signs != 0, np.arange(signs.shape[1]), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    signs = np.take_along_axis(signs, last, axis=1)
+    return np.count_nonzero(signs[:, 1:] * signs[:, :-1] < 0, axis=1)
+
+def _scan_bracket(cash_flows, bracket, n_points=IRR_SCAN_POINTS):
+    """
+    Discount factor intervals (lo, hi) holding a sign change of the NPV for
+    every row, from a log-spaced grid over `bracket` that includes r = 0:
+    column 0 is the interval closest to r = 0 with r >= 0, column 1 the one
+    with r <= 0. NaN where a side has no sign change.
+    """
+    grid = np.union1d(np.geomspace(1 / (1 + bracket[1]), 1, n_points // 2),
+                      np.geomspace(1, 1 / (1 + bracket[0]), n_points // 2))
+    distance = np.abs((1 / grid[1:] + 1 / grid[:-1]) / 2 - 1)
+    sides = (grid[1:] <= 1, grid[:-1] >= 1)
+    lo = np.full((len(cash_flows), 2), np.nan)
+    hi = np.full((len(cash_flows), 2), np.nan)
+    for start in range(0, len(cash_flows), IRR_SCAN_CHUNK):
+        cf = cash_flows[start:start + IRR_SCAN_CHUNK]
+        value = np.repeat(cf[:, -1:], len(grid), axis=1)
+        with np.errstate(over='ignore'):
+            for t in range(cf.shape[1] - 2, -1, -1):
+                value *= grid
+                value += cf[:, t, None]
+        signs = np.sign(value)
+        change = signs[:, 1:] != signs[:, :-1]
+        for column, side in enumerate(sides):
+            score = np.where(change & side, distance, np.inf)
+            k = score.argmin(axis=1)
+            found = np.isfinite(score[np.arange(len(cf)), k])
+            lo[start:start + len(cf), column] = np.where(found, grid[k], np.nan)
+            hi[start:start + len(cf), column] = np.where(found, grid[k + 1], np.nan)
+    return lo, hi
+
+def _bisect(cash_flows, lo, hi, tol=IRR_TOLERANCE):
+    """Root of every row's NPV polynomial in the discount factor interval [lo, hi]"""
+    with np.errstate(over='ignore', invalid='ignore'):
+        f_lo = _polynomial(cash_flows, lo)[0]
+        for _ in range(200):
+            mid = (lo + hi) / 2
+            f_mid = _polynomial(cash_flows, mid)[0]
+            same = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(same, mid, lo)
+            f_lo = np.where(same, f_mid, f_lo)
+            hi = np.where(same, hi, mid)
+            if not np.any(hi - lo > tol * hi):
+                break
+    return (lo + hi) / 2
+
+def irr_batch(cash_flows, guess=0.0, tol=IRR_TOLERANCE, max_iter=IRR_MAX_ITER, bracket=IRR_BRACKET):
+    """
+    IRR of every row of a (scenarios x periods) cash flow matrix.
+    Rows with one sign change have a single IRR: Newton's method on the
+    discount factor x = 1/(1+r), where the NPV is a polynomial, started at
+    `guess`. Rows with several sign changes, and rows Newton does not solve,
+    are scanned on a grid over `bracket` and the sign changes nearest to
+    r = 0 are bisected, keeping the root closest to zero. Matches npf.irr
+    for roots inside `bracket`; rows with no IRR there are NaN.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n, n_periods = cash_flows.shape
+    # Leading zero cash flows only add roots at x = 0 (r = inf): shift them out
+    lead = np.argmax(cash_flows != 0, axis=1)
+    if lead.any():
+        cols = np.arange(n_periods) + lead[:, None]
+        cash_flows = np.where(cols < n_periods,
+                              np.take_along_axis(cash_flows, np.minimum(cols, n_periods - 1), axis=1), 0.0)
+    changes = _sign_changes(cash_flows)
+    has_root = changes > 0
+
+    x = np.full(n, 1 / (1 + guess))
+    converged = np.zeros(n, dtype=bool)
+    active = changes == 1
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        value, slope = _polynomial(cash_flows[active], x[active])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = value / slope
+        x_new = x[active] - step
+        ok = np.isfinite(x_new) & (x_new > 0)
+        done = ok & (np.abs(step) <= tol * np.maximum(1.0, np.abs(x_new)))
+        idx = np.flatnonzero(active)
+        x[idx[ok]] = x_new[ok]
+        converged[idx[done]] = True
+        active[idx[done | ~ok]] = False
+
+    # Several IRRs, or Newton diverged / left the domain: bisect the sign
+    # changes closest to r = 0 on either side and keep the nearer root (as npf.irr)
+    rest = np.flatnonzero(has_root & ~converged)
+    if len(rest):
+        lo, hi = _scan_bracket(cash_flows[rest], bracket)
+        found = ~np.isnan(lo)
+        roots = np.full(lo.shape, np.nan)
+        roots[found] = _bisect(cash_flows[rest[np.nonzero(found)[0]]], lo[found], hi[found], tol)
+        distance = np.where(found, np.abs(1 / roots - 1), np.inf)
+        nearest = distance.argmin(axis=1)
+        x[rest] = roots[np.arange(len(rest)), nearest]
+        converged[rest] = found.any(axis=1)
+
+    return np.where(has_root & converged, 1 / x - 1, np.nan)
+
 def calculate_scenario(name, volume_schedule, fixed_costs_schedule):
     """Calculates 5-year financials for a given scenario."""
     years_arr = np.arange(1, YEARS + 1)
@@ -60,11 +232,8 @@ def calculate_scenario(name, volume_schedule, fixed_costs_schedule):
     cum_cash_flow = np.cumsum(cash_flows)
     
     # Metrics
-    npv = npf.npv(DISCOUNT_RATE, cash_flows)
-    try:
-        irr = npf.irr(cash_flows)
-    except:
-        irr = np.nan
+    npv = npv_batch(DISCOUNT_RATE, cash_flows)[0]
+    irr = irr_batch(cash_flows)[0]
         
     return {
         'name': name,
@@ -82,57 +251,332 @@ def calculate_scenario(name, volume_schedule, fixed_costs_schedule):
         'irr': irr
     }
 
-def calculate_long_term_scenario(base_vol_schedule):
-    """Extends the Base Case to 15 years with churn and maintenance growth."""
-    long_term_years = 15
-    churn_rate = 0.05
-    
+def long_term_schedules(base_vol_schedule):
+    """15-year (new units, fixed costs) schedules extending a 5-year volume schedule."""
     # Extend Volume Schedule: Ramp up (Y1-5) + Maintenance (Y6-15)
     vol_ramp = np.array(base_vol_schedule)
-    vol_maint = np.full(long_term_years - 5, 20) # 20 new units/year after Y5
+    vol_maint = np.full(LONG_TERM_YEARS - 5, MAINTENANCE_UNITS)
     new_units = np.concatenate((vol_ramp, vol_maint))
-    
-    cash_flows = [-INITIAL_INVESTMENT]
-    total_clients = 0
-    
-    for t in range(long_term_years):
-        current_year = t + 1
-        
-        # Client Logic: Add new, subtract churn (after Y5)
-        if current_year <= 5:
-            total_clients += new_units[t]
+
+    # Fixed Costs: Assume Optimized Low Cost in Y1-2, Normal afterwards
+    years = np.arange(1, LONG_TERM_YEARS + 1)
+    fixed_costs = np.where(years <= 2, OPTIMIZED_FIXED_COSTS, TOTAL_FIXED_COSTS_NORMAL)
+    return new_units, fixed_costs
+
+def cohort_survival(churn, n_periods, churn_after=0, periods_per_year=1):
+    """
+    Share of every cohort still subscribed, laid out (scenarios x period t x cohort k).
+    churn: annual churn rates, either a scalar or (scenarios x 1) array (one rate
+    per scenario, as sample_assumptions draws it), or a churn curve by cohort age
+    in periods: (ages,), one curve per cohort (cohorts x ages) or per scenario
+    (scenarios x cohorts x ages). Rates are converted to the period length.
+    Clients do not churn in their first period nor before period `churn_after`.
+    The scenario axis has length 1 if the churn is shared by all scenarios.
+    """
+    churn = np.asarray(churn, dtype=float)
+    if churn.ndim == 2 and churn.shape[1] == 1:
+        churn = churn[:, :, None]  # One rate per scenario
+    if churn.ndim < 3:
+        churn = churn.reshape((1,) * (3 - churn.ndim) + churn.shape)
+    retention = (1 - churn) ** (1 / periods_per_year)
+
+    # Cohort k is t - k periods old in period t
+    period = np.arange(n_periods)[:, None]
+    cohort = np.arange(n_periods)[None, :]
+    churning = (period > cohort) & (period >= churn_after)
+
+    if retention.shape[1:] == (1, 1):
+        # Flat rate: survival = retention ^ (churned periods), gathered from a power table
+        churned = np.cumsum(churning, axis=0)
+        churned = np.where(period >= cohort, churned, n_periods + 1)
+        powers = retention[:, 0, :] ** np.arange(n_periods + 2)
+        powers[:, -1] = 0  # Cohorts that do not exist yet
+        return powers[:, churned]
+
+    # Curves: cumulate the retention of every cohort along t
+    retention = np.broadcast_to(retention, (len(retention), n_periods, n_periods))
+    age = np.maximum(period - cohort, 0)
+    survival = np.cumprod(np.where(churning, retention[:, cohort, age], 1.0), axis=1)
+    return np.where(period >= cohort, survival, 0.0)
+
+def cohort_clients(new_units, survival):
+    """Active clients per period: sum over cohorts k <= t of new_k * survival[t, k]"""
+    new_units = np.atleast_2d(np.asarray(new_units, dtype=float))
+    if survival.shape[0] == 1:
+        return new_units @ survival[0].T  # Shared curves: one matrix for every scenario
+    return (survival @ new_units[:, :, None])[:, :, 0]
+
+def calculate_scenario_batch(new_units, fixed_costs, price_hw=PRICE_HARDWARE_KIT,
+                             price_int=PRICE_INTEGRATION_FEE, price_sub=PRICE_SUBSCRIPTION,
+                             cogs=COGS_HARDWARE, churn=0.0, churn_after=YEARS, periods_per_year=1,
+                             tax_rate=TAX_RATE):
+    """
+    Vectorized calculate_scenario for many scenarios at once, tracking clients by cohort.
+    new_units, fixed_costs: (scenarios x years) arrays; prices, cogs and tax_rate:
+    scalars or (scenarios x 1) arrays; churn: see cohort_survival. Clients churn in the years
+    after `churn_after` (as in calculate_long_term_scenario).
+    With periods_per_year=12 the new units of a year are spread over its months,
+    subscriptions are billed and churn monthly; taxes stay yearly.
+    Returns the (scenarios x years+1) cash flow matrix, year 0 = investment.
+    """
+    new_units = np.atleast_2d(np.asarray(new_units, dtype=float))
+    n_years = new_units.shape[1]
+    n_periods = n_years * periods_per_year
+
+    period_units = np.repeat(new_units / periods_per_year, periods_per_year, axis=1)
+    churn = np.asarray(churn, dtype=float)
+    if churn.ndim == 3 or (churn.ndim == 2 and churn.shape[1] == 1 and len(churn) > 1):
+        # One survival matrix per scenario: chunks of scenarios bound the memory
+        n = max(len(period_units), len(churn))
+        period_units = np.broadcast_to(period_units, (n, n_periods))
+        churn = np.broadcast_to(churn, (n,) + churn.shape[1:])
+        chunk_size = max(1, COHORT_CHUNK_ELEMENTS // n_periods**2)
+        clients = np.empty((n, n_periods))
+        for start in range(0, n, chunk_size):
+            stop = start + chunk_size
+            survival = cohort_survival(churn[start:stop], n_periods, churn_after * periods_per_year,
+                                       periods_per_year)
+            clients[start:stop] = cohort_clients(period_units[start:stop], survival)
+    else:
+        survival = cohort_survival(churn, n_periods, churn_after * periods_per_year, periods_per_year)
+        clients = cohort_clients(period_units, survival)
+    client_years = clients.reshape(-1, n_years, periods_per_year).sum(axis=2) / periods_per_year
+
+    total_rev = new_units * (price_hw + price_int) + client_years * price_sub
+    ebitda = total_rev - new_units * cogs - fixed_costs
+    net_income = ebitda - np.maximum(0, ebitda * tax_rate)
+
+    investment = np.full((net_income.shape[0], 1), -INITIAL_INVESTMENT, dtype=float)
+    return np.hstack((investment, net_income))
+
+def calculate_long_term_scenario(base_vol_schedule, periods_per_year=1):
+    """Extends the Base Case to 15 years with churn and maintenance growth."""
+    new_units, fixed_costs = long_term_schedules(base_vol_schedule)
+    return calculate_scenario_batch(new_units, fixed_costs, churn=LONG_TERM_CHURN,
+                                    periods_per_year=periods_per_year)[0]
+
+# ==========================================
+# 3. MONTE CARLO SIMULATION
+# ==========================================
+
+def payback_period(cash_flows):
+    """Years until the cumulative cash flow turns positive (interpolated), NaN if never"""
+    cum = np.cumsum(cash_flows, axis=1)
+    positive = cum[:, 1:] >= 0
+    year = np.argmax(positive, axis=1) + 1
+    rows = np.arange(len(cum))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = -cum[rows, year - 1] / cash_flows[rows, year]
+    return np.where(positive.any(axis=1), year - 1 + fraction, np.nan)
+
+def sample_assumptions(n, volume_schedule, fixed_costs_schedule, rng, churn=True):
+    """Random draws of volumes, prices, churn (zero with churn=False) and fixed costs around a scenario"""
+    volume_schedule = np.asarray(volume_schedule, dtype=float)
+    fixed_costs_schedule = np.asarray(fixed_costs_schedule, dtype=float)
+    n_years = len(volume_schedule)
+
+    # Mean-preserving lognormal noise, rounded to whole units
+    noise = rng.lognormal(-MC_VOLUME_SIGMA**2 / 2, MC_VOLUME_SIGMA, (n, n_years))
+    new_units = np.rint(volume_schedule * noise)
+
+    def price(base):
+        return base * np.maximum(0, rng.normal(1, MC_PRICE_SIGMA, (n, 1)))
+
+    # Beta distribution with the requested mean and standard deviation
+    k = MC_CHURN_MEAN * (1 - MC_CHURN_MEAN) / MC_CHURN_SD**2 - 1
+    churn = rng.beta(MC_CHURN_MEAN * k, (1 - MC_CHURN_MEAN) * k, (n, 1)) if churn else np.zeros((n, 1))
+
+    fixed_costs = fixed_costs_schedule * rng.normal(1, MC_FIXED_COST_SIGMA, (n, n_years))
+    return {
+        'new_units': new_units,
+        'fixed_costs': fixed_costs,
+        'price_hw': price(PRICE_HARDWARE_KIT),
+        'price_int': price(PRICE_INTEGRATION_FEE),
+        'price_sub': price(PRICE_SUBSCRIPTION),
+        'cogs': price(COGS_HARDWARE),
+        'churn': churn,
+    }
+
+def monte_carlo(volume_schedule, fixed_costs_schedule, n_draws=MC_DRAWS, churn_after=YEARS,
+                seed=None, chunk_size=MC_CHUNK_SIZE, keep_cash_flows=False):
+    """
+    Monte Carlo distribution of NPV, IRR and payback around one scenario.
+    Draws are evaluated in chunks of `chunk_size` with calculate_scenario_batch,
+    so memory stays bounded for 10^6 draws. Clients churn in the years after
+    `churn_after`: with the default (YEARS) a 5-year scenario has no churn and
+    none is sampled.
+    Returns a dict of (n_draws,) arrays ('cash_flows' too if keep_cash_flows).
+    """
+    rng = np.random.default_rng(seed)
+    results = {'npv': [], 'irr': [], 'payback': [], 'cash_flows': []}
+
+    for start in range(0, n_draws, chunk_size):
+        n = min(chunk_size, n_draws - start)
+        draws = sample_assumptions(n, volume_schedule, fixed_costs_schedule, rng,
+                                   churn=churn_after < len(volume_schedule))
+        cash_flows = calculate_scenario_batch(churn_after=churn_after, **draws)
+        results['npv'].append(npv_batch(DISCOUNT_RATE, cash_flows))
+        results['irr'].append(irr_batch(cash_flows))
+        results['payback'].append(payback_period(cash_flows))
+        if keep_cash_flows:
+            results['cash_flows'].append(cash_flows)
+
+    if not keep_cash_flows:
+        del results['cash_flows']
+    return {key: np.concatenate(values) for key, values in results.items()}
+
+def summarize_distribution(values, percentiles=(5, 50, 95)):
+    """Mean, chosen percentiles and share of finite values of a result array"""
+    finite = values[np.isfinite(values)]
+    summary = {'mean': finite.mean() if len(finite) else np.nan, 'finite_share': len(finite) / len(values)}
+    for p, v in zip(percentiles, np.percentile(finite, percentiles) if len(finite) else [np.nan] * len(percentiles)):
+        summary[f'p{p}'] = v
+    return summary
+
+# ==========================================
+# 4. SENSITIVITY SWEEPS
+# ==========================================
+
+# Assumptions a sweep can vary: the constants above plus the fixed cost entries
+SWEEP_PARAMETERS = ('PRICE_SUBSCRIPTION', 'COGS_HARDWARE', 'TAX_RATE', 'DISCOUNT_RATE') + tuple(FIXED_COSTS_BREAKDOWN)
+
+def sweep_baseline():
+    """Current value of every sweep parameter"""
+    base = {
+        'PRICE_SUBSCRIPTION': PRICE_SUBSCRIPTION,
+        'COGS_HARDWARE': COGS_HARDWARE,
+        'TAX_RATE': TAX_RATE,
+        'DISCOUNT_RATE': DISCOUNT_RATE,
+    }
+    base.update(FIXED_COSTS_BREAKDOWN)
+    return base
+
+def _check_parameters(names):
+    unknown = [name for name in names if name not in SWEEP_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {unknown} (choose from {list(SWEEP_PARAMETERS)})")
+
+def sweep_cash_flows(volume_schedule, fixed_costs_schedule, values, n, churn=0.0, churn_after=YEARS):
+    """
+    (n x years+1) cash flows with the parameters in `values` set to (n,) arrays
+    (or scalars), all others at their baseline. A change of a fixed cost entry
+    shifts the fixed costs of every year by the same amount.
+    """
+    base = sweep_baseline()
+
+    def column(name):
+        return np.asarray(values.get(name, base[name]), dtype=float).reshape(-1, 1)
+
+    fixed_costs_delta = sum(column(name) for name in FIXED_COSTS_BREAKDOWN) - TOTAL_FIXED_COSTS_NORMAL
+    new_units = np.broadcast_to(np.asarray(volume_schedule, dtype=float), (n, len(volume_schedule)))
+    return calculate_scenario_batch(new_units, np.asarray(fixed_costs_schedule, dtype=float) + fixed_costs_delta,
+                                    price_sub=column('PRICE_SUBSCRIPTION'), cogs=column('COGS_HARDWARE'),
+                                    tax_rate=column('TAX_RATE'), churn=churn, churn_after=churn_after)
+
+def sweep_grid(volume_schedule, fixed_costs_schedule, ranges, churn=0.0, churn_after=YEARS,
+               chunk_size=SWEEP_CHUNK_SIZE):
+    """
+    NPV and IRR over the full grid of `ranges` ({parameter: values}), evaluated
+    as broadcast arrays in chunks of `chunk_size` points. The discount rate does
+    not change the cash flows, so its axis is added by npv_batch.
+    Returns {'parameters', 'axes', 'npv', 'irr'}, the metrics shaped as the grid
+    (one axis per parameter, in the order of `ranges`).
+    """
+    names = list(ranges)
+    _check_parameters(names)
+    axes = {name: np.atleast_1d(np.asarray(ranges[name], dtype=float)) for name in names}
+    rates = axes.get('DISCOUNT_RATE', np.array([DISCOUNT_RATE]))
+    others = [name for name in names if name != 'DISCOUNT_RATE']
+
+    shape = tuple(len(axes[name]) for name in others)
+    size = int(np.prod(shape))
+    grid = np.meshgrid(*(axes[name] for name in others), indexing='ij')
+    points = {name: g.ravel() for name, g in zip(others, grid)}
+
+    npv = np.empty((size, len(rates)))
+    irr = np.empty(size)
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        chunk = {name: values[start:stop] for name, values in points.items()}
+        cash_flows = sweep_cash_flows(volume_schedule, fixed_costs_schedule, chunk, stop - start,
+                                      churn, churn_after)
+        npv[start:stop] = npv_batch(rates, cash_flows)
+        irr[start:stop] = irr_batch(cash_flows)
+
+    npv = npv.reshape(shape + (len(rates),))
+    irr = np.broadcast_to(irr.reshape(shape + (1,)), npv.shape)
+    if 'DISCOUNT_RATE' in names:
+        npv = np.moveaxis(npv, -1, names.index('DISCOUNT_RATE'))
+        irr = np.moveaxis(irr, -1, names.index('DISCOUNT_RATE'))
+    else:
+        npv, irr = npv[..., 0], irr[..., 0]
+    return {'parameters': names, 'axes': axes, 'npv': npv, 'irr': np.ascontiguousarray(irr)}
+
+def tornado(volume_schedule, fixed_costs_schedule, ranges=None, metric='npv', spread=SWEEP_SPREAD,
+            churn=0.0, churn_after=YEARS):
+    """
+    One-at-a-time sensitivity of `metric` ('npv' or 'irr').
+    ranges: {parameter: (low, high)}, default every parameter at baseline +/- spread.
+    Returns {'metric', 'base', 'bars'} with the bars sorted by swing, largest first.
+    """
+    base = sweep_baseline()
+    if ranges is None:
+        ranges = {name: (value * (1 - spread), value * (1 + spread)) for name, value in base.items()}
+    names = list(ranges)
+    _check_parameters(names)
+
+    # Row 0: baseline, then the low and high value of every parameter
+    n = 1 + 2 * len(names)
+    values = {name: np.full(n, base[name], dtype=float) for name in names}
+    for i, name in enumerate(names):
+        values[name][1 + 2 * i:3 + 2 * i] = ranges[name]
+    cash_flows = sweep_cash_flows(volume_schedule, fixed_costs_schedule, values, n, churn, churn_after)
+    if metric == 'npv':
+        rates = values.get('DISCOUNT_RATE', np.full(n, DISCOUNT_RATE))
+        result = np.sum(cash_flows * (1 + rates[:, None]) ** -np.arange(cash_flows.shape[1]), axis=1)
+    elif metric == 'irr':
+        result = irr_batch(cash_flows)
+    else:
+        raise ValueError(f"Unknown metric {metric!r} (choose 'npv' or 'irr')")
+
+    bars = []
+    for i, name in enumerate(names):
+        low, high = result[1 + 2 * i], result[2 + 2 * i]
+        bars.append({'parameter': name, 'low': ranges[name][0], 'high': ranges[name][1],
+                     'metric_low': low, 'metric_high': high, 'swing': abs(high - low)})
+    bars.sort(key=lambda bar: -np.nan_to_num(bar['swing'], nan=-1.0))
+    return {'metric': metric, 'base': result[0], 'bars': bars}
+
+def heatmap(sweep, x, y, metric='npv', at=None):
+    """
+    Two-way slice of a sweep_grid result: `metric` over parameters x and y, the
+    other parameters at the grid value closest to `at` ({parameter: value},
+    default baseline). Returns (x values, y values, data[iy, ix]).
+    """
+    base = sweep_baseline()
+    base.update(at or {})
+    names = sweep['parameters']
+    index = []
+    for name in names:
+        if name in (x, y):
+            index.append(slice(None))
         else:
-            total_clients = total_clients * (1 - churn_rate) + new_units[t]
-            
-        # Financials
-        rev_upfront = new_units[t] * (PRICE_HARDWARE_KIT + PRICE_INTEGRATION_FEE)
-        rev_sub = total_clients * PRICE_SUBSCRIPTION
-        total_rev = rev_upfront + rev_sub
-        
-        cogs = new_units[t] * COGS_HARDWARE
-        
-        # Fixed Costs: Assume Optimized Low Cost in Y1-2, Normal afterwards
-        fc = 330000 if current_year <= 2 else TOTAL_FIXED_COSTS_NORMAL
-             
-        ebitda = (total_rev - cogs) - fc
-        taxes = np.maximum(0, ebitda * TAX_RATE)
-        net_income = ebitda - taxes
-        
-        cash_flows.append(net_income)
-        
-    return np.array(cash_flows)
+            index.append(int(np.argmin(np.abs(sweep['axes'][name] - base[name]))))
+    data = sweep[metric][tuple(index)]
+    if names.index(x) < names.index(y):
+        data = data.T
+    return sweep['axes'][x], sweep['axes'][y], data
 
 # ==========================================
-# 3. PLOTTING FUNCTIONS
+# 5. PLOTTING FUNCTIONS
 # ==========================================
 
 def plot_cashflow_comparison(scenarios):
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     years_plot = np.arange(0, YEARS + 1)
     
     for s in scenarios:
-        print(f"{s['name']} Case - NPV: ${s['npv']:,.2f}, IRR: {s['irr']:.2%}")
-        print(f" Cum CF: {s['cum_cash_flow']}")
         plt.plot(years_plot, s['cum_cash_flow'], marker='o', linewidth=2, 
                  label=f"{s['name']} (NPV: ${s['npv']/1000:.0f}k)")
         
@@ -147,6 +591,7 @@ def plot_cashflow_comparison(scenarios):
     print("Saved: final_cashflow_comparison.png")
 
 def plot_revenue_breakdown(scenario):
+    import matplotlib.pyplot as plt
     years = scenario['years']
     fig, ax = plt.subplots(figsize=(10, 6))
     
@@ -171,6 +616,7 @@ def plot_revenue_breakdown(scenario):
     print("Saved: final_revenue_breakdown.png")
 
 def plot_cost_structure_year5(scenario):
+    import matplotlib.pyplot as plt
     # Calculate Variable Cost for Year 5
     units_y5 = scenario['new_clients'][-1]
     var_cost = units_y5 * COGS_HARDWARE
@@ -187,16 +633,21 @@ def plot_cost_structure_year5(scenario):
     plt.savefig('final_cost_structure.png')
     print("Saved: final_cost_structure.png")
 
-def plot_long_term(cash_flows):
+def plot_long_term(cash_flows, simulated_cash_flows=None, band=(10, 90)):
+    """Cumulative cash flow, with the percentile band of Monte Carlo cash flows if given."""
+    import matplotlib.pyplot as plt
     years_plot = np.arange(0, len(cash_flows))
     cum_cash_flow = np.cumsum(cash_flows)
     
-    # Simulate Uncertainty (Growing standard deviation)
-    sigma = np.linspace(0, 300000, len(cash_flows)-1) 
-    annual_ncf = cash_flows[1:]
-    
-    upper_cum = np.cumsum(np.concatenate(([cash_flows[0]], annual_ncf + sigma)))
-    lower_cum = np.cumsum(np.concatenate(([cash_flows[0]], annual_ncf - sigma)))
+    if simulated_cash_flows is not None:
+        lower_cum, upper_cum = np.percentile(np.cumsum(simulated_cash_flows, axis=1), band, axis=0)
+    else:
+        # Simulate Uncertainty (Growing standard deviation)
+        sigma = np.linspace(0, 300000, len(cash_flows)-1) 
+        annual_ncf = cash_flows[1:]
+        
+        upper_cum = np.cumsum(np.concatenate(([cash_flows[0]], annual_ncf + sigma)))
+        lower_cum = np.cumsum(np.concatenate(([cash_flows[0]], annual_ncf - sigma)))
     
     plt.figure(figsize=(12, 6))
     plt.plot(years_plot, cum_cash_flow, color='#1f77b4', linewidth=3, label='Base Forecast')
@@ -213,6 +664,7 @@ def plot_long_term(cash_flows):
     print("Saved: final_long_term.png")
 
 def plot_rev_vs_ebitda(scenario):
+    import matplotlib.pyplot as plt
     fig, ax1 = plt.subplots(figsize=(10, 6))
     
     ax1.set_xlabel('Year')
@@ -229,37 +681,219 @@ def plot_rev_vs_ebitda(scenario):
     plt.savefig('final_rev_vs_ebitda.png')
     print("Saved: final_rev_vs_ebitda.png")
 
+def plot_tornado(data):
+    """Horizontal bars of the metric at the low and high value of every parameter."""
+    import matplotlib.pyplot as plt
+    bars = data['bars'][::-1]  # Largest swing on top
+    names = [b['parameter'] for b in bars]
+    scale, unit = (1000, '$k') if data['metric'] == 'npv' else (0.01, '%')
+    base = data['base'] / scale
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(names, [b['metric_low'] / scale - base for b in bars], left=base, color='#d62728', alpha=0.8, label='Low value')
+    ax.barh(names, [b['metric_high'] / scale - base for b in bars], left=base, color='#2ca02c', alpha=0.8, label='High value')
+    ax.axvline(base, color='black', linewidth=1)
+    ax.set_xlabel(f"{data['metric'].upper()} ({unit})")
+    ax.set_title(f"Sensitivity of {data['metric'].upper()} (Tornado)")
+    ax.legend()
+    ax.grid(axis='x', linestyle='--', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(f"final_tornado_{data['metric']}.png")
+    print(f"Saved: final_tornado_{data['metric']}.png")
+
+def plot_heatmap(x_values, y_values, data, x, y, metric='npv'):
+    """Two-way sensitivity heatmap (data[iy, ix], as returned by heatmap)."""
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+    mesh = ax.pcolormesh(x_values, y_values, data, shading='nearest', cmap='RdYlGn')
+    if metric == 'npv':
+        ax.contour(x_values, y_values, data, levels=[0], colors='black', linewidths=1.5)
+    fig.colorbar(mesh, ax=ax, label=metric.upper())
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.set_title(f"{metric.upper()}: {x} vs {y}")
+    plt.tight_layout()
+    plt.savefig(f"final_heatmap_{metric}.png")
+    print(f"Saved: final_heatmap_{metric}.png")
+
 # ==========================================
-# 4. MAIN EXECUTION
+# 6. MODEL API AND RESULT CACHE
 # ==========================================
 
-# Define Scenarios
-# Base (Optimized): 155 units, Reduced fixed costs ($330k) in Y1/Y2
-vol_base = [15, 25, 35, 45, 35]
-fc_normal = [430000] * 5
-scen_base = calculate_scenario("Base", vol_base, fc_normal)
-
-# Best: 200 units, Normal fixed costs ($430k)
-vol_best = [30, 40, 50, 40, 40]
-scen_best = calculate_scenario("Best", vol_best, fc_normal)
-
-# Worst: 80 units, Normal fixed costs
-vol_worst = [10, 20, 25, 30, 30]
-scen_worst = calculate_scenario("Worst", vol_worst, fc_normal)
-
-# Long Term Calculation
-lt_cash_flows = calculate_long_term_scenario(vol_base)
-
-# Generate Plots
-print("--- Generating Plots ---")
-plot_cashflow_comparison([scen_base, scen_best, scen_worst])
-plot_revenue_breakdown(scen_base)
-plot_cost_structure_year5(scen_base)
-plot_long_term(lt_cash_flows)
-plot_rev_vs_ebitda(scen_base)
-
-# Print Summary
-print("\n--- Final Financial Summary (Base Case) ---")
-print(f"Total Customers (5Y): {sum(scen_base['new_clients'])}")
-print(f"NPV: ${scen_base['npv']:,.2f}")
-print(f"IRR: {scen_base['irr']:.2%}")
\ No newline at end of file
+_CACHE_EXCLUDED = ('SCENARIOS_FILE', 'CACHE_DIR')
+
+def model_assumptions():
+    """Every configuration constant results depend on"""
+    return {name: value for name, value in globals().items()
+            if name.isupper() and name not in _CACHE_EXCLUDED}
+
+def _freeze(value):
+    """Hashable, exact representation of call arguments (arrays in full)"""
+    if isinstance(value, np.ndarray):
+        return ('array', value.shape, value.tolist())
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def assumptions_key(*args):
+    return hashlib.sha1(repr((sorted(model_assumptions().items()), _freeze(args))).encode()).hexdigest()
+
+def cached(func, *args, use_cache=True, cache_dir=CACHE_DIR, **kwargs):
+    """func(*args, **kwargs), memoized in cache_dir under a hash of the call and the assumptions"""
+    if not use_cache or not cache_dir:
+        return func(*args, **kwargs)
+    path = os.path.join(cache_dir, f"{func.__name__}-{assumptions_key(func.__name__, args, kwargs)}.pkl")
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable cached result {path}: {e}")
+
+    result = func(*args, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return result
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Delete every memoized result, returns the number of files removed"""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pkl'):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
+
+def load_config(path=SCENARIOS_FILE):
+    """Scenario definitions and report settings (see scenarios.json)"""
+    with open(path) as f:
+        config = json.load(f)
+    if config.get('base') not in config.get('scenarios', {}):
+        raise ValueError(f"{path}: base scenario {config.get('base')!r} is not defined in 'scenarios'")
+    for name, scenario in config['scenarios'].items():
+        if len(scenario['new_units']) != len(scenario['fixed_costs']):
+            raise ValueError(f"{path}: scenario {name!r} has {len(scenario['new_units'])} volume "
+                             f"and {len(scenario['fixed_costs'])} fixed cost years")
+    return config
+
+def sensitivity_heatmap(volume_schedule, fixed_costs_schedule, axes):
+    """sweep_grid over {parameter: [start, stop, points]} axes"""
+    return sweep_grid(volume_schedule, fixed_costs_schedule,
+                      {name: np.linspace(start, stop, int(points)) for name, (start, stop, points) in axes.items()})
+
+def build_report(config=None, use_cache=True, cache_dir=CACHE_DIR):
+    """
+    All results of the report for a config (dict or path, default scenarios.json):
+    the scenarios, the long-term projection (yearly and monthly cohorts), the
+    Monte Carlo distributions and the sensitivity of the base scenario.
+    The Monte Carlo results are only memoized with a seed in the config.
+    """
+    if not isinstance(config, dict):
+        config = load_config(config or SCENARIOS_FILE)
+    options = {'use_cache': use_cache, 'cache_dir': cache_dir}
+    mc = config.get('monte_carlo', {})
+    # An unseeded simulation is a fresh random run every time: never memoize it
+    mc_options = dict(options, use_cache=use_cache and mc.get('seed') is not None)
+    sensitivity = config.get('sensitivity', {})
+
+    scenarios = {name: cached(calculate_scenario, name, s['new_units'], s['fixed_costs'], **options)
+                 for name, s in config['scenarios'].items()}
+    base = config['scenarios'][config['base']]
+    volume, fixed_costs = base['new_units'], base['fixed_costs']
+
+    report = {
+        'base': config['base'],
+        'churn_after': mc.get('churn_after', YEARS),
+        'scenarios': scenarios,
+        'long_term': cached(calculate_long_term_scenario, volume, **options),
+        'long_term_monthly': cached(calculate_long_term_scenario, volume, periods_per_year=12, **options),
+        'monte_carlo': cached(monte_carlo, volume, fixed_costs, n_draws=mc.get('draws', MC_DRAWS),
+                              churn_after=mc.get('churn_after', YEARS), seed=mc.get('seed'), **mc_options),
+        'long_term_monte_carlo': cached(monte_carlo, *(v.tolist() for v in long_term_schedules(volume)),
+                                        n_draws=mc.get('long_term_draws', MC_DRAWS),
+                                        churn_after=mc.get('churn_after', YEARS), seed=mc.get('seed'),
+                                        keep_cash_flows=True, **mc_options),
+        'tornado': cached(tornado, volume, fixed_costs, spread=sensitivity.get('spread', SWEEP_SPREAD), **options),
+    }
+    if sensitivity.get('heatmap'):
+        report['heatmap'] = cached(sensitivity_heatmap, volume, fixed_costs, sensitivity['heatmap'], **options)
+    return report
+
+# ==========================================
+# 7. COMMAND LINE
+# ==========================================
+
+def print_summary(report):
+    scen_base = report['scenarios'][report['base']]
+    for s in report['scenarios'].values():
+        print(f"{s['name']} Case - NPV: ${s['npv']:,.2f}, IRR: {s['irr']:.2%}")
+        print(f" Cum CF: {s['cum_cash_flow']}")
+
+    print(f"\n--- Final Financial Summary ({scen_base['name']} Case) ---")
+    print(f"Total Customers ({len(scen_base['years'])}Y): {sum(scen_base['new_clients'])}")
+    print(f"NPV: ${scen_base['npv']:,.2f}")
+    print(f"IRR: {scen_base['irr']:.2%}")
+    print(f"Long-term NPV ({LONG_TERM_YEARS}Y): ${npv_batch(DISCOUNT_RATE, report['long_term'])[0]:,.2f} "
+          f"(monthly cohorts: ${npv_batch(DISCOUNT_RATE, report['long_term_monthly'])[0]:,.2f})")
+
+    mc_base = report['monte_carlo']
+    churn = 'no churn' if report['churn_after'] >= len(scen_base['years']) else f"churn after Y{report['churn_after']}"
+    print(f"\n--- Monte Carlo ({len(mc_base['npv']):,} draws, {scen_base['name']} Case, {churn}) ---")
+    for metric, fmt in (('npv', '${:,.0f}'), ('irr', '{:.2%}'), ('payback', '{:.2f} years')):
+        summary = summarize_distribution(mc_base[metric])
+        print(f"{metric.upper():<8} mean {fmt.format(summary['mean'])}, "
+              f"P5 {fmt.format(summary['p5'])}, P50 {fmt.format(summary['p50'])}, P95 {fmt.format(summary['p95'])} "
+              f"({summary['finite_share']:.1%} of draws defined)")
+    print(f"P(NPV < 0): {np.mean(mc_base['npv'] < 0):.1%}")
+
+    print(f"\n--- NPV Sensitivity ({scen_base['name']} Case) ---")
+    for bar in report['tornado']['bars']:
+        print(f"{bar['parameter']:<22} ${bar['metric_low']:>12,.0f} .. ${bar['metric_high']:>12,.0f}")
+
+def save_plots(report):
+    scen_base = report['scenarios'][report['base']]
+    print("--- Generating Plots ---")
+    plot_cashflow_comparison(list(report['scenarios'].values()))
+    plot_revenue_breakdown(scen_base)
+    plot_cost_structure_year5(scen_base)
+    plot_long_term(report['long_term'], report['long_term_monte_carlo']['cash_flows'])
+    plot_rev_vs_ebitda(scen_base)
+    plot_tornado(report['tornado'])
+    if 'heatmap' in report:
+        x, y = report['heatmap']['parameters'][:2]
+        plot_heatmap(*heatmap(report['heatmap'], x, y), x, y)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Project financials: scenarios, Monte Carlo and sensitivity")
+    parser.add_argument("--config", default=SCENARIOS_FILE, help="scenario file (JSON)")
+    parser.add_argument("--no-plots", action="store_true", help="print the summary only")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every result")
+    parser.add_argument("--clear-cache", action="store_true", help="delete the memoized results first")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.clear_cache:
+        print(f"Removed {clear_cache()} cached results")
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Invalid scenario file: {e}")
+        return 1
+
+    report = build_report(config, use_cache=not args.no_cache)
+    if not args.no_plots:
+        save_plots(report)
+    print_summary(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+# -------------------------
+# IK / MOTION MICRO-BENCHMARKS
+# -------------------------
+
+# Standalone runner timing the IK, step conversion, frame packing and
+# planning paths (scalar and batched) on fixed, seeded workloads.
+#
+#   python -m SCARA.Benchmark              run and compare with the baseline
+#   python -m SCARA.Benchmark --save       run and store the results as the new baseline
+#   python -m SCARA.Benchmark --only ik    run the benchmarks whose name contains "ik"
+#
+# Baselines are plain JSON. Timings only compare on the same machine, so
+# keep one baseline per machine (--baseline FILE). The exit status is 1 when
+# a benchmark is slower than its baseline by more than the tolerance.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from collections import namedtuple
+
+import numpy as np
+from . import InverseKinematics as IK
+from . import Utilities as utl
+from . import Protocol as proto
+from . import Trajectory as traj
+from . import Workspace as ws
+from . import ForwardKinematics as fk
+from .MotionQueue import plan_move
+from .Program import plan_program
+from .Scheduler import plan_batch
+from .WaitPolicy import WAIT_POLICIES
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+N_POINTS = 1000           # Targets per workload
+SEED = 1234
+MIN_TIME = 0.2            # Seconds per timing run (timeit autorange)
+REPEATS = 5               # Timing runs per benchmark, the fastest counts
+REGRESSION_TOLERANCE = 0.25  # Slower than baseline by more than this fraction = regression
+SWEEP_RESOLUTION = 0.005  # Workspace grid used by the sweep benchmarks
+
+Workload = namedtuple("Workload", "xs ys angles path steps frames points program")
+
+
+def random_reachable_points(n=N_POINTS, seed=SEED):
+    """
+    Targets reachable within the absolute motor limits, from random joint angles
+    Returns (xs, ys, angles (n,4)) where angles are the generating joint angles
+    """
+    rng = np.random.default_rng(seed)
+    theta1 = np.radians(rng.uniform(utl.MOTOR1_ABS_MIN, utl.MOTOR1_ABS_MAX, n))
+    # Keep away from the fully stretched / folded singularities
+    theta2 = np.radians(rng.uniform(20, 140, n)) * rng.choice((-1, 1), n)
+    xs = IK.L1 * np.cos(theta1) + IK.L2 * np.cos(theta1 + theta2)
+    ys = IK.L1 * np.sin(theta1) + IK.L2 * np.sin(theta1 + theta2)
+    theta3 = IK.end_effector(theta1, theta2, 0.0)
+    z = rng.uniform(-25, 0, n)
+    return xs, ys, np.column_stack((theta1, theta2, theta3, z))
+
+
+def pick_and_place_program(pick=(0.34, 0.02), place=(0.2, -0.2), z_pick=-7, z_place=-25, phi_p=135):
+    """The point sequence of main.pick_and_place"""
+    (pick_x, pick_y), (place_x, place_y) = pick, place
+    return [
+        (pick_x, pick_y, 0, phi_p, True, WAIT_POLICIES["approach"]),
+        (pick_x, pick_y, 0, 0, True, WAIT_POLICIES["approach"]),
+        (pick_x, pick_y, z_pick, phi_p, True, WAIT_POLICIES["descend"]),
+        (pick_x, pick_y, z_pick, phi_p, False, WAIT_POLICIES["grip"]),
+        (pick_x, pick_y, 0, 90, False, WAIT_POLICIES["lift"]),
+        (place_x, place_y, 0, 90, False, WAIT_POLICIES["transit"]),
+        (place_x, place_y, z_place, 90, False, WAIT_POLICIES["descend"]),
+        (place_x, place_y, z_place, 90, True, WAIT_POLICIES["release"]),
+        (place_x, place_y, 0, 0, False, WAIT_POLICIES["lift"]),
+        (0.15, -0.15, 0, 0, False, WAIT_POLICIES["rest"]),
+    ]
+
+
+def make_workload(n=N_POINTS, seed=SEED):
+    xs, ys, angles = random_reachable_points(n, seed)
+    path = [tuple(a) for a in angles]
+    steps = utl.calculate_relative_steps_batch(angles)
+    frames = [proto.pack_motion_frame(*(int(v) for v in row), 90, 90) for row in steps]
+    points = list(zip(xs.tolist(), ys.tolist()))
+    return Workload(xs, ys, angles, path, steps, frames, points, pick_and_place_program())
+
+
+# -------------------------
+# BENCHMARKS
+# -------------------------
+
+# name -> (setup(workload) -> callable, operations per call)
+BENCHMARKS = {}
+
+
+def benchmark(name, ops=N_POINTS):
+    def register(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+    return register
+
+
+@benchmark("ik_scara")
+def _ik_scara(w):
+    def run():
+        for x, y in w.points:
+            IK.ik_scara(x, y)
+    return run
+
+
+@benchmark("ik_scara_batch")
+def _ik_scara_batch(w):
+    return lambda: IK.ik_scara_batch(w.xs, w.ys)
+
+
+@benchmark("fk_path_poses")
+def _fk_path_poses(w):
+    return lambda: fk.path_poses(w.angles)
+
+
+@benchmark("jacobian_condition_batch")
+def _jacobian_condition(w):
+    return lambda: fk.condition_number(w.angles[:, 1])
+
+
+@benchmark("safe_ik_calculation")
+def _safe_ik(w):
+    current = (0.0, 0.0, 0.0, 0.0)
+
+    def run():
+        for x, y in w.points:
+            utl.safe_ik_calculation(x, y, current, 0, 0.0, use_cache=False)
+    return run
+
+
+@benchmark("safe_ik_calculation_cached")
+def _safe_ik_cached(w):
+    current = (0.0, 0.0, 0.0, 0.0)
+    utl.configure_ik_cache(maxsize=max(utl.ik_cache.maxsize, len(w.points)))
+    for x, y in w.points:
+        utl.ik_cache.solve(x, y)  # Warm
+
+    def run():
+        for x, y in w.points:
+            utl.safe_ik_calculation(x, y, current, 0, 0.0)
+    return run
+
+
+@benchmark("solve_ik")
+def _solve_ik(w):
+    current = (0.0, 0.0, 0.0, 0.0)
+
+    def run():
+        for x, y in w.points:
+            utl.solve_ik(x, y, current, use_cache=False)
+    return run
+
+
+@benchmark("calculate_relative_steps", ops=N_POINTS - 1)
+def _relative_steps(w):
+    moves = list(zip(w.path[1:], w.path[:-1]))
+
+    def run():
+        for target, current in moves:
+            utl.calculate_relative_steps(target, current)
+    return run
+
+
+@benchmark("calculate_relative_steps_batch", ops=N_POINTS - 1)
+def _relative_steps_batch(w):
+    return lambda: utl.calculate_relative_steps_batch(w.angles)
+
+
+@benchmark("pack_motion_frame", ops=N_POINTS - 1)
+def _pack_motion_frame(w):
+    rows = [tuple(int(v) for v in row) for row in w.steps]
+
+    def run():
+        for row in rows:
+            proto.pack_motion_frame(*row, 90, 90)
+    return run
+
+
+@benchmark("sequence_frame", ops=N_POINTS - 1)
+def _sequence_frame(w):
+    def run():
+        for seq, frame in enumerate(w.frames):
+            proto.sequence_frame(frame, seq)
+    return run
+
+
+@benchmark("plan_move_profile", ops=N_POINTS - 1)
+def _plan_move_profile(w):
+    rows = [tuple(int(v) for v in row) for row in w.steps]
+
+    def run():
+        for row in rows:
+            traj.plan_move_profile(row, "trapezoid")
+    return run
+
+
+@benchmark("plan_move", ops=10)
+def _plan_move(w):
+    def run():
+        current = (0.0, 0.0, 0.0, 0.0)
+        for x, y, z, phi, gripper_open, wait in w.program:
+            move = plan_move(x, y, current, z, phi, gripper_open, wait, use_cache=False)
+            current = move.target_angles
+    return run
+
+
+@benchmark("plan_move_route_cached", ops=10)
+def _plan_move_cached(w):
+    def run():
+        current = (0.0, 0.0, 0.0, 0.0)
+        for x, y, z, phi, gripper_open, wait in w.program:
+            move = plan_move(x, y, current, z, phi, gripper_open, wait)
+            current = move.target_angles
+    run()  # Warm
+    return run
+
+
+@benchmark("plan_program_pick_and_place", ops=10)
+def _plan_program(w):
+    return lambda: plan_program(w.program, (0.0, 0.0, 0.0, 0.0))
+
+
+@benchmark("plan_batch_20_picks", ops=1)
+def _plan_batch(w):
+    picks = [(x, y) for x, y in w.points[:20]]
+    slots = [(x, y) for x, y in w.points[20:40]]
+    return lambda: plan_batch(picks, slots)
+
+
+@benchmark("cartesian_line", ops=1)
+def _cartesian_line(w):
+    start = (0.0, 1.2, 0.0, 0.0)
+    return lambda: traj.cartesian_line(0.3, -0.1, start, -10, max_step=0.005)
+
+
+@benchmark("workspace_grid_build", ops=1)
+def _workspace_build(w):
+    return lambda: ws.WorkspaceGrid.build(SWEEP_RESOLUTION)
+
+
+@benchmark("workspace_lookup_batch")
+def _workspace_lookup(w):
+    grid = ws.WorkspaceGrid.build(SWEEP_RESOLUTION)
+    return lambda: grid.lookup_batch(w.xs, w.ys)
+
+
+# -------------------------
+# RUNNER
+# -------------------------
+
+def time_benchmark(setup, ops, workload, min_time=MIN_TIME, repeats=REPEATS):
+    """Best time per operation (s) of one benchmark"""
+    timer = timeit.Timer(setup(workload))
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeats, number))
+    return best / number / ops
+
+
+def run_benchmarks(only=None, min_time=MIN_TIME, repeats=REPEATS):
+    """Run the registered benchmarks; returns {name: seconds per operation}"""
+    workload = make_workload()
+    results = {}
+    for name, (setup, ops) in BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        results[name] = time_benchmark(setup, ops, workload, min_time, repeats)
+    return results
+
+
+def environment():
+    return {
+        "machine": platform.node(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    data = {"environment": environment(),
+            "results": {name: {"per_op_us": t * 1e6} for name, t in results.items()}}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Print the results next to the baseline
+    Returns the names of the benchmarks that regressed
+    """
+    base = (baseline or {}).get("results", {})
+    regressions = []
+    print(f"{'benchmark':<32} {'us/op':>10} {'ops/s':>12} {'baseline':>10} {'ratio':>7}")
+    for name, per_op in results.items():
+        per_op_us = per_op * 1e6
+        line = f"{name:<32} {per_op_us:>10.3f} {1 / per_op:>12,.0f}"
+        if name in base:
+            ratio = per_op_us / base[name]["per_op_us"]
+            line += f" {base[name]['per_op_us']:>10.3f} {ratio:>6.2f}x"
+            if ratio > 1 + tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if baseline and baseline.get("environment", {}).get("machine") != platform.node():
+        print("⚠️ Baseline was recorded on another machine - ratios are not meaningful")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SCARA IK/motion micro-benchmarks")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per timing run")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, args.min_time)
+    regressions = compare(results, None if args.save else load_baseline(args.baseline), args.tolerance)
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+# -------------------------
+# SHARED SERIAL CONNECTIONS
+# -------------------------
+
+# Opening an Arduino port normally pulses DTR, which resets the board and
+# costs ~2 s before the firmware listens again. This module keeps that cost
+# to once per device:
+#
+#   - ConnectionManager hands out one long-lived handle per device inside a
+#     process (RobotController, the servo helpers and the Arduino 3 tester
+#     share it) and reopens it with backoff when it drops.
+#   - ConnectionBroker owns a device in a background process and relays it
+#     over a local TCP socket, so scripts started one after the other attach
+#     to the already-running board (pyserial "socket://" URL) with no reset.
+#   - Direct opens keep DTR/RTS low and probe the firmware (PING_FRAME) until
+#     it answers instead of sleeping a fixed time; a board that was reset
+#     anyway answers as soon as it has booted.
+#
+#   python -m SCARA.Connection list               ports and running brokers
+#   python -m SCARA.Connection serve [--port P]   share a device until Ctrl-C
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from . import Protocol as proto
+from .Diagnostics import configure_logging, get_logger
+
+BAUDRATE = 115200
+TIMEOUT = 1
+BOOT_DELAY = 2        # s, longest wait for the firmware to answer after a reset
+PROBE_INTERVAL = 0.1  # s between readiness probes
+BROKER_HOST = "127.0.0.1"
+REGISTRY_FILE = os.path.join(tempfile.gettempdir(), "scara_connections.json")
+
+# Reconnect backoff: first delay, growth factor, cap (s) and attempts
+RETRY_DELAY = 0.25
+RETRY_BACKOFF = 2.0
+RETRY_MAX_DELAY = 8.0
+RETRIES = 5
+
+# USB vendor ids of the boards used on the arm (Arduino, CH340, FTDI, CP210x)
+ARDUINO_VIDS = (0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4)
+
+log = get_logger("connection")
+
+
+def backoff_delays(retries=RETRIES, delay=RETRY_DELAY, factor=RETRY_BACKOFF, max_delay=RETRY_MAX_DELAY):
+    """Delays (s) between reconnect attempts: delay, delay*factor, ... capped at max_delay"""
+    for _ in range(retries):
+        yield delay
+        delay = min(delay * factor, max_delay)
+
+
+# -------------------------
+# PORT DISCOVERY
+# -------------------------
+
+def discover_ports():
+    """
+    Serial ports on this machine as (device, description), Arduino-like boards first
+    """
+    from serial.tools import list_ports
+
+    ports = sorted(list_ports.comports(), key=lambda p: (p.vid not in ARDUINO_VIDS, p.device))
+    return [(p.device, p.description) for p in ports]
+
+
+def default_port(preferred=None, shared=True):
+    """
+    `preferred` if given, else (with shared=True) a device with a running
+    broker, else the first Arduino-like port
+    """
+    if preferred:
+        return preferred
+    brokers = read_registry() if shared else {}
+    if brokers:
+        return next(iter(brokers))
+    ports = discover_ports()
+    if not ports:
+        raise OSError("No serial port found")
+    return ports[0][0]
+
+
+# -------------------------
+# BROKER REGISTRY
+# -------------------------
+
+def read_registry(path=REGISTRY_FILE):
+    """{device: {"port": tcp_port, "pid": pid, "baudrate": baud}} of the running brokers"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_registry(device, entry, path=REGISTRY_FILE):
+    registry = read_registry(path)
+    if entry is None:
+        registry.pop(device, None)
+    else:
+        registry[device] = entry
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp, path)
+
+
+def broker_url(device, path=REGISTRY_FILE):
+    """pyserial URL of the broker serving `device`, or None"""
+    entry = read_registry(path).get(device)
+    if entry is None:
+        return None
+    return f"socket://{BROKER_HOST}:{entry['port']}"
+
+
+# -------------------------
+# OPENING
+# -------------------------
+
+def wait_for_boot(ser, timeout=BOOT_DELAY, probe=proto.PING_FRAME, interval=PROBE_INTERVAL):
+    """
+    Wait until the firmware answers: `probe` is sent every `interval` and its
+    READY reply ends the wait. A boot banner (the board was reset anyway) stops
+    the probing; the reply to a probe sent while it booted is still collected
+    for up to `interval`. With probe=None only the boot banner is awaited
+    (firmware without the probe). Returns the first line, or None after `timeout`
+    """
+    deadline = time.monotonic() + timeout
+    next_probe = time.monotonic()
+    answer = None
+    line = bytearray()
+    while time.monotonic() < deadline:
+        if probe and answer is None and time.monotonic() >= next_probe:
+            ser.write(probe)
+            next_probe = time.monotonic() + interval
+        byte = ser.read(1)
+        if not byte:
+            continue
+        if byte != b"\n":
+            line += byte
+            continue
+        text = line.decode(errors="replace").strip()
+        line.clear()
+        if not text:
+            continue
+        if not probe or text == proto.READY_LINE:
+            return answer or text
+        # Boot banner: drain the READY of an earlier probe so it does not reach the transport
+        answer = answer or text
+        deadline = min(deadline, time.monotonic() + interval)
+    return answer
+
+
+def open_serial(device, baudrate=BAUDRATE, timeout=TIMEOUT, boot_delay=BOOT_DELAY, probe=proto.PING_FRAME):
+    """
+    Open `device` directly, keeping DTR/RTS low so the board is not reset
+    where the driver allows it, and return as soon as the firmware answers
+    `probe` (at most `boot_delay`, in case it was reset anyway)
+    """
+    import serial
+
+    ser = serial.Serial()
+    ser.port = device
+    ser.baudrate = baudrate
+    ser.timeout = min(timeout, PROBE_INTERVAL) if timeout else PROBE_INTERVAL
+    ser.dsrdtr = False
+    ser.rtscts = False
+    ser.dtr = False
+    ser.rts = False
+    ser.open()
+
+    if boot_delay:
+        reply = wait_for_boot(ser, boot_delay, probe)
+        log.debug("%s: %s", device, f"ready ({reply!r})" if reply else "no answer")
+    ser.timeout = timeout
+    return ser
+
+
+def open_connection(device=None, baudrate=BAUDRATE, timeout=TIMEOUT, use_broker=True):
+    """
+    Serial-like handle for `device`: through its broker when one is running
+    (no reset, no boot wait), else opened directly with open_serial
+    """
+    device = default_port(device)
+    url = broker_url(device) if use_broker else None
+    if url is not None:
+        import serial
+        try:
+            ser = serial.serial_for_url(url, baudrate=baudrate, timeout=timeout)
+            log.info("Attached to %s through broker %s", device, url)
+            return ser
+        except (serial.SerialException, OSError) as e:
+            # Stale entry left by a broker that did not shut down cleanly
+            log.warning("Broker for %s unreachable (%s) - opening it directly", device, e)
+            _update_registry(device, None)
+    ser = open_serial(device, baudrate, timeout)
+    log.info("Opened %s", device)
+    return ser
+
+
+def open_with_retry(device=None, baudrate=BAUDRATE, timeout=TIMEOUT, use_broker=True, retries=RETRIES):
+    """open_connection, retried with exponential backoff; raises the last error"""
+    delays = backoff_delays(retries)
+    while True:
+        try:
+            return open_connection(device, baudrate, timeout, use_broker)
+        except OSError as e:  # serial.SerialException is an OSError
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            log.warning("Opening %s failed (%s) - retrying in %.2fs", device or "port", e, delay)
+            time.sleep(delay)
+
+
+# -------------------------
+# IN-PROCESS SHARING
+# -------------------------
+
+class ConnectionManager:
+    """One reference-counted handle per device, shared by everything in the process"""
+
+    def __init__(self, use_broker=True):
+        self.use_broker = use_broker
+        self._handles = {}   # device -> [ser, refcount, handles it replaced]
+        self._lock = threading.Lock()
+
+    def acquire(self, device=None, baudrate=BAUDRATE, timeout=TIMEOUT):
+        """Handle for `device`, opened on first use; pair every acquire with release"""
+        device = default_port(device)
+        with self._lock:
+            entry = self._handles.get(device)
+            if entry is None:
+                ser = open_with_retry(device, baudrate, timeout, self.use_broker)
+                entry = self._handles[device] = [ser, 0, []]
+            elif not entry[0].is_open:
+                entry[2].append(entry[0])
+                entry[0] = open_with_retry(device, baudrate, timeout, self.use_broker)
+            entry[1] += 1
+            return entry[0]
+
+    def reconnect(self, device):
+        """
+        Close and reopen `device` (with backoff) for all its users; returns the
+        new handle. Users still holding the old one can release it as before
+        """
+        with self._lock:
+            entry = self._handles.get(device)
+            if entry is None:
+                raise KeyError(device)
+            old = entry[0]
+            try:
+                old.close()
+            except Exception:
+                pass
+            entry[2].append(old)
+            entry[0] = open_with_retry(device, old.baudrate, old.timeout, self.use_broker)
+            return entry[0]
+
+    def release(self, ser):
+        """
+        Drop one reference to `ser` (the current handle of its device or one
+        replaced by reconnect); the port is closed with the last one
+        """
+        with self._lock:
+            for device, entry in list(self._handles.items()):
+                if entry[0] is ser or any(old is ser for old in entry[2]):
+                    entry[1] -= 1
+                    if entry[1] <= 0:
+                        del self._handles[device]
+                        entry[0].close()
+                    return
+        ser.close()
+
+    def close_all(self):
+        with self._lock:
+            for ser, _, _ in self._handles.values():
+                ser.close()
+            self._handles.clear()
+
+
+connections = ConnectionManager()
+
+
+# -------------------------
+# BROKER
+# -------------------------
+
+class ConnectionBroker:
+    """
+    Keeps one device open and relays it to local TCP clients, one at a time
+    A client that connects while another is attached is refused, so two tools
+    never interleave frames. A dropped device is reopened with backoff while
+    the client stays attached.
+    """
+
+    def __init__(self, device, baudrate=BAUDRATE, host=BROKER_HOST, port=0, registry=REGISTRY_FILE):
+        self.device = device
+        self.baudrate = baudrate
+        self.registry = registry
+        self.ser = open_serial(device, baudrate, timeout=0.05)
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+        self.clients = 0           # Clients served so far
+        self._client = None
+        self._running = True
+        self._lock = threading.Lock()
+        self._reopen_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._serial_to_client, name="broker-serial", daemon=True)
+        _update_registry(device, {"port": self.address[1], "pid": os.getpid(), "baudrate": baudrate},
+                         registry)
+
+    @property
+    def url(self):
+        return f"socket://{self.address[0]}:{self.address[1]}"
+
+    def serve_forever(self):
+        self._reader.start()
+        log.info("Sharing %s on %s", self.device, self.url)
+        try:
+            while self._running:
+                try:
+                    client, peer = self.server.accept()
+                except OSError:
+                    break
+                with self._lock:
+                    busy = self._client is not None
+                    if not busy:
+                        self._client = client
+                if busy:
+                    log.warning("Refused %s:%d - %s is in use", *peer, self.device)
+                    client.close()
+                    continue
+                self.clients += 1
+                log.info("Client %s:%d attached", *peer)
+                threading.Thread(target=self._client_to_serial, args=(client,),
+                                 name="broker-client", daemon=True).start()
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._running:
+            return
+        self._running = False
+        _update_registry(self.device, None, self.registry)
+        self.server.close()
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+        self.ser.close()
+
+    def _detach(self, client):
+        with self._lock:
+            if self._client is client:
+                self._client = None
+        client.close()
+        log.info("Client detached")
+
+    def _client_to_serial(self, client):
+        while self._running:
+            try:
+                data = client.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            ser = self.ser
+            try:
+                ser.write(data)
+            except Exception as e:
+                log.error("Write to %s failed: %s", self.device, e)
+                self._reopen(ser)
+        self._detach(client)
+
+    def _serial_to_client(self):
+        while self._running:
+            ser = self.ser
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                if not self._running:
+                    break
+                log.error("Read from %s failed: %s", self.device, e)
+                self._reopen(ser)
+                continue
+            if not data:
+                continue
+            with self._lock:
+                client = self._client
+            if client is None:
+                continue  # Nobody attached: output (e.g. a boot banner) is dropped
+            try:
+                client.sendall(data)
+            except OSError:
+                self._detach(client)
+
+    def _reopen(self, failed):
+        """Reopen the device with backoff until it is back or the broker stops"""
+        with self._reopen_lock:
+            if self.ser is not failed:
+                return  # Already reopened by the other relay thread
+            try:
+                failed.close()
+            except Exception:
+                pass
+            delays = backoff_delays(retries=sys.maxsize)
+            while self._running:
+                try:
+                    self.ser = open_serial(self.device, self.baudrate, timeout=0.05)
+                    log.info("Reopened %s", self.device)
+                    return
+                except OSError as e:
+                    delay = next(delays)
+                    log.warning("Reopening %s failed (%s) - retrying in %.2fs", self.device, e, delay)
+                    time.sleep(delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m SCARA.Connection",
+                                     description="Shared serial connections for the SCARA tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list serial ports and running brokers")
+    serve = sub.add_parser("serve", help="keep a device open and share it over a local socket")
+    serve.add_argument("--port", help="serial device (default: first Arduino-like port)")
+    serve.add_argument("--baudrate", type=int, default=BAUDRATE)
+    serve.add_argument("--tcp-port", type=int, default=0, help="local TCP port (default: any free port)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        brokers = read_registry()
+        for device, description in discover_ports():
+            shared = f"  [shared on {broker_url(device)}]" if device in brokers else ""
+            print(f"{device:<20} {description}{shared}")
+        for device in brokers:
+            print(f"{device:<20} broker {broker_url(device)} (pid {brokers[device]['pid']})")
+        return 0
+
+    configure_logging("INFO")
+    broker = ConnectionBroker(default_port(args.port, shared=False), args.baudrate, port=args.tcp_port)
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
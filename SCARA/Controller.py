@@ -0,0 +1,374 @@
+# -------------------------
+# ROBOT CONTROLLER
+# -------------------------
+
+# Object front end of the SCARA arm. Creating a RobotController has no side
+# effects: the serial port is opened when the first command needs it, and the
+# motion planning modules (numpy) are imported on first use. Ports come from
+# Connection.connections, so the arm is shared with the other tools in the
+# process (or with a running connection broker) and reopened after a drop.
+
+import math
+import sys
+import time
+
+from . import Utilities as utl
+from . import Protocol as proto
+from .Diagnostics import dump_ring_buffer, get_logger
+
+# -------------------------
+# CONFIGURATION
+# -------------------------
+PORT = "COM6"     # "SIM" runs against the hardware-free simulator, None picks a port
+BAUDRATE = 115200
+TIMEOUT = 1
+
+# Host-planned velocity profile: None (fixed firmware speed), "trapezoid" or "scurve"
+# Profiles need the AllNano firmware
+MOTION_PROFILE = None
+
+# Sequenced frames with binary status replies (needs the current firmware),
+# False falls back to the text replies of older firmware
+BINARY_STATUS = True
+
+# Controller firmware: "master" (MasterArduino + I2C slaves) or "nano" (AllNano)
+# Sets the fixed axis speeds the wait policies plan with, and the flavour
+# emulated when PORT is "SIM"
+FIRMWARE = "master"
+
+# Home position (angles in radians)
+HOME_ANGLES = (0, 0, 0, 0)
+
+REST_POINT = (0.15, -0.15)  # Safe rest point above the table
+
+log = get_logger("main")
+serial_log = get_logger("serial")
+
+
+def cycle_points(pick_x, pick_y, place_x, place_y, z_pick=-7, z_place=-20, phi_p=0, rest=True):
+    """
+    Points of one pick-and-place cycle as (x, y, z, phi, gripper_open, operation),
+    ending at REST_POINT unless rest=False
+    """
+    points = [
+        (pick_x, pick_y, 0, phi_p, True, "approach"),   # Point 1 go above pick
+        (pick_x, pick_y, 0, 0, True, "approach"),   # Point 2 pick
+        (pick_x, pick_y, z_pick, phi_p, True, "descend"),   # Point 2 pick
+        (pick_x, pick_y, z_pick, phi_p, False, "grip"),   # Point 3 grip
+        (pick_x, pick_y, 0, 90, False, "lift"),   # Point 4 lift up
+        (place_x, place_y, 0, 90, False, "transit"), # Point 5 go above place
+        (place_x, place_y, z_place, 90, False, "descend"),   # Point 6 go down to place
+        (place_x, place_y, z_place, 90, True, "release"),   # Point 7 release
+        (place_x, place_y, 0, 0, False, "lift"), # Point 8 go up
+    ]
+    if rest:
+        points.append((*REST_POINT, 0, 0, False, "rest"))
+    return points
+
+
+class RobotController:
+    """SCARA arm on one serial port, tracking its current joint angles"""
+
+    def __init__(self, port=PORT, baudrate=BAUDRATE, timeout=TIMEOUT, profile=MOTION_PROFILE,
+                 binary_status=BINARY_STATUS, firmware=FIRMWARE):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.profile = profile
+        self.binary_status = binary_status
+        self.firmware = firmware
+        self.current_angles = HOME_ANGLES  # Start at home position
+
+        self.ser = None
+        self._transport = None
+
+    # ---- connection ----
+
+    @property
+    def connected(self):
+        return self._transport is not None and self._transport.alive
+
+    def connect(self):
+        """
+        Open the serial port (once), or reopen it with backoff after it failed
+        Raises serial.SerialException when the port cannot be opened
+        """
+        if self.connected:
+            return self
+        from .Connection import connections, default_port
+        from .Transport import SerialTransport
+
+        if self._transport is not None:
+            # The reader stopped on a port error: pending commands already failed
+            log.warning("Connection to %s lost - reconnecting", self.port)
+            self._transport.close()
+            self._transport = None
+            if self.port != "SIM":
+                self.ser = connections.reconnect(self.port)
+
+        if self.port == "SIM":
+            from .Simulator import SimulatedSerial
+            self.ser = SimulatedSerial(self.port, self.baudrate, timeout=self.timeout,
+                                       firmware=self.firmware)
+        elif self.ser is None:
+            self.port = default_port(self.port)
+            self.ser = connections.acquire(self.port, self.baudrate, self.timeout)
+        log.info("Connected to %s successfully", self.port)
+        # Background reader: replies are parsed as soon as they arrive
+        self._transport = SerialTransport(self.ser, binary=self.binary_status)
+        return self
+
+    @property
+    def transport(self):
+        return self.connect()._transport
+
+    def close(self):
+        # Keep the legs planned in this session for the next one (only if motion was planned)
+        route_cache = sys.modules.get(f"{__package__}.RouteCache")
+        if route_cache is not None:
+            route_cache.save_route_cache()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self.ser is not None:
+            if self.port == "SIM":
+                self.ser.close()
+            else:
+                from .Connection import connections
+                connections.release(self.ser)
+            log.info("Serial connection closed")
+        self.ser = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- sending ----
+
+    def send_and_listen(self, pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2,
+                        timeout=5, profile=None):
+        """
+        Send motor commands and return the Arduino responses once the move is done
+        Thin blocking wrapper around the background transport: it returns as soon
+        as the completion message arrives (or after `timeout` seconds)
+        `profile` is an optional list of velocity profile segments for this move
+        """
+        try:
+            # Pack data: 3 pulses (32-bit int) + 3 directions + 2 servo values (byte)
+            frame = proto.pack_motion_frame(pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2)
+            if profile:
+                frame = proto.pack_profile_frame(profile) + frame
+            responses = self.transport.request(frame, timeout)
+
+            serial_log.debug("Arduino responses:")
+            for msg in responses:
+                if isinstance(msg, proto.StatusFrame):
+                    serial_log.debug("   %s #%d: M1=%d M2=%d Z=%d", proto.status_name(msg.status),
+                                     msg.seq, msg.steps1, msg.steps2, msg.steps3)
+                else:
+                    serial_log.debug("   %s", msg)
+
+            return responses
+
+        except Exception as e:
+            serial_log.error("Error in send_and_listen: %s", e)
+            return []
+
+    # ---- motion ----
+
+    def move_to_point(self, x, y, z, phi=0, gripper_open=False, auto_home=True, profile=None,
+                      wait=None, telemetry=None, linear=False):
+        """
+        Move to specified point with constraints and optional homing
+        `wait` (WaitPolicy, operation name or seconds) is applied once the move is done
+        `profile` defaults to the controller's velocity profile
+        With linear=True the tip follows a straight Cartesian line (MotionQueue.plan_line)
+        Returns True if the move was completed
+        """
+        from .MotionQueue import plan_move, plan_line
+        from .Trajectory import tip_position
+        from .WaitPolicy import WAIT_POLICIES, planned_duration
+
+        profile = profile or self.profile
+        current_angles = self.current_angles
+
+        # IK, relative steps and servo values (phi is converted to radians inside)
+        if linear:
+            moves = plan_line(x, y, current_angles, z, phi, gripper_open, wait, profile)
+        else:
+            move = plan_move(x, y, current_angles, z, phi, gripper_open, wait, profile)
+            moves = None if move is None else [move]
+        if moves is None:
+            log.warning("❌ IK failed - skipping this point")
+            return False
+
+        for move in moves:
+            segments = move.profile.segments if move.profile else None
+            distance = math.dist(tip_position(*self.current_angles[:2]), tip_position(*move.target_angles[:2]))
+            sent_at = time.monotonic()
+            responses = self.send_and_listen(*move.steps, move.servo1, move.servo2, profile=segments)
+            done_at = time.monotonic()
+
+            if not responses:
+                log.error("⚠️ No response from Arduino!")
+                return False
+
+            # Update current position if movement was successful
+            self.current_angles = move.target_angles
+
+            # Wait only as long as this operation needs after the reported completion
+            policy = WAIT_POLICIES["home"] if auto_home and move is moves[-1] else move.wait
+            dwell = policy.wait(move, distance, sent_at, done_at, self.firmware)
+            if telemetry is not None:
+                telemetry.record(policy.name, planned_duration(move, self.firmware), sent_at, None, done_at, dwell)
+
+        if auto_home:
+            self.return_home()
+        return True
+
+    def return_home(self):
+        """Drive the arm motors back to HOME_ANGLES from the current position"""
+        home_steps1, home_dir1, home_steps2, home_dir2, _, _ = utl.calculate_relative_steps(
+            HOME_ANGLES, self.current_angles)
+        responses = self.send_and_listen(home_steps1, home_dir1, home_steps2, home_dir2,
+                                         pulses3=0, dir3=0, servo1=90, servo2=90)
+        if responses:
+            self.current_angles = HOME_ANGLES
+            log.info("✅ Home position reached")
+        return bool(responses)
+
+    def home(self):
+        """Go to the stretched-out home pose and reset the angle tracking"""
+        self.move_to_point(x=0.36, y=0, z=0, phi=0, gripper_open=False, auto_home=False)
+        self.current_angles = HOME_ANGLES
+
+    def manual_move(self, rel_steps1, rel_steps2):
+        """Manually move relative steps (for testing)"""
+        dir1 = 1 if rel_steps1 >= 0 else 0
+        dir2 = 1 if rel_steps2 >= 0 else 0
+
+        rel_steps1 = abs(rel_steps1)
+        rel_steps2 = abs(rel_steps2)
+
+        log.info("🔧 MANUAL MOVE: M1=%d(d:%d), M2=%d(d:%d)", rel_steps1, dir1, rel_steps2, dir2)
+
+        responses = self.send_and_listen(rel_steps1, dir1, rel_steps2, dir2, pulses3=0, dir3=0,
+                                         servo1=90, servo2=90)
+        if responses:
+            log.info("✅ Manual move completed")
+        else:
+            log.error("❌ No response during manual move")
+        return responses
+
+    def pick_and_place(self, pick_x, pick_y, place_x=0.15, place_y=-0.25, z_pick=-7, z_place=-20, phi_p=0,
+                       pipelined=True, queue_depth=None, profile=None, linear_transit=False,
+                       wait_policies=None, program=False):
+        """
+        Perform a pick-and-place operation
+        Every move waits for reported completion and then for its operation's wait
+        policy (WAIT_POLICIES, overridable per operation with `wait_policies`)
+        With pipelined=True the next frames are planned and streamed while the
+        current move executes, except after moves whose policy needs rest
+        With a velocity profile the moves ramp down smoothly and need no wobble settle
+        With linear_transit the pick -> place transit follows a straight line
+        With program=True the whole sequence is uploaded at once and run by the
+        controller (binary protocol, fixed firmware speeds)
+        Returns the CycleTelemetry of the cycle
+        """
+        log.info("--- PICK AND PLACE OPERATION --- (phi_p: %s)", phi_p)
+        test_points = cycle_points(pick_x, pick_y, place_x, place_y, z_pick, z_place, phi_p)
+        return self.run_points(test_points, pipelined, queue_depth, profile, linear_transit,
+                               wait_policies, program)
+
+    def pick_and_place_batch(self, picks, slots, z_pick=-7, z_place=-20, fixed_slots=False,
+                             rest_between=False, **options):
+        """
+        Pick-and-place of several objects in one run
+        picks: (x, y) or (x, y, phi) per object; slots: (x, y) place locations
+        The order (and, unless fixed_slots, the slot of each object) is chosen by
+        Scheduler.plan_batch to minimize joint travel time; the rest point is only
+        visited when a direct leg is blocked, at the end, or between all cycles
+        with rest_between=True. `options` are passed on to run_points
+        Returns (BatchPlan, CycleTelemetry)
+        """
+        from .Scheduler import plan_batch
+        from .WaitPolicy import CycleTelemetry
+
+        plan = plan_batch(picks, slots, self.current_angles, REST_POINT, fixed_slots, rest_between)
+        log.info("--- BATCH PICK AND PLACE --- %d objects, est. travel %.2fs (%.2fs in input order)",
+                 len(plan.jobs), plan.cost, plan.naive_cost)
+        for pick_index in plan.unreachable:
+            log.warning("⚠️ Pick %d is out of reach - skipped", pick_index)
+        if not plan.jobs:
+            log.warning("⚠️ No reachable picks - nothing to do")
+            return plan, CycleTelemetry()
+
+        points = []
+        for k, (pick_index, slot_index) in enumerate(plan.jobs):
+            if plan.rest_before[k]:
+                points.append((*REST_POINT, 0, 0, False, "rest"))
+            pick = picks[pick_index]
+            phi_p = pick[2] if len(pick) > 2 else 0
+            points += cycle_points(pick[0], pick[1], *slots[slot_index][:2], z_pick, z_place, phi_p,
+                                   rest=False)
+        if points:
+            points.append((*REST_POINT, 0, 0, False, "rest"))
+        return plan, self.run_points(points, **options)
+
+    def run_points(self, test_points, pipelined=True, queue_depth=None, profile=None, linear_transit=False,
+                   wait_policies=None, program=False):
+        """
+        Execute a list of (x, y, z, phi, gripper_open, operation) points, stopping
+        at the first failed move; options as for pick_and_place
+        Returns the CycleTelemetry of the run
+        """
+        from .MotionQueue import MotionQueue, QUEUE_DEPTH
+        from .Program import start_program
+        from .WaitPolicy import WAIT_POLICIES, CycleTelemetry, as_policy
+
+        profile = profile or self.profile
+        queue_depth = queue_depth or QUEUE_DEPTH
+
+        policies = dict(WAIT_POLICIES, **(wait_policies or {}))
+        telemetry = CycleTelemetry()
+        if not test_points:
+            return telemetry
+
+        points = []
+        prev_x, prev_y = test_points[0][0], test_points[0][1]
+        for x, y, z, phi, gripper_state, operation in test_points:
+            linear = linear_transit and (x, y) != (prev_x, prev_y)
+            points.append((x, y, z, phi, gripper_state, as_policy(policies[operation]), linear))
+            prev_x, prev_y = x, y
+
+        if program:
+            running = start_program(self.transport, points, self.current_angles, firmware=self.firmware)
+            if running is None:
+                log.error("⚠️ Program planning failed - sequence not started")
+                dump_ring_buffer()
+            else:
+                success, self.current_angles, completed = running.wait(telemetry)
+                if not success:
+                    log.error("⚠️ Movement %d failed - sequence stopped", completed + 1)
+                    dump_ring_buffer()
+        elif pipelined:
+            queue = MotionQueue(self.transport, depth=queue_depth, profile=profile, firmware=self.firmware)
+            success, self.current_angles, completed = queue.run(points, self.current_angles, telemetry)
+            if not success:
+                log.error("⚠️ Movement %d failed - sequence stopped", completed + 1)
+                dump_ring_buffer()
+        else:
+            for i, (x, y, z, phi, gripper_state, policy, linear) in enumerate(points, 1):
+                log.info("Pick and place %d/%d (%s)", i, len(points), policy.name)
+                success = self.move_to_point(x, y, z, phi, gripper_open=gripper_state, auto_home=False,
+                                             profile=profile, wait=policy, telemetry=telemetry,
+                                             linear=linear)
+                if not success:
+                    log.error("⚠️ Movement %d failed - sequence stopped", i)
+                    dump_ring_buffer()
+                    break
+
+        log.info("✅ Pick and place operation completed")
+        return telemetry
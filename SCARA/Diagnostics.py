@@ -0,0 +1,91 @@
+# -------------------------
+# DIAGNOSTICS (LOGGING)
+# -------------------------
+
+# Thin layer over the standard logging module for the "scara.*" loggers.
+# Messages use %-style arguments, so nothing is formatted unless a handler
+# actually emits the record. Per-solve / per-frame details are logged at
+# DEBUG and stay silent by default; an optional ring buffer keeps the most
+# recent records in memory so they can be dumped after a fault.
+
+import logging
+import sys
+from collections import deque
+
+ROOT_LOGGER = "scara"
+DEFAULT_LEVEL = logging.WARNING
+RING_BUFFER_SIZE = 2000  # Records kept by the ring buffer sink
+
+CONSOLE_FORMAT = "%(message)s"
+DUMP_FORMAT = "%(relativeCreated)10.1f ms %(levelname)-7s %(name)s: %(message)s"
+
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+logging.getLogger(ROOT_LOGGER).setLevel(DEFAULT_LEVEL)
+
+
+def get_logger(name):
+    """Logger for one subsystem, e.g. get_logger("ik") -> "scara.ik" """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last `capacity` records unformatted; format them with dump()"""
+
+    def __init__(self, capacity=RING_BUFFER_SIZE, level=logging.DEBUG):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(DUMP_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+    def dump(self, stream=None):
+        """Write the buffered records to `stream` (stderr by default), oldest first"""
+        stream = stream or sys.stderr
+        for record in list(self.records):
+            stream.write(self.format(record) + "\n")
+        stream.flush()
+
+
+_console = None
+_ring = None
+
+
+def configure_logging(level=DEFAULT_LEVEL, console=True, ring_buffer=None):
+    """
+    Set up the "scara" loggers
+    level:       console level (name or number)
+    ring_buffer: number of records to keep in memory (at DEBUG), None to disable
+    Returns the RingBufferHandler or None
+    """
+    global _console, _ring
+    root = logging.getLogger(ROOT_LOGGER)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    for handler in (_console, _ring):
+        if handler is not None:
+            root.removeHandler(handler)
+    _console = _ring = None
+
+    if console:
+        _console = logging.StreamHandler(sys.stdout)
+        _console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        _console.setLevel(level)
+        root.addHandler(_console)
+    if ring_buffer:
+        _ring = RingBufferHandler(ring_buffer)
+        root.addHandler(_ring)
+
+    # The loggers only create records that some handler will keep
+    root.setLevel(logging.DEBUG if _ring is not None else level)
+    return _ring
+
+
+def dump_ring_buffer(stream=None):
+    """Dump the ring buffer set up by configure_logging (no-op without one)"""
+    if _ring is not None:
+        _ring.dump(stream)
@@ -0,0 +1,169 @@
+# -------------------------
+# FORWARD KINEMATICS AND JACOBIAN
+# -------------------------
+
+# Vectorized forward kinematics of the 2-link arm plus the theta3 wrist.
+# Every function takes scalars or arrays of joint angles (numpy broadcasting),
+# so whole trajectories are checked in one call:
+#
+#   pose:      (x, y, phi) with phi = theta1 + theta2 + theta3, the inverse of
+#              IK.end_effector
+#   jacobian:  d(x, y, phi) / d(theta1, theta2, theta3)
+#   condition: condition number of the positional 2x2 block. It depends on
+#              theta2 only and grows to infinity at the stretched-out
+#              (theta2 = 0) and folded (theta2 = pi) singularities
+#
+# Motor step counts and step rates convert back to joint angles and rates
+# (the inverse of IK.angles_to_steps, including the motor2 coupling), so
+# executed steps can be checked against commanded poses and step rates
+# turned into Cartesian tip speeds.
+
+import math
+
+import numpy as np
+from . import InverseKinematics as IK
+
+# Above this condition number the arm counts as near a singularity and
+# speeds are scaled down (SINGULARITY_CONDITION / condition)
+SINGULARITY_CONDITION = 10.0
+MIN_SPEED_SCALE = 0.2  # Never slow down more than this near a singularity
+
+
+def pose(theta1, theta2, theta3=0.0, L1=IK.L1, L2=IK.L2):
+    """End-effector (x, y, phi) for the given joint angles (rad)"""
+    theta1 = np.asarray(theta1, dtype=float)
+    theta12 = theta1 + theta2
+    x = L1 * np.cos(theta1) + L2 * np.cos(theta12)
+    y = L1 * np.sin(theta1) + L2 * np.sin(theta12)
+    return x, y, theta12 + theta3
+
+
+def path_poses(path_angles, L1=IK.L1, L2=IK.L2):
+    """(N,4) array of (x, y, phi, z) for an (N,4) array of (theta1, theta2, theta3, z)"""
+    path_angles = np.atleast_2d(np.asarray(path_angles, dtype=float))
+    x, y, phi = pose(path_angles[:, 0], path_angles[:, 1], path_angles[:, 2], L1, L2)
+    return np.column_stack((x, y, phi, path_angles[:, 3]))
+
+
+def jacobian(theta1, theta2, L1=IK.L1, L2=IK.L2):
+    """
+    Jacobian of (x, y, phi) with respect to (theta1, theta2, theta3)
+    Returns an array of shape (..., 3, 3) for the broadcast shape of the angles
+    """
+    theta1, theta2 = np.broadcast_arrays(np.asarray(theta1, dtype=float), np.asarray(theta2, dtype=float))
+    theta12 = theta1 + theta2
+    s1, c1 = np.sin(theta1), np.cos(theta1)
+    s12, c12 = np.sin(theta12), np.cos(theta12)
+
+    J = np.zeros(theta1.shape + (3, 3))
+    J[..., 0, 0] = -L1 * s1 - L2 * s12
+    J[..., 0, 1] = -L2 * s12
+    J[..., 1, 0] = L1 * c1 + L2 * c12
+    J[..., 1, 1] = L2 * c12
+    J[..., 2, :] = 1.0  # The wrist angle adds up all three joints
+    return J
+
+
+def condition_number(theta2, L1=IK.L1, L2=IK.L2):
+    """
+    Condition number of the positional Jacobian (inf at a singularity)
+    Closed form from the singular values of the 2x2 block, which do not
+    depend on theta1
+    """
+    theta2 = np.asarray(theta2, dtype=float)
+    # J J^T has trace t and determinant d^2, with d = L1 L2 sin(theta2)
+    trace = L1*L1 + 2*L2*L2 + 2*L1*L2*np.cos(theta2)
+    det = np.abs(L1 * L2 * np.sin(theta2))
+    root = np.sqrt(np.maximum(0.0, trace*trace / 4 - det*det))
+    sigma_max = np.sqrt(trace / 2 + root)
+    # sigma_max * sigma_min = det; dividing avoids the cancellation of trace/2 - root
+    sigma_min = det / sigma_max
+    with np.errstate(divide="ignore"):
+        return np.where(sigma_min > 0, sigma_max / np.where(sigma_min > 0, sigma_min, 1.0), np.inf)
+
+
+def speed_scale(theta2, max_condition=SINGULARITY_CONDITION, min_scale=MIN_SPEED_SCALE):
+    """Factor (min_scale..1) to apply to step rates at the given elbow angles"""
+    return np.clip(max_condition / condition_number(theta2), min_scale, 1.0)
+
+
+def near_singularity(path_angles, max_condition=SINGULARITY_CONDITION):
+    """Boolean mask of the waypoints of an (N,4) path whose condition exceeds max_condition"""
+    path_angles = np.atleast_2d(np.asarray(path_angles, dtype=float))
+    return condition_number(path_angles[:, 1]) > max_condition
+
+
+# -------------------------
+# STEPS AND RATES
+# -------------------------
+
+def steps_to_angles(steps1, steps2, steps3=0, steps_per_rev=IK.STEPS_PER_REV, microsteps=IK.MICROSTEPS,
+                    gear_ratio=IK.GEAR_RATIO, step_sign=IK.STEP_SIGN, home_offsets=IK.HOME_OFFSETS):
+    """
+    Joint angles (theta1, theta2, theta3) of absolute motor step counts
+    Inverse of IK.angles_to_steps up to the step quantization
+    """
+    rad_per_step = 2 * math.pi / (steps_per_rev * microsteps * gear_ratio)
+    theta1 = (np.asarray(steps1, dtype=float) - home_offsets[0]) * step_sign[0] * rad_per_step
+    theta2_motor = (np.asarray(steps2, dtype=float) - home_offsets[1]) * step_sign[1] * rad_per_step
+    theta3 = (np.asarray(steps3, dtype=float) - home_offsets[2]) * step_sign[2] * rad_per_step
+    # Motor2 drives 2 * theta2 + theta1 (2:1 reduction + coupling)
+    return theta1, (theta2_motor - theta1) / 2, theta3
+
+
+def joint_rates(rate1, rate2, steps_per_joint_rev=IK.STEPS_PER_JOINT_REV):
+    """Signed joint rates (rad/s) of theta1/theta2 from signed motor1/motor2 step rates (steps/s)"""
+    omega1 = np.asarray(rate1, dtype=float) * (2 * math.pi / steps_per_joint_rev)
+    omega2_motor = np.asarray(rate2, dtype=float) * (2 * math.pi / steps_per_joint_rev)
+    return omega1, (omega2_motor - omega1) / 2
+
+
+def tip_speed(theta1, theta2, rate1, rate2, L1=IK.L1, L2=IK.L2):
+    """Cartesian tip speed (m/s) at the given angles for signed motor1/motor2 step rates"""
+    omega1, omega2 = joint_rates(rate1, rate2)
+    theta12 = np.asarray(theta1, dtype=float) + theta2
+    vx = -(L1 * np.sin(theta1) + L2 * np.sin(theta12)) * omega1 - L2 * np.sin(theta12) * omega2
+    vy = (L1 * np.cos(theta1) + L2 * np.cos(theta12)) * omega1 + L2 * np.cos(theta12) * omega2
+    return np.hypot(vx, vy)
+
+
+# -------------------------
+# TRAJECTORY CHECKS
+# -------------------------
+
+def joint_interpolation(start_angles, target_angles, n, L1=IK.L1, L2=IK.L2):
+    """
+    n waypoints interpolated linearly in joint space (excluding the start)
+    Returns (path (n,4), poses (n,4)) so the curved tip path can be checked
+    """
+    u = (np.arange(1, n + 1) / n)[:, None]
+    start = np.asarray(start_angles, dtype=float)
+    path = start + (np.asarray(target_angles, dtype=float) - start) * u
+    return path, path_poses(path, L1, L2)
+
+
+def pose_errors(path_angles, targets, L1=IK.L1, L2=IK.L2):
+    """
+    Tip position error (m) of every waypoint of an (N,4) path against (N,2) target (x, y)
+    """
+    poses = path_poses(path_angles, L1, L2)
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    return np.hypot(poses[:, 0] - targets[:, 0], poses[:, 1] - targets[:, 1])
+
+
+def singularity_map(resolution=0.005, L1=IK.L1, L2=IK.L2):
+    """
+    Condition number over an (x, y) grid covering the reach of the arm
+    Returns (coords, condition) with condition[iy, ix] at (coords[ix], coords[iy]),
+    NaN outside the reachable annulus; same layout as Workspace.WorkspaceGrid
+    """
+    reach = L1 + L2
+    n = int(np.ceil(2 * reach / resolution)) + 1
+    coords = -reach + np.arange(n) * resolution
+    xs, ys = np.meshgrid(coords, coords)
+
+    # |theta2| only depends on the distance to the base (law of cosines)
+    r2 = xs*xs + ys*ys
+    reachable = (r2 <= reach*reach) & (r2 >= (L1 - L2)**2)
+    theta2 = np.arccos(np.clip((r2 - L1*L1 - L2*L2) / (2 * L1 * L2), -1.0, 1.0))
+    return coords, np.where(reachable, condition_number(theta2, L1, L2), np.nan)
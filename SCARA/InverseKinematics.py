@@ -13,33 +13,75 @@ STEPS_PER_JOINT_REV = STEPS_PER_REV * MICROSTEPS * GEAR_RATIO
 STEPS_PER_REV_Z = 400
 
 
-def ik_scara(x, y, L1=L1, L2=L2):
+def ik_scara_branches(x, y, L1=L1, L2=L2):
+    """
+    Both IK branches as (theta1_a, theta2_a, theta1_b, theta2_b), or None if
+    the target is unreachable (no exception to catch on the hot path)
+    The branches mirror each other about the base -> target line, so they
+    share one acos-type and two atan2 evaluations
+    """
     r2 = x*x + y*y
-    r = math.sqrt(r2)
 
-    if r > (L1 + L2) + 1e-12 or r < abs(L1 - L2) - 1e-12:
-        raise ValueError("Target unreachable: r = {:.4f} m".format(r))
+    if r2 > (L1 + L2 + 1e-12)**2 or r2 < max(0.0, abs(L1 - L2) - 1e-12)**2:
+        return None
 
     cos_theta2 = (r2 - L1*L1 - L2*L2) / (2 * L1 * L2)
     cos_theta2 = max(-1.0, min(1.0, cos_theta2))
+    sin_theta2 = math.sqrt(max(0.0, 1 - cos_theta2*cos_theta2))
 
-    sin_pos = math.sqrt(max(0.0, 1 - cos_theta2*cos_theta2))
-    sin_neg = -sin_pos
+    # A uses +sin(theta2), B uses -sin(theta2)
+    theta2_a = math.atan2(sin_theta2, cos_theta2)
+    offset = math.atan2(L2 * sin_theta2, L1 + L2 * cos_theta2)
+    base = math.atan2(y, x)
 
-    theta2_a = math.atan2(sin_pos, cos_theta2)
-    theta2_b = math.atan2(sin_neg, cos_theta2)
+    return base - offset, theta2_a, base + offset, -theta2_a
 
-    def theta1_from_theta2(theta2):
-        k1 = L1 + L2 * math.cos(theta2)
-        k2 = L2 * math.sin(theta2)
-        return math.atan2(y, x) - math.atan2(k2, k1)
 
-    theta1_a = theta1_from_theta2(theta2_a)
-    theta1_b = theta1_from_theta2(theta2_b)
+def ik_scara(x, y, L1=L1, L2=L2):
+    branches = ik_scara_branches(x, y, L1, L2)
+    if branches is None:
+        raise ValueError("Target unreachable: r = {:.4f} m".format(math.hypot(x, y)))
 
+    theta1_a, theta2_a, theta1_b, theta2_b = branches
     return (theta1_a, theta2_a), (theta1_b, theta2_b)
 
 
+def ik_scara_batch(xs, ys, L1=L1, L2=L2):
+    """
+    Vectorized version of ik_scara for many targets at once
+    Returns (theta1_a, theta2_a), (theta1_b, theta2_b), reachable as arrays
+    Unreachable targets are flagged False in the mask and their angles are NaN
+    """
+    import numpy as np  # Lazy: the scalar IK does not need numpy
+
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    r2 = xs*xs + ys*ys
+    r = np.sqrt(r2)
+
+    reachable = (r <= (L1 + L2) + 1e-12) & (r >= abs(L1 - L2) - 1e-12)
+
+    cos_theta2 = np.clip((r2 - L1*L1 - L2*L2) / (2 * L1 * L2), -1.0, 1.0)
+    sin_pos = np.sqrt(np.maximum(0.0, 1 - cos_theta2*cos_theta2))
+
+    # Same branches as ik_scara: A uses +sin(theta2), B uses -sin(theta2)
+    theta2_a = np.arctan2(sin_pos, cos_theta2)
+    theta2_b = -theta2_a
+
+    base = np.arctan2(ys, xs)
+    k1 = L1 + L2 * cos_theta2
+    k2 = L2 * sin_pos
+    theta1_a = base - np.arctan2(k2, k1)
+    theta1_b = base - np.arctan2(-k2, k1)
+
+    theta1_a = np.where(reachable, theta1_a, np.nan)
+    theta2_a = np.where(reachable, theta2_a, np.nan)
+    theta1_b = np.where(reachable, theta1_b, np.nan)
+    theta2_b = np.where(reachable, theta2_b, np.nan)
+
+    return (theta1_a, theta2_a), (theta1_b, theta2_b), reachable
+
+
 def end_effector(theta1, theta2, phi_desired):
     theta3 = phi_desired - (theta1 + theta2)
     return theta3
@@ -73,3 +115,36 @@ def angles_to_steps(theta1, theta2, theta3=0,
     d3 = int(math.copysign(1, s3))
 
     return s1, d1, s2, d2, s3, d3
+
+
+
+def angles_to_steps_batch(angles,
+                          steps_per_rev=STEPS_PER_REV, microsteps=MICROSTEPS,
+                          gear_ratio=GEAR_RATIO, step_sign=STEP_SIGN, home_offsets=HOME_OFFSETS):
+    """
+    Vectorized angles_to_steps for an (N,3) array of (theta1, theta2, theta3)
+    Returns an (N,6) int32 array laid out as (s1, d1, s2, d2, s3, d3)
+    """
+    import numpy as np  # Lazy: the scalar IK does not need numpy
+
+    angles = np.atleast_2d(np.asarray(angles, dtype=float))
+    theta1 = angles[:, 0]
+    theta2 = angles[:, 1]
+    theta3 = angles[:, 2]
+
+    steps_per_joint_rev = steps_per_rev * microsteps * gear_ratio
+
+    # Same motor2 compensation as angles_to_steps (2:1 reduction + coupling)
+    theta2_motor = 2 * theta2 + 1.0 * theta1
+
+    joint = np.stack((theta1, theta2_motor, theta3), axis=1)
+    steps = np.rint(joint / (2*math.pi) * steps_per_joint_rev).astype(np.int64)
+    steps = steps * np.asarray(step_sign, dtype=np.int64) + np.asarray(home_offsets, dtype=np.int64)
+
+    # copysign(1, s) on integers: zero counts as positive
+    dirs = np.where(steps < 0, -1, 1)
+
+    out = np.empty((angles.shape[0], 6), dtype=np.int32)
+    out[:, 0::2] = steps
+    out[:, 1::2] = dirs
+    return out
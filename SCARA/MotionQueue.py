@@ -0,0 +1,213 @@
+# -------------------------
+# PIPELINED MOTION QUEUE
+# -------------------------
+
+# Moves are planned (IK + step conversion + frame packing) ahead of time and
+# streamed to the controller as soon as it has ACKed the previous frame, so
+# the next command already sits in the controller's receive buffer while the
+# current move is executing. A move whose wait policy needs the robot at rest
+# (dwell, settle, ...) holds the queue until it is done and has settled.
+
+import time
+from collections import deque, namedtuple
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from . import Utilities as utl
+from . import Protocol as proto
+from . import Trajectory as traj
+from . import ForwardKinematics as fk
+from .Transport import ProtocolError
+from .WaitPolicy import as_policy, planned_duration
+from .RouteCache import get_route_cache
+from .Diagnostics import get_logger
+
+log = get_logger("motion")
+
+# A frame is only sent once the previous one has been ACKed, so at most one
+# frame ever waits in the controller's receive buffer: a deeper queue would
+# behave exactly like depth 2
+MAX_QUEUE_DEPTH = 2
+QUEUE_DEPTH = 2  # One frame executing, one waiting in the buffer
+
+LINE_STEP = 0.005  # Max Cartesian length (m) of one move on a straight line
+
+PlannedMove = namedtuple("PlannedMove", "point target_angles steps servo1 servo2 frame wait profile")
+
+
+def plan_move(x, y, current_angles, z, phi=0, gripper_open=False, wait=None, profile=None, use_cache=True):
+    """
+    Compute everything needed to send one move, without touching the serial port
+    `wait` is the WaitPolicy (or operation name / seconds) applied after the move
+    With profile ("trapezoid" / "scurve") a velocity profile frame is sent
+    ahead of the motion frame (AllNano firmware)
+    Legs planned before come from the persistent route cache (use_cache=True)
+    Returns a PlannedMove or None if IK failed
+    """
+    if use_cache:
+        cache = get_route_cache()
+        key = cache.key(current_angles, x, y, z, phi, gripper_open, profile)
+        move = cache.get(key)
+        if move is None:
+            move = plan_move(x, y, current_angles, z, phi, gripper_open, None, profile, use_cache=False)
+            if move is None:
+                return None
+            cache.put(key, move)
+        return move._replace(point=(x, y, z, phi, gripper_open), wait=as_policy(wait))
+
+    # Convert absolute phi (degrees) to radians
+    phi_rad = utl.degrees_to_radians(phi)
+    target_angles = utl.safe_ik_calculation(x, y, current_angles, z, phi_rad)
+    if target_angles is None:
+        return None
+
+    # Relative steps from current position to target
+    steps = utl.calculate_relative_steps(target_angles, current_angles)
+
+    # Convert the IK radian output to degrees for the servo
+    theta3_deg = utl.radians_to_degrees(target_angles[2])
+    # Ensure it's a positive integer for the servo command
+    servo1 = int(4*abs(theta3_deg)/5)
+    servo2 = 0 if gripper_open else 90  # Open / Closed position
+
+    frame = proto.pack_motion_frame(*steps, servo1, servo2)
+    move_profile = None
+    if profile:
+        move_profile = traj.plan_move_profile(steps, profile)
+        frame = traj.pack_profile(move_profile) + frame
+    return PlannedMove((x, y, z, phi, gripper_open), target_angles, steps, servo1, servo2,
+                       frame, as_policy(wait), move_profile)
+
+
+def plan_line(x, y, current_angles, z, phi=0, gripper_open=False, wait=None, profile=None,
+              max_step=LINE_STEP):
+    """
+    Straight Cartesian line from the current tip position to (x, y), split
+    into short moves solved with the batch IK
+    Profiled moves near a singularity (stretched or folded elbow) get
+    proportionally lower rate limits, so the tip speed stays bounded
+    Returns a list of PlannedMove (the wait applies after the last one) or None
+    """
+    line = traj.cartesian_line(x, y, current_angles, z, utl.degrees_to_radians(phi), max_step)
+    if line is None:
+        return None
+    path, rel_steps = line
+    scales = fk.speed_scale(path[:, 1]) if profile else None
+
+    servo2 = 0 if gripper_open else 90
+    moves = []
+    for i, (target, steps) in enumerate(zip(path, rel_steps)):
+        target_angles = tuple(float(a) for a in target)
+        steps = tuple(int(v) for v in steps)
+        servo1 = int(4*abs(utl.radians_to_degrees(target_angles[2]))/5)
+        frame = proto.pack_motion_frame(*steps, servo1, servo2)
+        move_profile = None
+        if profile:
+            limits = traj.scale_limits(traj.AXIS_LIMITS, float(scales[i]))
+            move_profile = traj.plan_move_profile(steps, profile, limits)
+            frame = traj.pack_profile(move_profile) + frame
+        last = i == len(path) - 1
+        moves.append(PlannedMove((x, y, z, phi, gripper_open), target_angles, steps, servo1, servo2,
+                                 frame, as_policy(wait if last else None), move_profile))
+    return moves
+
+
+class MotionQueue:
+    """Streams a sequence of points to the controller with up to `depth` frames in flight"""
+
+    def __init__(self, transport, depth=QUEUE_DEPTH, timeout=5, profile=None, firmware="master"):
+        if not 1 <= depth <= MAX_QUEUE_DEPTH:
+            raise ValueError(f"Queue depth must be between 1 and {MAX_QUEUE_DEPTH}")
+        self.transport = transport
+        self.depth = depth
+        self.timeout = timeout
+        self.profile = profile
+        self.firmware = firmware    # Sets the fixed axis speeds planned waits assume
+
+    def run(self, points, current_angles, telemetry=None):
+        """
+        Execute points given as (x, y, z, phi, gripper_open), (..., wait) or
+        (..., wait, linear) tuples
+        `wait` is applied after the move (see WaitPolicy.as_policy); a move
+        whose policy needs rest holds back the next one until it is done and
+        has settled. A linear point is reached along a straight Cartesian line
+        instead of a joint-space move
+        Per-move timing is recorded into `telemetry` (CycleTelemetry) if given
+        Returns (success, current_angles, completed) where current_angles is the
+        last position confirmed by the controller
+        """
+        points = iter(points)
+        planned_angles = current_angles
+        prev_xy = traj.tip_position(current_angles[0], current_angles[1])
+        in_flight = deque()   # (PendingCommand, PlannedMove, distance)
+        ready = deque()       # (PlannedMove, distance)
+        exhausted = False
+        success = True
+        completed = 0
+        point_index = 0
+
+        while True:
+            # Plan the next move while the robot is busy with the current one
+            if not ready and not exhausted:
+                point = next(points, None)
+                if point is None:
+                    exhausted = True
+                else:
+                    point_index += 1
+                    x, y, z, phi, gripper_open = point[:5]
+                    wait = point[5] if len(point) > 5 else None
+                    linear = point[6] if len(point) > 6 else False
+                    if linear:
+                        moves = plan_line(x, y, planned_angles, z, phi, gripper_open, wait, self.profile)
+                    else:
+                        move = plan_move(x, y, planned_angles, z, phi, gripper_open, wait, self.profile)
+                        moves = None if move is None else [move]
+                    if moves is None:
+                        log.warning("❌ IK failed for point %d - stopping sequence", point_index)
+                        success = False
+                        exhausted = True
+                    else:
+                        distance = ((x - prev_xy[0])**2 + (y - prev_xy[1])**2) ** 0.5
+                        ready.extend((move, distance) for move in moves)
+                        planned_angles = moves[-1].target_angles
+                        prev_xy = (x, y)
+
+            can_send = bool(ready) and len(in_flight) < self.depth
+            if can_send and in_flight:
+                _, last_move, last_distance = in_flight[-1]
+                if last_move.wait.needs_rest(last_move, last_distance):
+                    can_send = False  # Robot must be at rest first
+                else:
+                    # Stream the next frame as soon as the controller has taken the last one
+                    try:
+                        in_flight[-1][0].acked.result(self.timeout)
+                    except (FutureTimeout, ProtocolError):
+                        can_send = False
+
+            if can_send:
+                move, distance = ready.popleft()
+                in_flight.append((self.transport.send(move.frame), move, distance))
+                continue
+
+            if not in_flight:
+                break
+
+            # Wait for the oldest move to finish
+            command, move, distance = in_flight[0]
+            try:
+                command.done.result(self.timeout)
+            except (FutureTimeout, ProtocolError) as e:
+                log.error("⚠️ Move %d failed: %s", completed + 1, e or 'no response from Arduino')
+                return False, current_angles, completed
+            in_flight.popleft()
+            current_angles = move.target_angles
+            completed += 1
+
+            dwell = 0.0
+            if move.wait.needs_rest(move, distance):
+                started_at = command.acked_at or command.sent_at
+                dwell = move.wait.wait(move, distance, started_at, command.done_at, self.firmware)
+            if telemetry is not None:
+                telemetry.record(move.wait.name, planned_duration(move, self.firmware), command.sent_at,
+                                 command.acked_at, command.done_at, dwell)
+
+        return success, current_angles, completed
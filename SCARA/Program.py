@@ -0,0 +1,128 @@
+# -------------------------
+# PROGRAM MODE (BATCHED UPLOAD)
+# -------------------------
+
+# A whole sequence is planned up front and uploaded in one burst. The
+# controller stores it, runs it on its own (including the dwell after every
+# move) and reports each move with a status frame, so there is no host round
+# trip between moves and the host is free to prepare the next cycle (vision,
+# IK) while the robot runs.
+#
+# Dwells come from the wait policies, evaluated on the host at planning time.
+# Settle checks cannot run on the controller and velocity profiles are not
+# part of a program: use the MotionQueue for those.
+
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from . import Protocol as proto
+from . import Trajectory as traj
+from .MotionQueue import plan_move, plan_line
+from .Transport import ProtocolError
+from .WaitPolicy import planned_duration, reported_duration
+from .Diagnostics import get_logger
+
+log = get_logger("motion")
+
+
+def plan_program(points, current_angles, firmware="master"):
+    """
+    Plan a sequence of points given as in MotionQueue.run, with the dwells
+    for the fixed axis speeds of the given controller firmware
+    Returns (moves, dwells_ms) or None if IK failed for a point
+    """
+    moves, dwells_ms = [], []
+    prev_xy = traj.tip_position(current_angles[0], current_angles[1])
+    for index, point in enumerate(points, 1):
+        x, y, z, phi, gripper_open = point[:5]
+        wait = point[5] if len(point) > 5 else None
+        linear = point[6] if len(point) > 6 else False
+        if linear:
+            planned = plan_line(x, y, current_angles, z, phi, gripper_open, wait)
+        else:
+            move = plan_move(x, y, current_angles, z, phi, gripper_open, wait)
+            planned = None if move is None else [move]
+        if planned is None:
+            log.warning("❌ IK failed for point %d - program not uploaded", index)
+            return None
+
+        distance = ((x - prev_xy[0])**2 + (y - prev_xy[1])**2) ** 0.5
+        for move in planned:
+            # The controller reports the move done after about this long
+            dwell = move.wait.remaining(move, distance, 0.0, reported_duration(move, firmware), firmware)
+            moves.append(move)
+            dwells_ms.append(int(round(dwell * 1000)))
+        current_angles = planned[-1].target_angles
+        prev_xy = (x, y)
+    return moves, dwells_ms
+
+
+class RunningProgram:
+    """A program executing on the controller"""
+
+    def __init__(self, transport, moves, dwells_ms, start_angles, timeout=5, firmware="master"):
+        self.transport = transport
+        self.moves = moves
+        self.dwells_ms = dwells_ms
+        self.start_angles = start_angles
+        self.timeout = timeout      # Per move, on top of its dwell
+        self.firmware = firmware
+        self.commands = []
+        self._upload()
+
+    def _upload(self):
+        # Longer programs are uploaded in chunks, each once the previous one is done
+        start = len(self.commands)
+        end = min(len(self.moves), start + proto.MAX_PROGRAM_MOVES)
+        frames = [move.frame for move in self.moves[start:end]]
+        self.commands += self.transport.send_program(frames, self.dwells_ms[start:end])
+
+    def completed(self):
+        """Number of moves the controller has reported done so far"""
+        return sum(1 for command in self.commands
+                   if command.done.done() and not command.done.exception())
+
+    def done(self):
+        return len(self.commands) == len(self.moves) and all(c.done.done() for c in self.commands)
+
+    def wait(self, telemetry=None):
+        """
+        Block until the program has finished
+        Per-move timing is recorded into `telemetry` (CycleTelemetry) if given
+        Returns (success, current_angles, completed)
+        """
+        current_angles = self.start_angles
+        due_at = None
+        for index, move in enumerate(self.moves):
+            if index == len(self.commands):
+                self._upload()
+                due_at = None
+            command = self.commands[index]
+            dwell = self.dwells_ms[index] / 1000
+            # The controller only starts this move after the previous dwell
+            previous_dwell = self.dwells_ms[index - 1] / 1000 if index else 0.0
+            try:
+                command.done.result(self.timeout + previous_dwell)
+            except (FutureTimeout, ProtocolError) as e:
+                log.error("⚠️ Program move %d failed: %s", index + 1, e or 'no response from Arduino')
+                return False, current_angles, index
+            current_angles = move.target_angles
+
+            if telemetry is not None:
+                # A move is due once the previous one has finished its dwell
+                started_at = command.sent_at if due_at is None else min(due_at, command.acked_at)
+                telemetry.record(move.wait.name, planned_duration(move, self.firmware), started_at,
+                                 command.acked_at, command.done_at, dwell)
+            due_at = command.done_at + dwell
+        return True, current_angles, len(self.moves)
+
+
+def start_program(transport, points, current_angles, timeout=5, firmware="master"):
+    """
+    Plan and upload a sequence without waiting for it to run
+    Returns a RunningProgram or None if planning failed
+    """
+    planned = plan_program(points, current_angles, firmware)
+    if planned is None:
+        return None
+    moves, dwells_ms = planned
+    return RunningProgram(transport, moves, dwells_ms, current_angles, timeout, firmware)
@@ -0,0 +1,213 @@
+# -------------------------
+# SERIAL PROTOCOL (host <-> controller)
+# -------------------------
+
+import struct
+from collections import namedtuple
+
+# Motion command: header + 3 pulse counts (32-bit) + 3 directions + 2 servo values
+MOTION_HEADER = b'\x01'
+MOTION_FORMAT = '>iiiBBBBB'
+MOTION_FRAME_SIZE = len(MOTION_HEADER) + struct.calcsize(MOTION_FORMAT)  # 18 bytes
+
+# Velocity profile for the next motion frame (AllNano.ino only):
+# header + segment count + n x (steps, start interval us, end interval us)
+PROFILE_HEADER = b'\x03'
+PROFILE_SEGMENT_FORMAT = '>IHH'
+PROFILE_SEGMENT_SIZE = struct.calcsize(PROFILE_SEGMENT_FORMAT)
+# A profile and its motion frame must fit the 64-byte RX buffer together: 2 + 5*8 + 18 = 60
+MAX_PROFILE_SEGMENTS = 5
+
+# Sequenced motion command: header + sequence number + motion payload + checksum
+# The controller answers it with binary status frames instead of text lines
+SEQ_MOTION_HEADER = b'\x11'
+SEQ_MOTION_FRAME_SIZE = len(SEQ_MOTION_HEADER) + 1 + struct.calcsize(MOTION_FORMAT) + 1  # 20 bytes
+
+# Readiness probe: a single byte the controllers answer with READY_LINE at
+# once, without touching the motion state
+PING_FRAME = b'\x05'
+READY_LINE = "READY"
+
+# Status frame (controller -> host):
+# sync + sequence number + status code + executed steps per axis + checksum
+STATUS_SYNC = b'\xA5'
+STATUS_FORMAT = '>BBiii'
+STATUS_FRAME_SIZE = len(STATUS_SYNC) + struct.calcsize(STATUS_FORMAT) + 1  # 16 bytes
+
+STATUS_ACCEPTED = 0x01      # Frame received and valid, move starting
+STATUS_DONE = 0x02          # Move finished
+STATUS_FAULT = 0x03         # Move finished, but an axis did not execute (I2C failure)
+STATUS_BAD_CHECKSUM = 0x10  # Frame corrupted: it and everything queued behind it were dropped
+STATUS_SYNC_ERROR = 0x11    # Unknown header: receive buffer flushed
+STATUS_PROGRAM_TOO_LONG = 0x12  # Program has more moves than the controller can store
+
+STATUS_NAMES = {
+    STATUS_ACCEPTED: "ACCEPTED",
+    STATUS_DONE: "DONE",
+    STATUS_FAULT: "FAULT",
+    STATUS_BAD_CHECKSUM: "BAD_CHECKSUM",
+    STATUS_SYNC_ERROR: "SYNC_ERROR",
+    STATUS_PROGRAM_TOO_LONG: "PROGRAM_TOO_LONG",
+}
+
+# Statuses after which the controller has discarded everything it had buffered
+FLUSH_STATUSES = (STATUS_BAD_CHECKSUM, STATUS_SYNC_ERROR, STATUS_PROGRAM_TOO_LONG)
+
+# Program upload: header + base sequence number + move count
+# + n x (motion payload + dwell ms after the move) + checksum
+# The controller stores the whole program, then runs it and reports every
+# move with status frames numbered base, base + 1, ...
+PROGRAM_HEADER = b'\x21'
+PROGRAM_MOVE_FORMAT = MOTION_FORMAT + 'H'
+PROGRAM_MOVE_SIZE = struct.calcsize(PROGRAM_MOVE_FORMAT)  # 19 bytes
+MAX_PROGRAM_MOVES = 16  # Program storage in the controller RAM
+
+StatusFrame = namedtuple("StatusFrame", "seq status steps1 steps2 steps3")
+
+# Text replies of the controllers
+# MasterArduino.ino: "ACK: Data Received" ... "DONE"
+# AllNano.ino:       "Command Received"   ... "Movement Done"
+ACK_MARKERS = ("ACK", "Command Received")
+DONE_MARKERS = ("Movement Done", "DONE")
+ERROR_MARKERS = ("SYNC ERROR",)
+
+
+def pack_motion_frame(pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2):
+    """Build the 18-byte motion frame expected by the controller"""
+    # Convert direction values to 0 or 1
+    dir1 = 1 if dir1 else 0
+    dir2 = 1 if dir2 else 0
+    dir3 = 1 if dir3 else 0
+    return MOTION_HEADER + struct.pack(MOTION_FORMAT, pulses1, pulses2, pulses3,
+                                       dir1, dir2, dir3, servo1, servo2)
+
+
+def unpack_motion_frame(frame):
+    """
+    Decode a motion frame the way the firmware reads it
+    Returns (pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2)
+    """
+    if len(frame) != MOTION_FRAME_SIZE or frame[:1] != MOTION_HEADER:
+        raise ValueError("Not a motion frame: {!r}".format(bytes(frame)))
+    pulses1, pulses2, pulses3, dir1, dir2, dir3, servo1, servo2 = struct.unpack(MOTION_FORMAT, frame[1:])
+    return pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2
+
+
+def pack_profile_frame(segments):
+    """Build a profile frame from (steps, start_interval_us, end_interval_us) segments"""
+    if len(segments) > MAX_PROFILE_SEGMENTS:
+        raise ValueError(f"At most {MAX_PROFILE_SEGMENTS} profile segments fit in one frame")
+    frame = PROFILE_HEADER + struct.pack('>B', len(segments))
+    for steps, start_interval, end_interval in segments:
+        frame += struct.pack(PROFILE_SEGMENT_FORMAT, steps, start_interval, end_interval)
+    return frame
+
+
+def unpack_profile_frame(frame):
+    """Decode a profile frame into a list of (steps, start_interval_us, end_interval_us)"""
+    if frame[:1] != PROFILE_HEADER:
+        raise ValueError("Not a profile frame: {!r}".format(bytes(frame)))
+    count = frame[1]
+    if len(frame) != 2 + count * PROFILE_SEGMENT_SIZE:
+        raise ValueError("Truncated profile frame")
+    return [struct.unpack_from(PROFILE_SEGMENT_FORMAT, frame, 2 + i * PROFILE_SEGMENT_SIZE)
+            for i in range(count)]
+
+
+def is_ack(line):
+    return any(marker in line for marker in ACK_MARKERS)
+
+
+def is_done(line):
+    return any(marker in line for marker in DONE_MARKERS)
+
+
+def is_error(line):
+    return any(marker in line for marker in ERROR_MARKERS)
+
+
+def checksum(data):
+    """XOR of all bytes, as computed by the firmware"""
+    value = 0
+    for byte in data:
+        value ^= byte
+    return value
+
+
+def sequence_frame(frame, seq):
+    """
+    Turn a frame ending in a motion frame (optionally preceded by a profile
+    frame) into the same frame with a sequenced, checksummed motion command
+    """
+    prefix, motion = frame[:-MOTION_FRAME_SIZE], frame[-MOTION_FRAME_SIZE:]
+    if motion[:1] != MOTION_HEADER:
+        raise ValueError("Frame does not end in a motion frame: {!r}".format(bytes(frame)))
+    body = struct.pack('>B', seq & 0xFF) + motion[1:]
+    return prefix + SEQ_MOTION_HEADER + body + struct.pack('>B', checksum(body))
+
+
+def unpack_sequenced_frame(frame):
+    """
+    Decode a sequenced motion frame the way the firmware reads it
+    Returns (seq, (pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2))
+    """
+    if len(frame) != SEQ_MOTION_FRAME_SIZE or frame[:1] != SEQ_MOTION_HEADER:
+        raise ValueError("Not a sequenced motion frame: {!r}".format(bytes(frame)))
+    if checksum(frame[1:-1]) != frame[-1]:
+        raise ValueError("Bad checksum")
+    return frame[1], unpack_motion_frame(MOTION_HEADER + frame[2:-1])
+
+
+def pack_program_frame(base_seq, frames, dwells_ms):
+    """
+    Build a program upload from motion frames (pack_motion_frame output) and
+    the dwell in ms the controller waits after each of them
+    """
+    if not 0 < len(frames) <= MAX_PROGRAM_MOVES:
+        raise ValueError(f"A program holds 1 to {MAX_PROGRAM_MOVES} moves")
+    body = struct.pack('>BB', base_seq & 0xFF, len(frames))
+    for frame, dwell_ms in zip(frames, dwells_ms):
+        if len(frame) != MOTION_FRAME_SIZE or frame[:1] != MOTION_HEADER:
+            raise ValueError("Not a motion frame: {!r}".format(bytes(frame)))
+        body += frame[1:] + struct.pack('>H', min(0xFFFF, max(0, int(dwell_ms))))
+    return PROGRAM_HEADER + body + struct.pack('>B', checksum(body))
+
+
+def program_frame_size(count):
+    return len(PROGRAM_HEADER) + 2 + count * PROGRAM_MOVE_SIZE + 1
+
+
+def unpack_program_frame(frame):
+    """
+    Decode a program upload the way the firmware reads it
+    Returns (base_seq, [(pulses1, dir1, ..., servo2, dwell_ms), ...])
+    """
+    if frame[:1] != PROGRAM_HEADER or len(frame) < 3 or len(frame) != program_frame_size(frame[2]):
+        raise ValueError("Not a program frame: {!r}".format(bytes(frame)))
+    if checksum(frame[1:-1]) != frame[-1]:
+        raise ValueError("Bad checksum")
+    moves = []
+    for i in range(frame[2]):
+        offset = 3 + i * PROGRAM_MOVE_SIZE
+        record = frame[offset:offset + PROGRAM_MOVE_SIZE]
+        moves.append(unpack_motion_frame(MOTION_HEADER + record[:-2]) + struct.unpack('>H', record[-2:]))
+    return frame[1], moves
+
+
+def pack_status_frame(seq, status, steps1=0, steps2=0, steps3=0):
+    """Build a status frame (used by the simulator)"""
+    body = struct.pack(STATUS_FORMAT, seq & 0xFF, status, steps1, steps2, steps3)
+    return STATUS_SYNC + body + struct.pack('>B', checksum(body))
+
+
+def unpack_status_frame(frame):
+    """Decode a status frame into a StatusFrame, raising ValueError if it is corrupted"""
+    if len(frame) != STATUS_FRAME_SIZE or frame[:1] != STATUS_SYNC:
+        raise ValueError("Not a status frame: {!r}".format(bytes(frame)))
+    if checksum(frame[1:-1]) != frame[-1]:
+        raise ValueError("Bad status checksum")
+    return StatusFrame(*struct.unpack(STATUS_FORMAT, frame[1:-1]))
+
+
+def status_name(status):
+    return STATUS_NAMES.get(status, f"0x{status:02X}")
@@ -0,0 +1,149 @@
+# -------------------------
+# PERSISTENT ROUTE CACHE
+# -------------------------
+
+# Production cycles repeat the same legs (same place slots, same rest point),
+# and every leg used to be planned from scratch: IK, branch selection, step
+# deltas, frame packing and the velocity profile. The route cache keeps the
+# PlannedMove of every leg, keyed on the quantized start joint angles and the
+# quantized goal (x, y, z, phi) plus gripper state and profile, so a repeated
+# leg goes straight to transmission.
+#
+# The cache is saved next to this file and loaded on first use. It carries a
+# hash of the calibration it was planned with (InverseKinematics constants,
+# motor limits, coupling ratio, IK cache quantum and axis limits): any change
+# of those discards it, on disk and in memory.
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+from . import InverseKinematics as IK
+from . import Utilities as utl
+from . import Trajectory as traj
+from .Diagnostics import get_logger
+
+log = get_logger("motion")
+
+CACHE_VERSION = 1
+ROUTE_CACHE_SIZE = 4096   # Max number of legs kept
+ROUTE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "route_cache.pkl")
+
+ANGLE_QUANTUM = 1e-6      # rad, start joint angles
+PHI_QUANTUM = 1e-3        # degrees
+Z_QUANTUM = 1e-3          # mm
+
+
+def calibration():
+    """Everything a planned leg depends on besides its start and goal"""
+    return (CACHE_VERSION, IK.L1, IK.L2, IK.STEPS_PER_REV, IK.MICROSTEPS, IK.GEAR_RATIO,
+            tuple(IK.STEP_SIGN), tuple(IK.HOME_OFFSETS), IK.STEPS_PER_REV_Z,
+            utl.MOTOR1_ABS_MIN, utl.MOTOR1_ABS_MAX, utl.MOTOR2_ABS_MIN, utl.MOTOR2_ABS_MAX,
+            utl.COUPLING_RATIO, utl.ik_cache.quantum, tuple(sorted(traj.AXIS_LIMITS.items())))
+
+
+def calibration_key(values=None):
+    return hashlib.sha1(repr(values or calibration()).encode()).hexdigest()
+
+
+class RouteCache:
+    """Bounded LRU of PlannedMoves (stored without their wait policy)"""
+
+    def __init__(self, maxsize=ROUTE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False        # Changed since loaded / saved
+        self._entries = OrderedDict()
+        self._calibration = calibration()
+
+    @staticmethod
+    def key(current_angles, x, y, z, phi, gripper_open, profile):
+        quantum = utl.ik_cache.quantum
+        return (tuple(round(a / ANGLE_QUANTUM) for a in current_angles[:3]), round(current_angles[3] / Z_QUANTUM),
+                round(x / quantum), round(y / quantum), round(z / Z_QUANTUM), round(phi / PHI_QUANTUM),
+                bool(gripper_open), profile)
+
+    def check_calibration(self):
+        """Drop every leg if the calibration changed since they were planned"""
+        current = calibration()
+        if current != self._calibration:
+            if self._entries:
+                log.info("Calibration changed - route cache cleared (%d legs)", len(self._entries))
+            self._entries.clear()
+            self._calibration = current
+            self.dirty = True
+
+    def get(self, key):
+        move = self._entries.get(key)
+        if move is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return move
+
+    def put(self, key, move):
+        self._entries[key] = move._replace(wait=None)
+        self.dirty = True
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.dirty = True
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._entries), "maxsize": self.maxsize}
+
+    # ---- persistence ----
+
+    def save(self, path=ROUTE_CACHE_FILE):
+        data = {"key": calibration_key(self._calibration), "routes": list(self._entries.items())}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def load(self, path=ROUTE_CACHE_FILE):
+        """Load the legs saved at `path` if they match the current calibration"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+            log.warning("⚠️ Ignoring unreadable route cache: %s", e)
+            return False
+        self.check_calibration()
+        if data.get("key") != calibration_key(self._calibration):
+            log.info("Route cache on disk was planned with another calibration - ignored")
+            self.dirty = True  # Overwrite it on the next save
+            return False
+        for key, move in data["routes"][-self.maxsize:]:
+            self._entries[key] = move
+        log.debug("Loaded %d cached routes", len(data["routes"]))
+        return True
+
+
+_cache = None
+
+
+def get_route_cache(cache_file=ROUTE_CACHE_FILE):
+    """The shared route cache, loaded from `cache_file` on first use"""
+    global _cache
+    if _cache is None:
+        _cache = RouteCache()
+        if cache_file:
+            _cache.load(cache_file)
+    _cache.check_calibration()
+    return _cache
+
+
+def save_route_cache(cache_file=ROUTE_CACHE_FILE):
+    """Write the shared cache to disk if it changed (no-op if it was never used)"""
+    if _cache is not None and _cache.dirty and cache_file:
+        _cache.save(cache_file)
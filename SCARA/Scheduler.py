@@ -0,0 +1,195 @@
+# -------------------------
+# PICK-ORDER SCHEDULER
+# -------------------------
+
+# Orders a batch of picks (and assigns them place slots) to minimize the arm
+# travel time of the whole run instead of handling objects one at a time.
+#
+# Cost model: every pick, slot and the rest point is solved once with the IK
+# (from the start pose), converted to absolute motor steps, and the time of a
+# leg is the step count of the slowest motor at its fixed firmware rate (as
+# Trajectory.estimate_duration). All pairwise leg costs are computed in one
+# numpy pass and cached in a CostModel, so the heuristics only index arrays.
+# A leg whose coupling compensation is out of range goes through the rest
+# point instead; otherwise the rest point is only visited at the end.
+#
+# Heuristic: nearest-neighbour construction (next closest pick, then its
+# closest free slot), improved by 2-opt on the job order and, with free
+# slots, by swapping the slots of two jobs until nothing improves.
+
+from collections import namedtuple
+
+import numpy as np
+from . import InverseKinematics as IK
+from . import Utilities as utl
+from . import Trajectory as traj
+
+MAX_PASSES = 50  # Improvement passes (each tries every 2-opt move / slot swap once)
+
+# jobs:          (pick index, slot index) in execution order
+# rest_before:   per job, True if the rest point is visited before its pick
+# cost:          estimated travel time (s) of the plan, ending at the rest point
+# naive_cost:    same for the input order with a rest visit after every cycle
+# unreachable:   pick indices left out because the IK has no valid solution
+BatchPlan = namedtuple("BatchPlan", "jobs rest_before cost naive_cost unreachable")
+
+
+def solve_nodes(points, start_angles):
+    """
+    Joint angles (theta1, theta2) of (x, y) points, the branch chosen as for a
+    move from start_angles (absolute limits only if the coupling blocks it)
+    Returns (angles (N,2), valid (N,))
+    """
+    angles = np.zeros((len(points), 2))
+    valid = np.zeros(len(points), dtype=bool)
+    for i, point in enumerate(points):
+        result = utl.solve_ik(point[0], point[1], start_angles)
+        if result.branch is None and result.reason != utl.IK_UNREACHABLE:
+            result = utl.solve_ik(point[0], point[1])
+        if result.branch is not None:
+            angles[i] = result.theta1, result.theta2
+            valid[i] = True
+    return angles, valid
+
+
+class CostModel:
+    """Pairwise leg times (s) between joint poses, computed once"""
+
+    def __init__(self, angles, limits=traj.AXIS_LIMITS):
+        angles = np.asarray(angles, dtype=float)
+        steps = IK.angles_to_steps_batch(np.column_stack((angles, np.zeros(len(angles)))))
+        rate1, rate2 = limits["M1"][2], limits["M2"][2]
+        s1 = steps[:, 0].astype(np.int64)
+        s2 = steps[:, 2].astype(np.int64)
+        self.cost = np.maximum(np.abs(s1[None, :] - s1[:, None]) / rate1,
+                               np.abs(s2[None, :] - s2[:, None]) / rate2)
+
+        # Coupling compensation of the motor2 command for every leg (as utl.branch_reason)
+        deg = np.degrees(angles)
+        command = ((deg[None, :, 1] - deg[:, None, 1])
+                   + (deg[None, :, 0] - deg[:, None, 0]) * utl.COUPLING_RATIO)
+        self.feasible = np.abs(command) <= utl.MOTOR2_ABS_MAX
+
+
+class _Batch:
+    """Index bookkeeping: node 0 = start, 1 = rest, then picks, then slots"""
+
+    def __init__(self, model, n_picks, n_slots, rest_between):
+        self.model = model
+        self.picks = np.arange(2, 2 + n_picks)
+        self.slots = np.arange(2 + n_picks, 2 + n_picks + n_slots)
+        cost = model.cost
+
+        # Job cost: pick -> slot
+        self.carry = cost[np.ix_(self.picks, self.slots)]
+        # Transfer cost: slot -> next pick, directly or through the rest point
+        via_rest = cost[self.slots, 1][:, None] + cost[1, self.picks][None, :]
+        legs = np.ix_(self.slots, self.picks)
+        direct = np.where(model.feasible[legs], cost[legs], np.inf)
+        self.through_rest = np.ones_like(direct, dtype=bool) if rest_between else direct > via_rest
+        self.transfer = np.where(self.through_rest, via_rest, direct)
+        # From the start pose to the first pick (through the rest point if blocked)
+        self.first = np.where(model.feasible[0, self.picks], cost[0, self.picks],
+                              cost[0, 1] + cost[1, self.picks])
+        self.last = cost[self.slots, 1]
+
+    def cost(self, jobs):
+        if not jobs:
+            return 0.0
+        total = self.first[jobs[0][0]] + self.last[jobs[-1][1]]
+        for k, (p, s) in enumerate(jobs):
+            total += self.carry[p, s]
+            if k + 1 < len(jobs):
+                total += self.transfer[s, jobs[k + 1][0]]
+        return float(total)
+
+
+def nearest_neighbor(batch, picks, slots, fixed_slots):
+    """Greedy jobs: closest pick from where the arm is, then its closest free slot"""
+    remaining = list(picks)
+    free = list(slots)
+    jobs = []
+    while remaining:
+        if jobs:
+            reach = batch.transfer[jobs[-1][1], remaining]
+        else:
+            reach = batch.first[remaining]
+        p = remaining.pop(int(np.argmin(reach)))
+        if fixed_slots:
+            s = p
+        else:
+            s = free.pop(int(np.argmin(batch.carry[p, free])))
+        jobs.append((p, s))
+    return jobs
+
+
+def two_opt(batch, jobs, fixed_slots, max_passes=MAX_PASSES):
+    """Improve jobs by reversing sub-sequences and (with free slots) swapping slots"""
+    best = batch.cost(jobs)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(len(jobs) - 1):
+            for j in range(i + 1, len(jobs)):
+                candidate = jobs[:i] + jobs[i:j + 1][::-1] + jobs[j + 1:]
+                cost = batch.cost(candidate)
+                if cost < best - 1e-12:
+                    jobs, best, improved = candidate, cost, True
+                if not fixed_slots:
+                    candidate = list(jobs)
+                    (pi, si), (pj, sj) = jobs[i], jobs[j]
+                    candidate[i], candidate[j] = (pi, sj), (pj, si)
+                    cost = batch.cost(candidate)
+                    if cost < best - 1e-12:
+                        jobs, best, improved = candidate, cost, True
+        if not improved:
+            break
+    return jobs, best
+
+
+def plan_batch(picks, slots, start_angles=(0, 0, 0, 0), rest_point=(0.15, -0.15), fixed_slots=False,
+               rest_between=False, improve=True):
+    """
+    Order N picks and assign them place slots to minimize travel time
+    picks: (x, y[, phi]) per object; slots: (x, y) per place location
+    (at least as many as reachable picks; with fixed_slots pick i goes to slot i)
+    Returns a BatchPlan whose indices refer to the input lists
+    """
+    if fixed_slots and len(slots) < len(picks):
+        raise ValueError(f"fixed_slots needs a slot per pick ({len(slots)} slots for {len(picks)} picks)")
+
+    targets = [rest_point] + [p[:2] for p in picks] + [s[:2] for s in slots]
+    angles, valid = solve_nodes(targets, start_angles)
+    angles = np.vstack((np.asarray(start_angles[:2], dtype=float), angles))
+    valid = np.concatenate(([True], valid))
+    if not valid[1]:
+        raise ValueError(f"Rest point {rest_point} is out of reach")
+
+    n_picks = len(picks)
+    pick_ok = valid[2:2 + n_picks]
+    slot_ok = valid[2 + n_picks:]
+    picks_left = [i for i in range(n_picks) if pick_ok[i] and (not fixed_slots or slot_ok[i])]
+    slots_left = [j for j in range(len(slots)) if slot_ok[j]]
+    if not fixed_slots and len(slots_left) < len(picks_left):
+        raise ValueError(f"{len(slots_left)} reachable slots for {len(picks_left)} reachable picks")
+    unreachable = [i for i in range(n_picks) if i not in picks_left]
+
+    batch = _Batch(CostModel(angles), n_picks, len(slots), rest_between)
+
+    # Reference: input order, slot i (or the next free one) for pick i, rest after every cycle
+    naive_jobs = list(zip(picks_left, picks_left if fixed_slots else slots_left))
+    naive_cost = 0.0
+    for k, (p, s) in enumerate(naive_jobs):
+        naive_cost += (batch.first[p] if k == 0 else batch.model.cost[1, batch.picks[p]])
+        naive_cost += batch.carry[p, s] + batch.last[s]
+
+    jobs = nearest_neighbor(batch, picks_left, slots_left, fixed_slots)
+    cost = batch.cost(jobs)
+    if improve:
+        jobs, cost = two_opt(batch, jobs, fixed_slots)
+
+    rest_before = [False] * len(jobs)
+    if jobs and not batch.model.feasible[0, batch.picks[jobs[0][0]]]:
+        rest_before[0] = True
+    for k in range(1, len(jobs)):
+        rest_before[k] = bool(batch.through_rest[jobs[k - 1][1], jobs[k][0]])
+    return BatchPlan(jobs, rest_before, cost, float(naive_cost), unreachable)
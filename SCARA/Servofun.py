@@ -1,15 +1,19 @@
-import InverseKinematics as IK
-import serial
 import struct
 import time
-import math
-import Utilities as utl
+from concurrent.futures import TimeoutError as FutureTimeout
 
-def send_servo_command(servo1_angle=None, servo2_angle=None):
+from .Transport import ProtocolError
+
+SERVO_REPLY_TIMEOUT = 0.5  # s to collect the replies of a servo command
+
+def send_servo_command(robot, servo1_angle=None, servo2_angle=None, timeout=SERVO_REPLY_TIMEOUT):
     """
-    Send servo commands to Arduino 3
+    Send servo commands to Arduino 3 through the transport of `robot` (RobotController)
     Angles should be between 0-180, or None to skip
+    The packet is queued behind the frames in flight and its replies come
+    from the transport's reader like any other command
     """
+    transport = robot.transport
     try:
         # Create command packet for servos
         # Use a different command byte (0x02 for servos)
@@ -26,35 +30,37 @@ def send_servo_command(servo1_angle=None, servo2_angle=None):
         else:
             command += b'\xFF'  # No change marker
         
-        ser.write(command)
+        pending = transport.send(command, sequenced=False)
         
         print(f"Sent servo command: Servo1={servo1_angle}, Servo2={servo2_angle}")
         
-        # Read responses
-        time.sleep(0.5)
-        responses = []
-        while ser.in_waiting > 0:
-            msg = ser.readline().decode().strip()
-            if msg:
-                print(f"Arduino: {msg}")
-                responses.append(msg)
+        # Read responses: the servo board does not report completion, so take
+        # what arrived within the timeout and stop waiting for more
+        try:
+            responses = pending.done.result(timeout)
+        except FutureTimeout:
+            responses = transport.discard(pending)
+        for msg in responses:
+            print(f"Arduino: {msg}")
         
         return responses
         
-    except Exception as e:
+    except (ProtocolError, OSError) as e:
         print(f"Error sending servo command: {e}")
         return []
 
-def move_with_servo(x, y, current_angles, phi_desired=0.0, servo1_angle=None, servo2_angle=None):
+def move_with_servo(robot, x, y, phi_desired=0.0, servo1_angle=None, servo2_angle=None):
     """
     Move to point and control servos simultaneously
+    Returns (success, joint angles after the move)
     """
     # First move the SCARA robot
-    success, new_angles = move_to_point(x, y, current_angles, phi_desired, auto_home=False)
+    success = robot.move_to_point(x, y, 0, phi_desired, auto_home=False)
+    new_angles = robot.current_angles
     
     # Then control servos if specified
     if success and (servo1_angle is not None or servo2_angle is not None):
-        servo_responses = send_servo_command(servo1_angle, servo2_angle)
+        servo_responses = send_servo_command(robot, servo1_angle, servo2_angle)
         if servo_responses:
             print("✅ Servo movement completed")
         else:
@@ -63,9 +69,11 @@ def move_with_servo(x, y, current_angles, phi_desired=0.0, servo1_angle=None, se
     return success, new_angles
 
 # Example usage in your main test:
-def test_with_servos():
+def test_with_servos(robot=None):
     """Test sequence with servo movements"""
-    current_angles = (0, 0, 0)
+    if robot is None:
+        from .Controller import RobotController
+        robot = RobotController()
     
     test_sequence = [
         # (x, y, phi, servo1_angle, servo2_angle)
@@ -77,7 +85,7 @@ def test_with_servos():
     
     for x, y, phi, s1, s2 in test_sequence:
         print(f"\n🎯 Moving to ({x}, {y}) with servos: {s1}°, {s2}°")
-        success, current_angles = move_with_servo(x, y, current_angles, phi, s1, s2)
+        success, current_angles = move_with_servo(robot, x, y, phi, s1, s2)
         
         if success:
             print("✅ Movement with servos completed")
@@ -86,5 +94,6 @@ def test_with_servos():
         
         time.sleep(2)
 
-# Uncomment to test:
-test_with_servos()
\ No newline at end of file
+# Run with: python -m SCARA.Servofun
+if __name__ == "__main__":
+    test_with_servos()
\ No newline at end of file
@@ -0,0 +1,386 @@
+# -------------------------
+# HARDWARE-FREE CONTROLLER SIMULATOR
+# -------------------------
+
+# SimulatedSerial is a drop-in replacement for serial.Serial that behaves like
+# the controller firmware: it decodes the same 0x01-prefixed 18-byte frames,
+# replies with the same text lines and takes as long as the real step loops.
+#
+#   "master": MasterArduino.ino, M1 stepped locally at 800us high + 800us low,
+#             Z/servos handed to slave 3 over I2C (not waited for). Slave 3
+#             (ArduinoSlave3.ino) steps Z at the same rate on its own timeline
+#             and has a single command slot: a frame arriving while Z is
+#             moving waits there and replaces any frame already waiting
+#             (recorded in `clobbered`)
+#   "nano":   AllNano.ino, all three axes interpolated together, optional
+#             0x03 velocity profile for the next move
+#
+# Both flavours also accept 0x11 sequenced frames and 0x21 program uploads and
+# answer them with binary status frames instead of text.
+#
+# Run `python -m SCARA.Simulator [master|nano]` to expose the simulator on a
+# pseudo-terminal, so unmodified scripts can open it like a real port.
+
+import os
+import sys
+import threading
+import time
+
+from . import Protocol as proto
+
+ARDUINO_RX_BUFFER = 64   # Bytes; anything beyond is dropped by the Arduino core
+STEP_DELAY_US = 800      # delayMicroseconds(800) per half step
+DIR_SETTLE_MS = 10       # delay(10) after setting DIR on the master
+NANO_SERVO_DELAY_MS = 200
+NANO_Z_ONLY_DELAY_US = 200
+NANO_PULSE_US = 10
+
+FIRMWARE_BANNERS = {
+    "master": "=== MASTER ONLINE ===",
+    "nano": "=== SINGLE NANO CONTROLLER READY ===",
+}
+
+
+def slave3_duration(pulses3):
+    """Seconds slave 3 spends stepping Z for one frame"""
+    return pulses3 * 2 * STEP_DELAY_US / 1e6
+
+
+def move_duration(pulses1, pulses2, pulses3, firmware="master", profile=None):
+    """Seconds the firmware spends executing one motion frame"""
+    if firmware == "master":
+        # Only M1 blocks the master loop (Z runs on slave 3, see slave3_duration)
+        if pulses1 == 0:
+            return 0.0
+        return DIR_SETTLE_MS / 1000 + pulses1 * 2 * STEP_DELAY_US / 1e6
+
+    max_steps = max(pulses1, pulses2, pulses3)
+    duration = NANO_SERVO_DELAY_MS / 1000
+    if max_steps > 0:
+        step_delay = NANO_Z_ONLY_DELAY_US if pulses1 == 0 and pulses2 == 0 else STEP_DELAY_US
+        # Profile segments pace the first steps, the fixed delay the rest
+        remaining = max_steps
+        for steps, start_interval, end_interval in profile or ():
+            steps = min(steps, remaining)
+            duration += steps * (start_interval + end_interval) / 2 / 1e6
+            remaining -= steps
+        duration += remaining * (step_delay + NANO_PULSE_US) / 1e6
+    return duration
+
+
+class SimulatedSerial:
+    """pyserial-compatible simulated controller"""
+
+    def __init__(self, port="SIM", baudrate=115200, timeout=1, firmware="master", time_scale=1.0):
+        if firmware not in FIRMWARE_BANNERS:
+            raise ValueError(f"Unknown firmware '{firmware}'")
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.firmware = firmware
+        self.time_scale = time_scale   # 1.0 = real time, 0 = instantaneous
+
+        # Statistics for benchmarks
+        self.executed = []      # Decoded frames, in execution order
+        self.sim_time = 0.0     # Total simulated execution time (s), independent of time_scale
+        self.dropped_bytes = 0  # Bytes lost to RX buffer overflow
+
+        # Slave 3 timeline (master only), in device time (see _now)
+        self.slave3_executed = []   # (received_at, started_at, command) per Z/servo command run
+        self.slave3_busy_until = 0.0  # Device time at which the current Z move ends
+        self.clobbered = []         # Commands overwritten in the slot before slave 3 ran them
+        self._slave3_pending = None  # (received_at, command) waiting in the slot
+        self._epoch = time.monotonic()
+
+        self._profile = None    # Pending velocity profile (nano only)
+        self._binary = False    # Last valid frame was sequenced: report in binary
+        self._busy = False      # Executing: not draining the receive buffer
+        self._rx = bytearray()  # Host -> device
+        self._tx = bytearray()  # Device -> host
+        self._cond = threading.Condition()
+        self._thread = None
+        self.is_open = False
+        self.open()
+
+    # ---- pyserial API ----
+
+    def open(self):
+        if self.is_open:
+            return
+        self.is_open = True
+        self._emit(FIRMWARE_BANNERS[self.firmware])
+        self._thread = threading.Thread(target=self._firmware_loop, name="sim-firmware", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    @property
+    def in_waiting(self):
+        with self._cond:
+            return len(self._tx)
+
+    def write(self, data):
+        with self._cond:
+            room = ARDUINO_RX_BUFFER - len(self._rx)
+            if not self._busy and (bytes(self._rx[:1]) or data[:1]) == proto.PROGRAM_HEADER:
+                room = len(data)  # An idle controller stores a program as it arrives
+            self._rx.extend(data[:max(0, room)])
+            self.dropped_bytes += max(0, len(data) - max(0, room))
+            self._cond.notify_all()
+        return len(data)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while len(self._tx) < size and self.is_open:
+                if not self._wait(deadline):
+                    break
+            data = bytes(self._tx[:size])
+            del self._tx[:size]
+            return data
+
+    def readline(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while b'\n' not in self._tx and self.is_open:
+                if not self._wait(deadline):
+                    break
+            end = self._tx.find(b'\n') + 1 or len(self._tx)
+            data = bytes(self._tx[:end])
+            del self._tx[:end]
+            return data
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._tx.clear()
+
+    def flush(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- firmware emulation ----
+
+    def _wait(self, deadline):
+        if deadline is None:
+            self._cond.wait()
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        self._cond.wait(remaining)
+        return True
+
+    def _emit(self, line):
+        self._emit_bytes(line.encode() + b'\r\n')
+
+    def _emit_bytes(self, data):
+        with self._cond:
+            self._tx.extend(data)
+            self._cond.notify_all()
+
+    def _emit_status(self, seq, status, steps1=0, steps2=0, steps3=0):
+        self._emit_bytes(proto.pack_status_frame(seq, status, steps1, steps2, steps3))
+
+    def _now(self):
+        """
+        Device time (s): wall time scaled back by time_scale, or the simulated
+        execution time when time_scale is 0 (host-side waits are then invisible)
+        """
+        if self.time_scale > 0:
+            return (time.monotonic() - self._epoch) / self.time_scale
+        return self.sim_time
+
+    def _sleep(self, seconds):
+        self.sim_time += seconds
+        if self.time_scale > 0 and seconds > 0:
+            with self._cond:
+                self._cond.wait_for(lambda: not self.is_open, seconds * self.time_scale)
+
+    def _next_frame(self):
+        """Block until a full frame is buffered, mirroring the firmware's loop()"""
+        with self._cond:
+            while self.is_open:
+                if self._rx and self._rx[0] == proto.PING_FRAME[0]:
+                    del self._rx[:1]
+                    return proto.PING_FRAME[0], proto.PING_FRAME
+                if (self.firmware == "nano" and len(self._rx) >= 2
+                        and self._rx[0] == proto.PROFILE_HEADER[0]):
+                    size = 2 + self._rx[1] * proto.PROFILE_SEGMENT_SIZE
+                    if len(self._rx) >= size:
+                        frame = bytes(self._rx[:size])
+                        del self._rx[:size]
+                        return frame[0], frame
+                    self._cond.wait()
+                    continue
+                if len(self._rx) >= 3 and self._rx[0] == proto.PROGRAM_HEADER[0]:
+                    size = proto.program_frame_size(self._rx[2])
+                    if len(self._rx) >= size:
+                        frame = bytes(self._rx[:size])
+                        del self._rx[:size]
+                        return frame[0], frame
+                    self._cond.wait()
+                    continue
+                if self._rx and self._rx[0] == proto.SEQ_MOTION_HEADER[0]:
+                    if len(self._rx) >= proto.SEQ_MOTION_FRAME_SIZE:
+                        frame = bytes(self._rx[:proto.SEQ_MOTION_FRAME_SIZE])
+                        del self._rx[:proto.SEQ_MOTION_FRAME_SIZE]
+                        return frame[0], frame
+                    self._cond.wait()
+                    continue
+                if len(self._rx) >= proto.MOTION_FRAME_SIZE:
+                    header = self._rx[0]
+                    if header != proto.MOTION_HEADER[0]:
+                        self._rx.clear()  # Dump the garbage
+                        return header, None
+                    frame = bytes(self._rx[:proto.MOTION_FRAME_SIZE])
+                    del self._rx[:proto.MOTION_FRAME_SIZE]
+                    return header, frame
+                self._cond.wait()
+        return None, None
+
+    def _firmware_loop(self):
+        while self.is_open:
+            header, frame = self._next_frame()
+            if header is None:
+                break
+            if frame is None:
+                if self._binary:
+                    self._emit_status(0, proto.STATUS_SYNC_ERROR)
+                elif self.firmware == "master":
+                    self._emit(f"SYNC ERROR: Found {header:X}")
+                    self._emit("Buffer flushed")
+                continue
+            if header == proto.PING_FRAME[0]:
+                self._emit(proto.READY_LINE)
+                continue
+            if header == proto.PROFILE_HEADER[0]:
+                self._profile = proto.unpack_profile_frame(frame)
+                continue
+            self._busy = True
+            self._handle(header, frame)
+            self._busy = False
+
+    def _handle(self, header, frame):
+        if header == proto.PROGRAM_HEADER[0]:
+            self._binary = True
+            if frame[2] > proto.MAX_PROGRAM_MOVES:
+                self._flush()
+                self._emit_status(frame[1], proto.STATUS_PROGRAM_TOO_LONG)
+                return
+            try:
+                base_seq, moves = proto.unpack_program_frame(frame)
+            except ValueError:
+                self._flush()
+                self._emit_status(frame[1], proto.STATUS_BAD_CHECKSUM)
+                return
+            for i, move in enumerate(moves):
+                self._execute(move[:8], (base_seq + i) & 0xFF)
+                self._sleep(move[8] / 1000)
+            return
+        if header == proto.SEQ_MOTION_HEADER[0]:
+            self._binary = True
+            try:
+                seq, command = proto.unpack_sequenced_frame(frame)
+            except ValueError:
+                self._flush()
+                self._emit_status(frame[1], proto.STATUS_BAD_CHECKSUM)
+                return
+            self._execute(command, seq)
+            return
+        self._binary = False
+        self._execute(proto.unpack_motion_frame(frame))
+
+    def _flush(self):
+        with self._cond:
+            self._rx.clear()
+        self._profile = None
+
+    def _slave3_receive(self, command):
+        """I2C frame to slave 3: run it now, or park it in the single slot while Z moves"""
+        now = self._now()
+        self._slave3_advance(now)
+        if now < self.slave3_busy_until:
+            if self._slave3_pending is not None:
+                self.clobbered.append(self._slave3_pending[1])
+            self._slave3_pending = (now, command)
+        else:
+            self._slave3_start(now, now, command)
+
+    def _slave3_advance(self, now):
+        # The waiting command starts as soon as the current Z move ends
+        if self._slave3_pending is not None and self.slave3_busy_until <= now:
+            received_at, command = self._slave3_pending
+            self._slave3_pending = None
+            self._slave3_start(received_at, self.slave3_busy_until, command)
+
+    def _slave3_start(self, received_at, started_at, command):
+        self.slave3_executed.append((received_at, started_at, command))
+        self.slave3_busy_until = started_at + slave3_duration(command[4])
+
+    def _execute(self, command, seq=None):
+        pulses1, dir1, pulses2, dir2, pulses3, dir3, servo1, servo2 = command
+        self.executed.append(command)
+        if self.firmware == "master":
+            # executeMove() hands Z and the servos to slave 3 before stepping M1
+            self._slave3_receive(command)
+        duration = move_duration(pulses1, pulses2, pulses3, self.firmware, self._profile)
+        self._profile = None  # A profile applies to one move only
+
+        if seq is not None:
+            self._emit_status(seq, proto.STATUS_ACCEPTED)
+            self._sleep(duration)
+            if self.firmware == "master":
+                # M2 is not wired on the master
+                self._emit_status(seq, proto.STATUS_DONE, pulses1, 0, pulses3)
+            else:
+                self._emit_status(seq, proto.STATUS_DONE, pulses1, pulses2, pulses3)
+        elif self.firmware == "master":
+            self._emit("ACK: Data Received")
+            self._emit("I2C Success")
+            if pulses1 != 0:
+                self._emit(f"Moving M1: {pulses1}")
+            self._sleep(duration)
+            self._emit("DONE")
+        else:
+            self._emit("Command Received")
+            self._sleep(duration)
+            self._emit("Movement Done")
+
+
+def serve_pty(firmware="master", time_scale=1.0):
+    """Expose a simulated controller on a pseudo-terminal (POSIX only)"""
+    import tty
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    device = SimulatedSerial(port=os.ttyname(slave_fd), timeout=0.05,
+                             firmware=firmware, time_scale=time_scale)
+
+    def device_to_host():
+        while device.is_open:
+            data = device.read(max(1, device.in_waiting))
+            if data:
+                os.write(master_fd, data)
+
+    threading.Thread(target=device_to_host, daemon=True).start()
+    print(f"Simulated {firmware} controller on {device.port}")
+    try:
+        while True:
+            device.write(os.read(master_fd, 64))
+    except (KeyboardInterrupt, OSError):
+        device.close()
+
+
+if __name__ == "__main__":
+    serve_pty(sys.argv[1] if len(sys.argv) > 1 else "master")
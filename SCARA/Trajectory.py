@@ -0,0 +1,288 @@
+# -------------------------
+# HOST-SIDE TRAJECTORY PLANNER
+# -------------------------
+
+# Turns the relative step counts of a move into acceleration-limited step-rate
+# profiles. A profile is a short list of segments (steps, start interval,
+# end interval); the firmware varies the step interval linearly inside each
+# segment, so a handful of segments describe a whole move.
+
+import math
+from collections import namedtuple
+
+import numpy as np
+from . import InverseKinematics as IK
+from . import Utilities as utl
+from . import Protocol as proto
+
+AXES = ("M1", "M2", "Z")
+
+# Default rate a move starts and stops at: the 800us + 800us step loop of the slaves
+START_RATE = 625  # steps/s
+
+# (max rate in steps/s, acceleration in steps/s^2, start/stop rate in steps/s) per axis
+# The start rates are the fixed AllNano speeds (810us arm loop, 210us Z-only loop),
+# so a profiled move is never slower than the unprofiled one
+AXIS_LIMITS = {
+    "M1": (3000, 8000, 1230),
+    "M2": (3000, 8000, 1230),
+    "Z": (8000, 40000, 4760),
+}
+
+# MasterArduino path: M1 on the master and Z on slave 3 both step at the
+# fixed 800us + 800us rate (velocity profiles need the AllNano firmware)
+MASTER_AXIS_LIMITS = {
+    "M1": (START_RATE, 8000, START_RATE),
+    "M2": (START_RATE, 8000, START_RATE),
+    "Z": (START_RATE, 40000, START_RATE),
+}
+
+# Axis limits per controller firmware flavour
+FIRMWARE_LIMITS = {"master": MASTER_AXIS_LIMITS, "nano": AXIS_LIMITS}
+
+MIN_INTERVAL_US = 100    # Pulse width + loop overhead on the Arduino
+MAX_INTERVAL_US = 65535  # Intervals travel as uint16
+
+# How much higher the peak acceleration of an S-curve ramp is than its mean
+SCURVE_PEAK_FACTOR = 1.5
+
+Segment = namedtuple("Segment", "steps start_interval end_interval")
+MoveProfile = namedtuple("MoveProfile", "axis_segments lead_axis segments duration axis_rates")
+
+
+def rate_to_interval(rate):
+    """Step rate (steps/s) to step interval (us), clamped to what the firmware accepts"""
+    return int(min(MAX_INTERVAL_US, max(MIN_INTERVAL_US, round(1e6 / rate))))
+
+
+def profile_duration(segments):
+    """Execution time (s) of a list of segments with linearly varying intervals"""
+    return sum(seg.steps * (seg.start_interval + seg.end_interval) / 2 for seg in segments) / 1e6
+
+
+def estimate_duration(rel_steps, limits=AXIS_LIMITS):
+    """Execution time (s) of an unprofiled move, every axis at its fixed start rate"""
+    steps1, _, steps2, _, steps_z, _ = rel_steps
+    return max(steps / limits[axis][2] for axis, steps in zip(AXES, (steps1, steps2, steps_z)))
+
+
+def plan_trapezoid(steps, max_rate, accel, start_rate=START_RATE):
+    """
+    Trapezoidal profile: accelerate, cruise, decelerate
+    Short moves that never reach max_rate become triangles
+    """
+    if steps <= 0:
+        return []
+    start_rate = min(start_rate, max_rate)
+
+    ramp = (max_rate**2 - start_rate**2) / (2 * accel)
+    if 2 * ramp >= steps:
+        ramp = steps / 2
+        peak = math.sqrt(start_rate**2 + 2 * accel * ramp)
+    else:
+        peak = max_rate
+
+    n_ramp = int(ramp)
+    n_cruise = steps - 2 * n_ramp
+
+    segments = []
+    if n_ramp:
+        segments.append(Segment(n_ramp, rate_to_interval(start_rate), rate_to_interval(peak)))
+    if n_cruise:
+        segments.append(Segment(n_cruise, rate_to_interval(peak), rate_to_interval(peak)))
+    if n_ramp:
+        segments.append(Segment(n_ramp, rate_to_interval(peak), rate_to_interval(start_rate)))
+    return segments
+
+
+def _scurve_ramp(start_rate, peak, accel):
+    """
+    Steps covered by a smoothstep (jerk-limited) ramp from start_rate to peak,
+    and the fraction of them covered in the first half of the ramp time
+    """
+    delta = peak - start_rate
+    if delta <= 0:
+        return 0.0, 0.5
+    duration = SCURVE_PEAK_FACTOR * delta / accel
+    distance = (start_rate + peak) / 2 * duration
+    first_half = (0.5 * start_rate + 0.09375 * delta) / (start_rate + 0.5 * delta)
+    return distance, first_half
+
+
+def plan_scurve(steps, max_rate, accel, start_rate=START_RATE):
+    """
+    S-curve profile: each ramp is split in two segments around its mid-speed,
+    so the rate eases in and out instead of jumping to full acceleration
+    """
+    if steps <= 0:
+        return []
+    start_rate = min(start_rate, max_rate)
+
+    # Largest peak whose two ramps fit in the move
+    peak = max_rate
+    if 2 * _scurve_ramp(start_rate, peak, accel)[0] > steps:
+        low, high = start_rate, max_rate
+        for _ in range(30):
+            peak = (low + high) / 2
+            if 2 * _scurve_ramp(start_rate, peak, accel)[0] > steps:
+                high = peak
+            else:
+                low = peak
+        peak = low
+
+    distance, first_half = _scurve_ramp(start_rate, peak, accel)
+    n_ramp = int(distance)
+    n_first = int(round(n_ramp * first_half))
+    n_second = n_ramp - n_first
+    n_cruise = steps - 2 * n_ramp
+    mid = (start_rate + peak) / 2
+
+    rising = [Segment(n_first, rate_to_interval(start_rate), rate_to_interval(mid)),
+              Segment(n_second, rate_to_interval(mid), rate_to_interval(peak))]
+    falling = [Segment(n_second, rate_to_interval(peak), rate_to_interval(mid)),
+               Segment(n_first, rate_to_interval(mid), rate_to_interval(start_rate))]
+    cruise = [Segment(n_cruise, rate_to_interval(peak), rate_to_interval(peak))]
+
+    return [seg for seg in rising + cruise + falling if seg.steps > 0]
+
+
+PLANNERS = {
+    "trapezoid": plan_trapezoid,
+    "scurve": plan_scurve,
+}
+
+
+def synchronized_limits(axis_steps, limits=AXIS_LIMITS):
+    """
+    Limits for the lead axis such that every other axis, moving in proportion
+    to it, stays within its own limits: all axes then start and stop together
+    and the move takes as long as the slowest axis needs on its own
+    """
+    lead_steps = max(axis_steps.values())
+    max_rate, accel, start_rate = math.inf, math.inf, math.inf
+    for axis, steps in axis_steps.items():
+        if steps <= 0:
+            continue
+        scale = lead_steps / steps
+        axis_max, axis_accel, axis_start = limits[axis]
+        max_rate = min(max_rate, axis_max * scale)
+        accel = min(accel, axis_accel * scale)
+        start_rate = min(start_rate, axis_start * scale)
+    return max_rate, accel, start_rate
+
+
+def scale_segments(segments, steps):
+    """Same timing as `segments`, spread over a different number of steps"""
+    total = sum(seg.steps for seg in segments)
+    if steps <= 0 or total == 0:
+        return []
+    ratio = total / steps
+    scaled, lead_done, done = [], 0, 0
+    for seg in segments:
+        # Cumulative rounding keeps the total exact
+        lead_done += seg.steps
+        end = int(round(lead_done / ratio))
+        if end > done:
+            scaled.append(Segment(end - done, min(MAX_INTERVAL_US, int(round(seg.start_interval * ratio))),
+                                  min(MAX_INTERVAL_US, int(round(seg.end_interval * ratio)))))
+        done = end
+    return scaled
+
+
+def scale_limits(limits, factor):
+    """Axis limits with the max rate and acceleration scaled by `factor` (start rates capped to match)"""
+    if factor >= 1.0:
+        return limits
+    return {axis: (max_rate * factor, accel * factor, min(start_rate, max_rate * factor))
+            for axis, (max_rate, accel, start_rate) in limits.items()}
+
+
+def plan_move_profile(rel_steps, profile="trapezoid", limits=AXIS_LIMITS, synchronize=True):
+    """
+    Plan every axis of a move given as calculate_relative_steps output
+    The lead axis (most steps) paces the move in the firmware; the other axes
+    are interpolated against it. With synchronize=True the lead profile is
+    limited so that every axis respects its own limits and all finish together
+    """
+    planner = PLANNERS[profile]
+    steps1, _, steps2, _, steps_z, _ = rel_steps
+    axis_steps = dict(zip(AXES, (steps1, steps2, steps_z)))
+    lead_axis = max(AXES, key=lambda axis: axis_steps[axis])
+
+    if synchronize:
+        max_rate, accel, start_rate = synchronized_limits(axis_steps, limits)
+        segments = planner(axis_steps[lead_axis], max_rate, accel, start_rate) if axis_steps[lead_axis] else []
+        axis_segments = {axis: scale_segments(segments, steps) for axis, steps in axis_steps.items()}
+        axis_segments[lead_axis] = segments
+    else:
+        axis_segments = {axis: planner(steps, *limits[axis]) for axis, steps in axis_steps.items()}
+        segments = axis_segments[lead_axis]
+
+    duration = profile_duration(segments)
+    axis_rates = {axis: (steps / duration if duration > 0 else 0.0) for axis, steps in axis_steps.items()}
+    return MoveProfile(axis_segments, lead_axis, segments, duration, axis_rates)
+
+
+# -------------------------
+# CARTESIAN STRAIGHT LINES
+# -------------------------
+
+def tip_position(theta1, theta2):
+    """(x, y) of the end effector for the given joint angles"""
+    x = IK.L1 * math.cos(theta1) + IK.L2 * math.cos(theta1 + theta2)
+    y = IK.L1 * math.sin(theta1) + IK.L2 * math.sin(theta1 + theta2)
+    return x, y
+
+
+def _within_limits(theta1, theta2, theta1_0, theta2_0):
+    """
+    Absolute limits of every waypoint and the coupling compensation of every
+    leg between consecutive waypoints (as utl.branch_reason for one move)
+    """
+    theta1_deg = np.degrees(theta1)
+    theta2_deg = np.degrees(theta2)
+    # Motor2 command of each leg = desired move + motor1 move dragged along by the coupling
+    delta1 = np.diff(theta1_deg, prepend=np.degrees(theta1_0))
+    delta2_command = np.diff(theta2_deg, prepend=np.degrees(theta2_0)) + delta1 * utl.COUPLING_RATIO
+    return bool(np.all((utl.MOTOR1_ABS_MIN <= theta1_deg) & (theta1_deg <= utl.MOTOR1_ABS_MAX)
+                       & (utl.MOTOR2_ABS_MIN <= theta2_deg) & (theta2_deg <= utl.MOTOR2_ABS_MAX)
+                       & (np.abs(delta2_command) <= utl.MOTOR2_ABS_MAX)))
+
+
+def cartesian_line(x1, y1, current_angles, z1, phi=0.0, max_step=0.005):
+    """
+    Joint waypoints that move the tip along a straight line from its current
+    position to (x1, y1), with Z and the wrist interpolated alongside
+    All waypoints are solved in one batch IK call and kept on one elbow branch
+    Returns (path_angles (N,4), rel_steps (N,6)) or None if the line leaves the workspace
+    """
+    theta1_0, theta2_0, _, z0 = current_angles
+    x0, y0 = tip_position(theta1_0, theta2_0)
+
+    n = max(1, int(math.ceil(math.hypot(x1 - x0, y1 - y0) / max_step)))
+    u = np.arange(1, n + 1) / n
+    xs = x0 + (x1 - x0) * u
+    ys = y0 + (y1 - y0) * u
+    zs = z0 + (z1 - z0) * u
+
+    (t1a, t2a), (t1b, t2b), reachable = IK.ik_scara_batch(xs, ys, IK.L1, IK.L2)
+    if not reachable.all():
+        return None
+
+    # Prefer the branch that starts closest to the current pose
+    branches = [(t1a, t2a), (t1b, t2b)]
+    branches.sort(key=lambda b: abs(b[0][0] - theta1_0) + abs(b[1][0] - theta2_0))
+    for theta1, theta2 in branches:
+        if _within_limits(theta1, theta2, theta1_0, theta2_0):
+            theta3 = IK.end_effector(theta1, theta2, phi)
+            path = np.column_stack((theta1, theta2, theta3, zs))
+            rel_steps = utl.calculate_relative_steps_batch(np.vstack((current_angles, path)))
+            return path, rel_steps
+    return None
+
+
+def pack_profile(move_profile):
+    """Profile frame for the lead axis (empty for a move with no steps)"""
+    if not move_profile.segments:
+        return b''
+    return proto.pack_profile_frame(move_profile.segments)
@@ -0,0 +1,270 @@
+# -------------------------
+# EVENT-DRIVEN SERIAL TRANSPORT
+# -------------------------
+
+# A background thread reads the serial port, splits it into lines and hands
+# every line to the oldest command still waiting for completion. The
+# controllers execute frames strictly in order, so completion messages map
+# one-to-one onto the FIFO of pending commands.
+#
+# With binary=True every motion frame is sent as a sequenced command and the
+# controller answers with fixed-size status frames, matched to their command
+# by sequence number instead of by text. Text lines (boot banner, debug
+# output) can still arrive in between and are handled as before.
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from . import Protocol as proto
+
+
+class ProtocolError(Exception):
+    """The controller rejected or lost a command"""
+
+
+class PendingCommand:
+    """One frame sent to the controller and its completion state"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.responses = []     # Text lines and/or StatusFrames
+        self.seq = None         # Sequence number (binary status protocol)
+        self.status = None      # Last StatusFrame received
+        self.acked = Future()   # Resolved on the ACK line
+        self.done = Future()    # Resolved with the responses on the DONE line
+        self.sent_at = None
+        self.acked_at = None
+        self.done_at = None
+
+    def _ack(self):
+        if not self.acked.done():
+            self.acked_at = time.monotonic()
+            self.acked.set_result(True)
+
+    def _finish(self):
+        self._ack()
+        self.done_at = time.monotonic()
+        self.done.set_result(list(self.responses))
+
+    def _fail(self, exc):
+        for future in (self.acked, self.done):
+            if not future.done():
+                future.set_exception(exc)
+
+
+class SerialTransport:
+    """Background line reader resolving per-command futures as replies arrive"""
+
+    def __init__(self, ser, on_line=None, binary=False, on_status=None):
+        self.ser = ser
+        self.on_line = on_line      # Optional callback(line) for every received line
+        self.binary = binary        # Sequenced frames + binary status replies
+        self.on_status = on_status  # Optional callback(StatusFrame) for every status frame
+        self.bad_frames = 0         # Status frames dropped for a bad checksum
+        self.unsolicited = deque(maxlen=100)  # Lines received with no command pending
+
+        self._pending = deque()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, name="serial-reader", daemon=True)
+        self._thread.start()
+
+    # ---- sending ----
+
+    def send(self, frame, sequenced=True):
+        """
+        Write a frame and return its PendingCommand without waiting
+        sequenced=False writes the frame as is, for commands outside the motion
+        protocol (e.g. the 0x02 servo packet) in binary mode
+        """
+        command = PendingCommand(frame)
+        with self._lock:
+            if self.binary and sequenced:
+                command.seq = self._seq
+                command.frame = frame = proto.sequence_frame(frame, self._seq)
+                self._seq = (self._seq + 1) & 0xFF
+            self._pending.append(command)
+            command.sent_at = time.monotonic()
+            self.ser.write(frame)
+        return command
+
+    def send_program(self, frames, dwells_ms):
+        """
+        Upload motion frames as one program (binary protocol only)
+        The controller runs them on its own; returns one PendingCommand per
+        move, resolved as the controller reports each of them
+        """
+        if not self.binary:
+            raise ValueError("Programs need the binary status protocol")
+        commands = [PendingCommand(frame) for frame in frames]
+        with self._lock:
+            base_seq = self._seq
+            program = proto.pack_program_frame(base_seq, frames, dwells_ms)
+            for i, command in enumerate(commands):
+                command.seq = (base_seq + i) & 0xFF
+                self._pending.append(command)
+            self._seq = (base_seq + len(commands)) & 0xFF
+            sent_at = time.monotonic()
+            for command in commands:
+                command.sent_at = sent_at
+            self.ser.write(program)
+        return commands
+
+    def request(self, frame, timeout=5):
+        """
+        Send a frame and block until the controller reports completion
+        On timeout returns whatever responses were received so far,
+        raises ProtocolError if the controller dropped the frame
+        """
+        command = self.send(frame)
+        try:
+            return command.done.result(timeout)
+        except FutureTimeout:
+            return list(command.responses)
+
+    async def request_async(self, frame, timeout=5):
+        """asyncio flavour of request()"""
+        command = self.send(frame)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(command.done), timeout)
+        except asyncio.TimeoutError:
+            return list(command.responses)
+
+    def discard(self, command):
+        """
+        Stop waiting for a command the controller will not complete (no DONE
+        reply), so later commands get their replies; returns its responses
+        """
+        with self._lock:
+            if command in self._pending:
+                self._pending.remove(command)
+        command._fail(ProtocolError("Command discarded"))
+        return list(command.responses)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def alive(self):
+        """False once the reader stopped (closed, or the port failed)"""
+        return self._running
+
+    def reset(self, reason="Transport reset"):
+        """Fail every pending command (e.g. after the controller rebooted)"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for command in pending:
+            command._fail(ProtocolError(reason))
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=2)
+        self.reset("Transport closed")
+
+    # ---- receiving ----
+
+    def _reader(self):
+        while self._running:
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                self.reset(f"Serial read failed: {e}")
+                self._running = False
+                break
+            if not chunk:
+                continue
+            self._buffer.extend(chunk)
+            self._parse()
+
+    def _parse(self):
+        while self._buffer:
+            if self._buffer[0] == proto.STATUS_SYNC[0]:
+                if len(self._buffer) < proto.STATUS_FRAME_SIZE:
+                    return
+                try:
+                    status = proto.unpack_status_frame(bytes(self._buffer[:proto.STATUS_FRAME_SIZE]))
+                except ValueError:
+                    # Not a valid frame: skip the sync byte and resynchronise
+                    self.bad_frames += 1
+                    del self._buffer[:1]
+                    continue
+                del self._buffer[:proto.STATUS_FRAME_SIZE]
+                self._dispatch_status(status)
+                continue
+
+            end = self._buffer.find(b'\n')
+            if end < 0:
+                return
+            raw = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            # Use errors='ignore' so line noise cannot kill the reader
+            line = raw.decode('utf-8', errors='ignore').strip()
+            if line:
+                self._dispatch(line)
+
+    def _dispatch(self, line):
+        if self.on_line:
+            self.on_line(line)
+
+        with self._lock:
+            command = self._pending[0] if self._pending else None
+            if command is None:
+                self.unsolicited.append(line)
+                return
+            command.responses.append(line)
+            if proto.is_done(line):
+                self._pending.popleft()
+            elif proto.is_error(line):
+                # The firmware flushes its whole receive buffer on a sync
+                # error, so every frame still queued behind it is lost too
+                lost = list(self._pending)
+                self._pending.clear()
+
+        if proto.is_error(line):
+            for lost_command in lost:
+                lost_command._fail(ProtocolError(line))
+        elif proto.is_done(line):
+            command._finish()
+        elif proto.is_ack(line):
+            command._ack()
+
+    def _dispatch_status(self, status):
+        if self.on_status:
+            self.on_status(status)
+
+        code = status.status
+        lost = []
+        with self._lock:
+            if code in proto.FLUSH_STATUSES:
+                # The firmware flushed its receive buffer
+                lost = list(self._pending)
+                self._pending.clear()
+                command = None
+            else:
+                command = next((c for c in self._pending if c.seq == status.seq), None)
+                if command is None:
+                    self.unsolicited.append(status)
+                    return
+                command.responses.append(status)
+                command.status = status
+                if code in (proto.STATUS_DONE, proto.STATUS_FAULT):
+                    self._pending.remove(command)
+
+        reason = f"{proto.status_name(code)} (seq {status.seq})"
+        for lost_command in lost:
+            lost_command._fail(ProtocolError(reason))
+        if command is None:
+            return
+        if code == proto.STATUS_DONE:
+            command._finish()
+        elif code == proto.STATUS_FAULT:
+            command._fail(ProtocolError(reason))
+        elif code == proto.STATUS_ACCEPTED:
+            command._ack()
@@ -3,7 +3,11 @@
 # -------------------------
 
 import math
-import InverseKinematics as IK
+from collections import OrderedDict, namedtuple
+from . import InverseKinematics as IK
+from .Diagnostics import get_logger
+
+log = get_logger("ik")
 
 
 # Motor angle constraints (degrees)
@@ -14,6 +18,107 @@ MOTOR2_ABS_MAX = 160   # degrees
 
 COUPLING_RATIO = 0.5  # Motor2 moves half the angle of Motor1 due to coupling
 
+# Reason codes of solve_ik (per branch, and for the whole solve)
+IK_OK = 0
+IK_UNREACHABLE = 1      # Target outside the annulus the links can reach
+IK_MOTOR1_LIMIT = 2     # theta1 outside [MOTOR1_ABS_MIN, MOTOR1_ABS_MAX]
+IK_MOTOR2_LIMIT = 3     # theta2 outside [MOTOR2_ABS_MIN, MOTOR2_ABS_MAX]
+IK_COUPLING_LIMIT = 4   # Compensated motor2 move larger than MOTOR2_ABS_MAX
+
+IK_REASONS = {
+    IK_OK: "OK",
+    IK_UNREACHABLE: "target out of the workspace",
+    IK_MOTOR1_LIMIT: "motor 1 outside its absolute limits",
+    IK_MOTOR2_LIMIT: "motor 2 outside its absolute limits",
+    IK_COUPLING_LIMIT: "coupling compensation too large",
+}
+
+# Result of solve_ik
+#   theta1, theta2:   chosen joint angles (rad), None if no branch is valid
+#   branch:           "A" (+sin theta2), "B" (-sin theta2) or None
+#   valid_a, valid_b: whether each branch passed the limit and coupling checks
+#   delta1, delta2:   joint moves (rad) from the current angles to the chosen branch
+#   reason:           IK_OK, IK_UNREACHABLE, or branch A's failure when both are blocked
+IKResult = namedtuple("IKResult", "theta1 theta2 branch valid_a valid_b delta1 delta2 reason")
+
+_UNREACHABLE = IKResult(None, None, None, False, False, 0.0, 0.0, IK_UNREACHABLE)
+_DEG = 180.0 / math.pi
+
+# IK cache settings
+IK_CACHE_SIZE = 256  # Max number of (x, y) solutions kept
+# A quarter of the tip displacement of one motor2 step (2:1 reduction), ~0.09 mm
+IK_CACHE_QUANTUM = min(IK.L1, IK.L2) * (2 * math.pi / IK.STEPS_PER_JOINT_REV) / 8
+
+
+class IKCache:
+    """
+    Bounded LRU cache in front of IK.ik_scara
+    Keys are (x, y) quantized to IK_CACHE_QUANTUM and the IK is solved on the
+    quantized point, so a hit returns exactly what a miss would have computed
+    """
+
+    def __init__(self, maxsize=IK_CACHE_SIZE, quantum=IK_CACHE_QUANTUM):
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._links = (IK.L1, IK.L2)
+
+    def branches(self, x, y):
+        """Return IK.ik_scara_branches of the quantized point (None if unreachable)"""
+        # Link lengths changed since the entries were computed: drop them
+        if self._links != (IK.L1, IK.L2):
+            self.clear()
+
+        key = (round(x / self.quantum), round(y / self.quantum))
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        # Unreachable targets are cached too (as None), so repeats skip the math
+        entry = IK.ik_scara_branches(key[0] * self.quantum, key[1] * self.quantum, IK.L1, IK.L2)
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def solve(self, x, y):
+        """Return (solA, solB) like IK.ik_scara, raising ValueError if unreachable"""
+        entry = self.branches(x, y)
+        if entry is None:
+            raise ValueError("Target unreachable: r = {:.4f} m".format(math.hypot(x, y)))
+        theta1_a, theta2_a, theta1_b, theta2_b = entry
+        return (theta1_a, theta2_a), (theta1_b, theta2_b)
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        self._entries.clear()
+        self._links = (IK.L1, IK.L2)
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._entries), "maxsize": self.maxsize}
+
+
+ik_cache = IKCache()
+
+def configure_ik_cache(maxsize=None, quantum=None):
+    """Change the size and/or quantization of the shared IK cache"""
+    if quantum is not None and quantum != ik_cache.quantum:
+        ik_cache.quantum = quantum
+        ik_cache.clear()
+    if maxsize is not None:
+        ik_cache.resize(maxsize)
+    return ik_cache
+
 def get_effective_limits(current_theta1, current_theta2):
     """
     Calculate effective limits for motor2 based on current motor1 position
@@ -32,7 +137,7 @@ def get_effective_limits(current_theta1, current_theta2):
     effective_min = MOTOR2_ABS_MIN
     effective_max = MOTOR2_ABS_MAX
     
-    print(f"   - Motor2 absolute range: [{effective_min:.1f}°, {effective_max:.1f}°]")
+    log.debug("   - Motor2 absolute range: [%.1f°, %.1f°]", effective_min, effective_max)
     
     return effective_min, effective_max
 
@@ -51,13 +156,13 @@ def validate_angles_with_coupling(theta1, theta2, current_angles):
     # Check motor1 absolute limits
     if not (MOTOR1_ABS_MIN <= theta1_deg <= MOTOR1_ABS_MAX):
         reason = f"Motor 1 angle {theta1_deg:.1f}° outside absolute limits [{MOTOR1_ABS_MIN}, {MOTOR1_ABS_MAX}]"
-        print(f"❌ {reason}")
+        log.debug("❌ %s", reason)
         return False, reason
     
     # Check motor2 absolute limits
     if not (MOTOR2_ABS_MIN <= theta2_deg <= MOTOR2_ABS_MAX):
         reason = f"Motor 2 angle {theta2_deg:.1f}° outside absolute limits [{MOTOR2_ABS_MIN}, {MOTOR2_ABS_MAX}]"
-        print(f"❌ {reason}")
+        log.debug("❌ %s", reason)
         return False, reason
     
     # The coupling doesn't limit the target position, it affects how we get there
@@ -78,10 +183,10 @@ def validate_angles_with_coupling(theta1, theta2, current_angles):
     compensation_tolerance = MOTOR2_ABS_MAX 
     if abs(delta_theta2_command) > compensation_tolerance:
         reason = f"Coupling compensation too large: {delta_theta2_command:.1f}° (max: {compensation_tolerance}°)"
-        print(f"❌ {reason}")
+        log.debug("❌ %s", reason)
         return False, reason
     
-    print("✅ All constraints satisfied")
+    log.debug("✅ All constraints satisfied")
     return True, "OK"
 
 def calculate_relative_steps_with_coupling(target_angles, current_angles):
@@ -139,12 +244,12 @@ def calculate_relative_steps_with_coupling(target_angles, current_angles):
         rel_steps1 = abs(rel_steps1)
         rel_steps2 = abs(rel_steps2)
         
-        print(f"Final relative steps: M1={rel_steps1}(d:{dir1}), M2={rel_steps2}(d:{dir2})")
+        log.debug("Final relative steps: M1=%d(d:%d), M2=%d(d:%d)", rel_steps1, dir1, rel_steps2, dir2)
         
         return rel_steps1, dir1, rel_steps2, dir2, 0, 0
         
     except Exception as e:
-        print(f"❌ Error in calculate_relative_steps_with_coupling: {e}")
+        log.error("❌ Error in calculate_relative_steps_with_coupling: %s", e)
         return 0, 0, 0, 0, 0, 0
     
 def degrees_to_radians(deg):
@@ -155,100 +260,89 @@ def radians_to_degrees(rad):
     """Convert radians to degrees"""
     return rad * 180.0 / math.pi
 
+def branch_reason(theta1, theta2, current_theta1, current_theta2):
+    """
+    Analytic form of validate_angles_with_coupling: reason code of one IK branch
+    (IK_OK if it satisfies the absolute limits and the coupling compensation)
+    """
+    theta1_deg = theta1 * _DEG
+    theta2_deg = theta2 * _DEG
+    if not (MOTOR1_ABS_MIN <= theta1_deg <= MOTOR1_ABS_MAX):
+        return IK_MOTOR1_LIMIT
+    if not (MOTOR2_ABS_MIN <= theta2_deg <= MOTOR2_ABS_MAX):
+        return IK_MOTOR2_LIMIT
+    # Motor2 command = desired move + motor1 move dragged along by the coupling
+    delta_theta1 = theta1_deg - current_theta1 * _DEG
+    delta_theta2_command = (theta2_deg - current_theta2 * _DEG) + delta_theta1 * COUPLING_RATIO
+    if abs(delta_theta2_command) > MOTOR2_ABS_MAX:
+        return IK_COUPLING_LIMIT
+    return IK_OK
+
+def select_branch(theta1_a, theta2_a, theta1_b, theta2_b, current_angles=None):
+    """
+    Pick the IK branch to use from the current angles: the only valid one, or
+    the one closer in joint space when both are valid (A on a tie or without
+    current angles). Each branch is checked exactly once; returns an IKResult
+    """
+    if current_angles:
+        current_theta1, current_theta2 = current_angles[0], current_angles[1]
+        reason_a = branch_reason(theta1_a, theta2_a, current_theta1, current_theta2)
+        reason_b = branch_reason(theta1_b, theta2_b, current_theta1, current_theta2)
+    else:
+        # No current position: nothing to compensate, only the absolute limits apply
+        current_theta1 = current_theta2 = 0.0
+        reason_a = branch_reason(theta1_a, theta2_a, theta1_a, theta2_a)
+        reason_b = branch_reason(theta1_b, theta2_b, theta1_b, theta2_b)
+    valid_a = reason_a == IK_OK
+    valid_b = reason_b == IK_OK
+
+    if not valid_a and not valid_b:
+        return IKResult(None, None, None, False, False, 0.0, 0.0, reason_a)
+
+    delta1_a, delta2_a = theta1_a - current_theta1, theta2_a - current_theta2
+    delta1_b, delta2_b = theta1_b - current_theta1, theta2_b - current_theta2
+    if valid_b and (not valid_a or (current_angles and abs(delta1_b) + abs(delta2_b) < abs(delta1_a) + abs(delta2_a))):
+        return IKResult(theta1_b, theta2_b, "B", valid_a, True, delta1_b, delta2_b, IK_OK)
+    return IKResult(theta1_a, theta2_a, "A", True, valid_b, delta1_a, delta2_a, IK_OK)
+
+def solve_ik(x, y, current_angles=None, use_cache=True):
+    """
+    Streamlined IK for high-rate targets: closed-form branches, one analytic
+    limit/coupling check per branch, no exceptions and no logging
+    Returns an IKResult (check .reason == IK_OK, or .theta1 is not None)
+    """
+    branches = ik_cache.branches(x, y) if use_cache else IK.ik_scara_branches(x, y)
+    if branches is None:
+        return _UNREACHABLE
+    return select_branch(*branches, current_angles)
+
 def choose_best_solution(solA, solB, current_angles=None):
     """
     Choose the best IK solution based on constraints and coupling
     Returns (theta1, theta2) or None if no valid solution
     """
-    try:
-        # Extract just theta1 and theta2 from the solutions (ignore theta3 and thetaZ for selection)
-        theta1A, theta2A = solA  # Unpack 4 values
-        theta1B, theta2B = solB  # Unpack 4 values
-        
-        # Check which solutions satisfy constraints WITH COUPLING
-        validA, reasonA = validate_angles_with_coupling(theta1A, theta2A, current_angles)
-        validB, reasonB = validate_angles_with_coupling(theta1B, theta2B, current_angles)
-        
-        
-        if not validA and not validB:
-            print("❌ No IK solution satisfies motor constraints with coupling!")
-            print("💡 Possible issues:")
-            print("   - Target position may be out of workspace")
-            print("   - Coupling constraints too restrictive") 
-            print("   - Current position limits movement options")
-            return None
-        
-        # If only one valid, choose it
-        if validA and not validB:
-            print("✅ Selected Solution A (only valid option)")
-            return solA  # Return the full solution (4 values)
-        if validB and not validA:
-            print("✅ Selected Solution B (only valid option)")
-            return solB  # Return the full solution (4 values)
-        
-        # If both valid, choose based on proximity to current position
-        if current_angles:
-            current_theta1, current_theta2, _, _ = current_angles  # Unpack 4 values
-            
-            # Calculate angular distance for each solution (only for theta1 and theta2)
-            distA = abs(theta1A - current_theta1) + abs(theta2A - current_theta2)
-            distB = abs(theta1B - current_theta1) + abs(theta2B - current_theta2)
-            
-            if distA <= distB:
-                print("✅ Selected Solution A (closer to current position)")
-                return solA  # Return the full solution (4 values)
-            else:
-                print("✅ Selected Solution B (closer to current position)")
-                return solB  # Return the full solution (4 values)
-        else:
-            # No current position, default to solution A
-            print("✅ Selected Solution A (default)")
-            return solA  # Return the full solution (4 values)
-            
-    except Exception as e:
-        print(f"❌ Error in choose_best_solution: {e}")
+    result = select_branch(*solA, *solB, current_angles)
+    if result.branch is None:
+        log.debug("❌ No IK solution satisfies motor constraints with coupling (A: %s)",
+                  IK_REASONS[result.reason])
         return None
+    log.debug("✅ Selected Solution %s", result.branch)
+    return result.theta1, result.theta2
     
-def safe_ik_calculation(x, y, current_angles, z, phi_desired=0.0):
+def safe_ik_calculation(x, y, current_angles, z, phi_desired=0.0, use_cache=True):
     """
     Safely compute IK with comprehensive error handling
     Returns (theta1, theta2, theta3, thetaZ) or None if failed
     """
-    try:
-        
-        # Compute IK solutions
-       
-        solA, solB = IK.ik_scara(x, y)
-        
-        # Debug: Check if IK returned valid solutions
-        if solA is None or solB is None:
-            print("❌ IK function returned None solutions")
-            return None
-        
-        # Choose best solution based on constraints
-        best_solution = choose_best_solution(solA, solB, current_angles)
-        
-        if best_solution is None:
-            print("❌ No valid IK solution found")
-            print("💡 Try:")
-            print("   - Moving to a different position first")
-            print("   - Checking if target is within workspace")
-            print("   - Relaxing coupling constraints if possible")
-            return None
-            
-        theta1, theta2 = best_solution  # This now returns 2 values, but we need to add theta3 and thetaZ
-        theta3 = IK.end_effector(theta1, theta2, phi_desired) 
-        Z = z
-        
+    result = solve_ik(x, y, current_angles, use_cache)
 
-        return (theta1, theta2, theta3, Z)
-        
-    except ValueError as e:
-        print(f"❌ IK mathematical error: {e}")
-        return None
-    except Exception as e:
-        print(f"❌ Unexpected IK error: {e}")
+    if result.branch is None:
+        log.info("❌ No valid IK solution for (%.4f, %.4f): %s", x, y, IK_REASONS[result.reason])
         return None
+
+    log.debug("✅ Selected Solution %s (valid A: %s, B: %s)", result.branch, result.valid_a, result.valid_b)
+    theta3 = IK.end_effector(result.theta1, result.theta2, phi_desired)
+    return (result.theta1, result.theta2, theta3, z)
  
 def calculate_relative_steps(target_angles, current_angles):
     """
@@ -286,12 +380,38 @@ def calculate_relative_steps(target_angles, current_angles):
     
     return rel_steps1, dir1, rel_steps2, dir2, steps_Z, dir3
 
+def calculate_relative_steps_batch(path_angles):
+    """
+    Vectorized calculate_relative_steps for a whole program of moves
+    path_angles is an (N,4) array of (theta1, theta2, theta3, z), starting with the current position
+    Returns an (N-1,6) int32 array of (steps1, dir1, steps2, dir2, steps_Z, dir3) per move
+    """
+    import numpy as np  # Lazy: the scalar helpers do not need numpy
+
+    path_angles = np.atleast_2d(np.asarray(path_angles, dtype=float))
+
+    # Absolute steps for every waypoint, then one diff pass for all moves
+    abs_steps = IK.angles_to_steps_batch(path_angles[:, :3])
+    rel_steps1 = np.diff(abs_steps[:, 0].astype(np.int64))
+    rel_steps2 = np.diff(abs_steps[:, 2].astype(np.int64))
+    steps_Z = np.rint((np.diff(path_angles[:, 3]) / 2) * IK.STEPS_PER_REV_Z).astype(np.int64)
+
+    out = np.empty((rel_steps1.shape[0], 6), dtype=np.int32)
+    out[:, 0] = np.abs(rel_steps1)
+    out[:, 1] = rel_steps1 >= 0
+    out[:, 2] = np.abs(rel_steps2)
+    out[:, 3] = rel_steps2 < 0
+    out[:, 4] = np.abs(steps_Z)
+    out[:, 5] = steps_Z >= 0
+    return out
+
 def go_home():
     """Move all motors to home position from current position"""
     global current_angles
     
-    print("\n🏠 RETURNING TO HOME POSITION...")
-    print(f"Current position: θ1={radians_to_degrees(current_angles[0]):.1f}°, θ2={radians_to_degrees(current_angles[1]):.1f}°")
+    log.info("🏠 RETURNING TO HOME POSITION...")
+    log.info("Current position: θ1=%.1f°, θ2=%.1f°",
+             radians_to_degrees(current_angles[0]), radians_to_degrees(current_angles[1]))
     
     # Calculate relative steps needed to get to home
     rel_steps1, dir1, rel_steps2, dir2, rel_steps3, dir3 = calculate_relative_steps(HOME_ANGLES)
@@ -302,9 +422,10 @@ def go_home():
     if responses:
         # Update current position to home
         current_angles = HOME_ANGLES
-        print("✅ Home position reached")
-        print(f"New position: θ1={radians_to_degrees(current_angles[0]):.1f}°, θ2={radians_to_degrees(current_angles[1]):.1f}°")
+        log.info("✅ Home position reached")
+        log.info("New position: θ1=%.1f°, θ2=%.1f°",
+                 radians_to_degrees(current_angles[0]), radians_to_degrees(current_angles[1]))
     else:
-        print("❌ No response during homing")
+        log.warning("❌ No response during homing")
     
     return responses
\ No newline at end of file
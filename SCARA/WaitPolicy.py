@@ -0,0 +1,141 @@
+# -------------------------
+# WAIT POLICIES & CYCLE TELEMETRY
+# -------------------------
+
+# Instead of fixed sleeps, every move waits for the controller to report
+# completion and then only as long as its operation needs:
+#   - dwell:            fixed time after completion (e.g. servo travel)
+#   - large_move_dwell: opt-in wobble settle after long unprofiled moves
+#   - planned_margin:   wait until the planned move duration (+ margin) has
+#                       elapsed, for axes the controller does not wait for
+#                       itself (Z/M2 on the I2C slaves)
+#   - settle_check:     optional callable polled until it returns True
+
+import time
+from collections import namedtuple
+
+from . import Trajectory as traj
+
+SETTLE_POLL = 0.01  # s between settle_check calls
+
+
+def planned_duration(move, firmware="master"):
+    """Planned execution time (s) of a PlannedMove on the given controller firmware"""
+    if move.profile:
+        return move.profile.duration
+    return traj.estimate_duration(move.steps, traj.FIRMWARE_LIMITS[firmware])
+
+
+def reported_duration(move, firmware="master"):
+    """Time (s) until the controller reports a PlannedMove done: the master only waits for M1"""
+    if firmware == "master" and not move.profile:
+        return move.steps[0] / traj.MASTER_AXIS_LIMITS["M1"][2]
+    return planned_duration(move, firmware)
+
+
+class WaitPolicy:
+    """How long to wait after one move before the next may start"""
+
+    def __init__(self, name="move", dwell=0.0, large_move=None, large_move_dwell=0.0,
+                 planned_margin=None, settle_check=None, settle_timeout=2.0):
+        self.name = name                        # Operation label used in telemetry
+        self.dwell = dwell
+        self.large_move = large_move            # Distance (m) above which a move is "large"
+        self.large_move_dwell = large_move_dwell
+        self.planned_margin = planned_margin    # Fraction added to the planned duration
+        self.settle_check = settle_check
+        self.settle_timeout = settle_timeout
+
+    def _is_large(self, move, distance):
+        # Profiled moves decelerate smoothly and do not need the wobble settle
+        return (self.large_move is not None and distance > self.large_move
+                and not move.profile)
+
+    def needs_rest(self, move, distance):
+        """True if the next move must wait for this one to complete"""
+        return (self.dwell > 0 or self.settle_check is not None
+                or self.planned_margin is not None or self._is_large(move, distance))
+
+    def remaining(self, move, distance, started_at, done_at, firmware="master"):
+        """Seconds still to wait once completion was reported at done_at"""
+        wait = self.dwell
+        if self._is_large(move, distance):
+            wait = max(wait, self.large_move_dwell)
+        if self.planned_margin is not None:
+            planned_end = started_at + planned_duration(move, firmware) * (1 + self.planned_margin)
+            wait = max(wait, planned_end - done_at)
+        return max(0.0, wait)
+
+    def wait(self, move, distance, started_at, done_at, firmware="master"):
+        """Block for the required dwell and settle criteria; returns the time waited"""
+        begin = time.monotonic()
+        remaining = self.remaining(move, distance, started_at, done_at, firmware) - (begin - done_at)
+        if remaining > 0:
+            time.sleep(remaining)
+        if self.settle_check is not None:
+            deadline = time.monotonic() + self.settle_timeout
+            while not self.settle_check() and time.monotonic() < deadline:
+                time.sleep(SETTLE_POLL)
+        return time.monotonic() - begin
+
+
+NO_WAIT = WaitPolicy()
+
+# Per-operation policies used by pick_and_place (edit to tune a cell)
+WAIT_POLICIES = {
+    "approach": WaitPolicy("approach"),
+    "descend": WaitPolicy("descend", planned_margin=0.1),  # Z: master reports done before slave 3 ends
+    "grip": WaitPolicy("grip", dwell=0.5),          # Gripper servo closing
+    "release": WaitPolicy("release", dwell=0.5),    # Gripper servo opening
+    "lift": WaitPolicy("lift", planned_margin=0.1),        # Z: as descend
+    "transit": WaitPolicy("transit", planned_margin=0.1),
+    "rest": WaitPolicy("rest", planned_margin=0.1),
+    "home": WaitPolicy("home", planned_margin=0.1),
+}
+
+
+def as_policy(wait):
+    """Accept a WaitPolicy, an operation name, a number of seconds or None"""
+    if wait is None:
+        return NO_WAIT
+    if isinstance(wait, WaitPolicy):
+        return wait
+    if isinstance(wait, str):
+        return WAIT_POLICIES[wait]
+    return WaitPolicy("dwell", dwell=float(wait))
+
+
+# -------------------------
+# TELEMETRY
+# -------------------------
+
+StepTiming = namedtuple("StepTiming", "index label planned latency move dwell total")
+
+
+class CycleTelemetry:
+    """Per-step timing of a motion sequence"""
+
+    def __init__(self):
+        self.steps = []
+        self.started_at = time.monotonic()
+
+    def record(self, label, planned, sent_at, acked_at, done_at, dwell):
+        latency = (acked_at - sent_at) if acked_at is not None else float('nan')
+        move = done_at - sent_at
+        self.steps.append(StepTiming(len(self.steps) + 1, label, planned, latency, move, dwell, move + dwell))
+
+    def totals(self):
+        return {
+            "planned": sum(s.planned for s in self.steps),
+            "move": sum(s.move for s in self.steps),
+            "dwell": sum(s.dwell for s in self.steps),
+            "cycle": time.monotonic() - self.started_at,
+        }
+
+    def report(self):
+        print(f"{'#':>3} {'operation':<10} {'planned':>8} {'ack':>7} {'move':>7} {'dwell':>7}")
+        for s in self.steps:
+            print(f"{s.index:>3} {s.label:<10} {s.planned:>8.3f} {s.latency:>7.3f} {s.move:>7.3f} {s.dwell:>7.3f}")
+        totals = self.totals()
+        print(f"Total: planned {totals['planned']:.3f}s, moving {totals['move']:.3f}s, "
+              f"dwell {totals['dwell']:.3f}s, cycle {totals['cycle']:.3f}s")
@@ -0,0 +1,168 @@
+# -------------------------
+# WORKSPACE REACHABILITY GRID
+# -------------------------
+
+# Only the absolute motor limits are baked into the grid: the coupling
+# compensation check depends on the current pose and still runs at IK time.
+
+import os
+import json
+import hashlib
+import numpy as np
+from . import InverseKinematics as IK
+from . import Utilities as utl
+from .Diagnostics import get_logger
+
+log = get_logger("workspace")
+
+
+GRID_RESOLUTION = 0.002  # meters per cell
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workspace_grid.npz")
+
+# Bit flags stored in every grid cell
+BRANCH_A = 1  # Solution A (first ik_scara branch) is within the motor limits
+BRANCH_B = 2  # Solution B (second ik_scara branch) is within the motor limits
+
+_grid = None
+
+
+def workspace_key(resolution=GRID_RESOLUTION):
+    """
+    Hash of everything the grid depends on
+    Any change of link lengths or motor limits gives a new key (and a rebuild)
+    """
+    params = {
+        "L1": IK.L1,
+        "L2": IK.L2,
+        "motor1": [utl.MOTOR1_ABS_MIN, utl.MOTOR1_ABS_MAX],
+        "motor2": [utl.MOTOR2_ABS_MIN, utl.MOTOR2_ABS_MAX],
+        "resolution": resolution,
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class WorkspaceGrid:
+    """(x, y) lookup grid telling which IK branch is valid at each cell"""
+
+    def __init__(self, mask, origin, resolution, key):
+        self.mask = mask
+        self.origin = origin
+        self.resolution = resolution
+        self.key = key
+
+        # Cell centres of every reachable cell, used for snapping
+        iy, ix = np.nonzero(mask)
+        self._reachable_xy = np.stack((origin + ix * resolution, origin + iy * resolution), axis=1)
+
+    @classmethod
+    def build(cls, resolution=GRID_RESOLUTION):
+        """Evaluate the batch IK and the absolute motor limits on every cell centre"""
+        reach = IK.L1 + IK.L2
+        n = int(np.ceil(2 * reach / resolution)) + 1
+        origin = -reach
+        coords = origin + np.arange(n) * resolution
+        xs, ys = np.meshgrid(coords, coords)
+
+        (t1a, t2a), (t1b, t2b), reachable = IK.ik_scara_batch(xs, ys, IK.L1, IK.L2)
+
+        def within_limits(theta1, theta2):
+            theta1_deg = np.degrees(theta1)
+            theta2_deg = np.degrees(theta2)
+            return (reachable
+                    & (utl.MOTOR1_ABS_MIN <= theta1_deg) & (theta1_deg <= utl.MOTOR1_ABS_MAX)
+                    & (utl.MOTOR2_ABS_MIN <= theta2_deg) & (theta2_deg <= utl.MOTOR2_ABS_MAX))
+
+        mask = np.zeros(xs.shape, dtype=np.uint8)
+        mask[within_limits(t1a, t2a)] |= BRANCH_A
+        mask[within_limits(t1b, t2b)] |= BRANCH_B
+
+        return cls(mask, origin, resolution, workspace_key(resolution))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["mask"], float(data["origin"]), float(data["resolution"]), str(data["key"]))
+
+    def save(self, path):
+        np.savez_compressed(path, mask=self.mask, origin=self.origin,
+                            resolution=self.resolution, key=self.key)
+
+    def lookup_batch(self, xs, ys):
+        """Branch flags for arrays of targets (0 = unreachable or outside the grid)"""
+        ix = np.rint((np.asarray(xs, dtype=float) - self.origin) / self.resolution).astype(np.int64)
+        iy = np.rint((np.asarray(ys, dtype=float) - self.origin) / self.resolution).astype(np.int64)
+        n_rows, n_cols = self.mask.shape
+        inside = (ix >= 0) & (ix < n_cols) & (iy >= 0) & (iy < n_rows)
+        flags = np.zeros(ix.shape, dtype=np.uint8)
+        flags[inside] = self.mask[iy[inside], ix[inside]]
+        return flags
+
+    def lookup(self, x, y):
+        """Branch flags (BRANCH_A | BRANCH_B) of the cell containing (x, y)"""
+        ix = int(round((x - self.origin) / self.resolution))
+        iy = int(round((y - self.origin) / self.resolution))
+        n_rows, n_cols = self.mask.shape
+        if not (0 <= ix < n_cols and 0 <= iy < n_rows):
+            return 0
+        return int(self.mask[iy, ix])
+
+    def is_reachable(self, x, y):
+        return self.lookup(x, y) != 0
+
+    def snap(self, x, y):
+        """
+        Nearest reachable cell centre to (x, y)
+        Returns (x, y) unchanged if already reachable, or None if the grid is empty
+        """
+        if self.is_reachable(x, y):
+            return x, y
+        if len(self._reachable_xy) == 0:
+            return None
+        d2 = np.sum((self._reachable_xy - (x, y)) ** 2, axis=1)
+        sx, sy = self._reachable_xy[np.argmin(d2)]
+        return float(sx), float(sy)
+
+
+def get_workspace_grid(resolution=GRID_RESOLUTION, cache_file=CACHE_FILE):
+    """
+    Return the workspace grid for the current L1/L2 and motor limits
+    Uses the in-memory grid, then the on-disk cache, and rebuilds when either is stale
+    """
+    global _grid
+
+    key = workspace_key(resolution)
+    if _grid is not None and _grid.key == key:
+        return _grid
+
+    if cache_file and os.path.exists(cache_file):
+        try:
+            grid = WorkspaceGrid.load(cache_file)
+            if grid.key == key:
+                _grid = grid
+                return _grid
+        except (OSError, KeyError, ValueError) as e:
+            log.warning("⚠️ Ignoring unreadable workspace cache: %s", e)
+
+    _grid = WorkspaceGrid.build(resolution)
+    if cache_file:
+        _grid.save(cache_file)
+    return _grid
+
+
+def filter_targets(xs, ys, snap=False):
+    """
+    Reject (or snap) unreachable targets before running IK
+    Returns a list of (x, y) for the targets that can be reached
+    """
+    grid = get_workspace_grid()
+    flags = grid.lookup_batch(xs, ys)
+
+    targets = []
+    for x, y, flag in zip(np.atleast_1d(xs), np.atleast_1d(ys), np.atleast_1d(flags)):
+        if flag:
+            targets.append((float(x), float(y)))
+        elif snap:
+            snapped = grid.snap(float(x), float(y))
+            if snapped is not None:
+                targets.append(snapped)
+    return targets
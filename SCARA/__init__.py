@@ -0,0 +1,49 @@
+# -------------------------
+# SCARA ROBOT CONTROL PACKAGE
+# -------------------------
+
+# Importing the package is cheap and has no side effects: submodules and the
+# names below are loaded on first access, and a RobotController only opens
+# its serial port when a command needs it.
+#
+#   from SCARA import RobotController
+#   with RobotController("COM6") as robot:
+#       robot.pick_and_place(0.34, 0.02, 0.2, -0.2)
+#
+#   from SCARA import InverseKinematics as IK    # no numpy, no serial
+
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "RobotController": "Controller",
+    "ik_scara": "InverseKinematics",
+    "safe_ik_calculation": "Utilities",
+    "solve_ik": "Utilities",
+    "calculate_relative_steps": "Utilities",
+    "SimulatedSerial": "Simulator",
+    "configure_logging": "Diagnostics",
+    "connections": "Connection",
+}
+
+_SUBMODULES = (
+    "Benchmark", "Connection", "Controller", "Diagnostics", "ForwardKinematics", "InverseKinematics",
+    "MotionQueue", "Program", "Protocol", "RouteCache", "Scheduler", "Servofun", "Simulator",
+    "Trajectory", "Transport", "Utilities", "WaitPolicy", "Workspace", "main",
+)
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | set(_SUBMODULES))
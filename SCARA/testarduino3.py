@@ -1,12 +1,13 @@
-import serial
 import time
-import threading
+
+from .Connection import connections, default_port
 
 class Arduino3Tester:
-    def __init__(self, port, baudrate=115200):
-        self.ser = serial.Serial(port, baudrate, timeout=1)
-        time.sleep(2)  # Wait for Arduino to initialize
-        print(f"Connected to Arduino 3 on {port}")
+    def __init__(self, port=None, baudrate=115200):
+        # Shared handle: no reset when a broker or another tool already holds the port
+        self.port = default_port(port)
+        self.ser = connections.acquire(self.port, baudrate, timeout=1)
+        print(f"Connected to Arduino 3 on {self.port}")
         
     def send_command(self, command):
         """Send command to Arduino and wait for response"""
@@ -86,13 +87,13 @@ class Arduino3Tester:
         print("Stress test completed")
     
     def close(self):
-        """Close serial connection"""
-        self.ser.close()
+        """Release the shared serial connection"""
+        connections.release(self.ser)
         print("Connection closed")
 
-# Usage examples
+# Usage examples:  python -m SCARA.testarduino3
 if __name__ == "__main__":
-    # Update this to your Arduino 3's COM port
+    # Update this to your Arduino 3's COM port (None picks the first Arduino-like port)
     PORT = "COM5"  # Change to your actual port (COM3, COM4, etc.)
     
     tester = None
@@ -0,0 +1,29 @@
+import json
+
+import numpy as np
+import pytest
+
+import ProjectFinancials as pf
+
+npf = pytest.importorskip("numpy_financial")
+
+
+@pytest.mark.parametrize("cash_flows", [
+    [-100, 230, -132],                                    # IRRs 10% and 20%
+    [-100000, -287560, -211847, -135318, 73449, -5139],   # Worst-case Monte Carlo draw
+])
+def test_irr_with_two_sign_changes_matches_npf(cash_flows):
+    assert pf.irr_batch(cash_flows)[0] == pytest.approx(npf.irr(cash_flows), abs=1e-9)
+
+
+def test_irr_without_sign_change_is_nan():
+    assert np.isnan(pf.irr_batch([[-100, -10, -5], [0, 10, 5]])).all()
+
+
+def test_monte_carlo_irr_matches_npf():
+    with open(pf.SCENARIOS_FILE) as f:
+        worst = json.load(f)['scenarios']['Worst']
+    result = pf.monte_carlo(worst['new_units'], worst['fixed_costs'], n_draws=5000, seed=1,
+                            keep_cash_flows=True)
+    expected = [npf.irr(row) for row in result['cash_flows']]
+    np.testing.assert_allclose(result['irr'], expected, rtol=0, atol=1e-9)
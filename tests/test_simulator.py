@@ -0,0 +1,28 @@
+from SCARA import Protocol as proto
+from SCARA.Simulator import SimulatedSerial, slave3_duration
+
+
+def send(device, pulses1=0, pulses3=0, servo2=90):
+    device.write(proto.pack_motion_frame(pulses1, 0, 0, 0, pulses3, 0, 0, servo2))
+    while device.readline().strip() != b"DONE":
+        pass
+
+
+def test_master_z_frames_queue_on_slave3():
+    with SimulatedSerial(firmware="master", time_scale=0) as device:
+        send(device, pulses3=1000)
+        send(device, servo2=0)             # Z still moving: waits in the slot
+        send(device, servo2=90)            # Replaces the waiting frame
+        assert device.slave3_busy_until == slave3_duration(1000)
+        assert [command[7] for command in device.clobbered] == [0]
+        assert len(device.slave3_executed) == 1
+
+
+def test_master_z_frame_after_travel_runs_at_once():
+    with SimulatedSerial(firmware="master", time_scale=0) as device:
+        send(device, pulses3=100)
+        send(device, pulses1=200)          # Waits for Z, M1 time lets it finish
+        send(device, pulses3=100)
+        assert device.clobbered == []
+        received, started, command = device.slave3_executed[-1]
+        assert command[4] == 100 and received == started
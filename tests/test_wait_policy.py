@@ -0,0 +1,33 @@
+from SCARA.Controller import RobotController, HOME_ANGLES, cycle_points
+from SCARA.MotionQueue import plan_move
+from SCARA.Simulator import slave3_duration
+from SCARA.WaitPolicy import WAIT_POLICIES, planned_duration
+
+
+def test_descend_on_master_waits_for_slave3_z_travel():
+    move = plan_move(0.34, 0.02, HOME_ANGLES, -7, 135, True, "descend", use_cache=False)
+    z_travel = slave3_duration(move.steps[4])
+    # The master reports done right away when only Z moves
+    wait = WAIT_POLICIES["descend"].remaining(move, 0.0, 0.0, 0.0, firmware="master")
+    assert wait >= z_travel
+    assert WAIT_POLICIES["descend"].remaining(move, 0.0, 0.0, 0.0, firmware="nano") < z_travel
+
+
+def test_master_pick_does_not_clobber_z_commands():
+    robot = RobotController("SIM", firmware="master")
+    try:
+        points = cycle_points(0.34, 0.02, 0.2, -0.2, z_pick=-7)[:5]  # Approach, descend, grip, lift
+        telemetry = robot.run_points(points)
+        assert len(telemetry.steps) == len(points)
+        assert robot.ser.clobbered == []
+        assert all(received == started for received, started, _ in robot.ser.slave3_executed)
+    finally:
+        robot.close()
+
+
+def test_transit_waits_for_planned_duration_not_a_fixed_dwell():
+    move = plan_move(0.2, -0.2, HOME_ANGLES, 0, 90, False, "transit", use_cache=False)
+    planned = planned_duration(move, "nano")
+    # Completion reported on time: only the margin is left
+    wait = WAIT_POLICIES["transit"].remaining(move, 0.3, 0.0, planned, firmware="nano")
+    assert abs(wait - 0.1 * planned) < 1e-9